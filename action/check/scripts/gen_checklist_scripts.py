@@ -8,6 +8,7 @@
 import os
 import re
 import sys
+import json
 import argparse
 import xlrd
 import collections
@@ -35,6 +36,10 @@ def readArgs():
     parser.add_argument('-o', '--outdir',
                         default=CWD,
                         help='Specify the checklist script output directory, default is current directory.')
+    parser.add_argument('-F', '--format',
+                        default='rule',
+                        choices=['rule', 'script'],
+                        help='Generate one checklist rule file "<flow>_<vendor>.checklist.json" (for ic_check.py, default), or one python script per task.')
 
     args = parser.parse_args()
 
@@ -46,7 +51,7 @@ def readArgs():
         print('*Error*: ' + str(args.outdir) + ': No such output directory, please create it first.')
         sys.exit(1)
 
-    return (args.input, args.flow, args.vendor, args.outdir)
+    return (args.input, args.flow, args.vendor, args.outdir, args.format)
 
 
 class GenScripts():
@@ -197,6 +202,57 @@ class GenScripts():
 
         return (message_list, waive_message_list)
 
+    def process_rule_file_setting(self, task, file_string):
+        """
+        Replace variable "<TASK>", keep "<BLOCK>" and "<CORNER>" for ic_check.py.
+        """
+        if re.search(',', file_string):
+            print('*Error*: Cannot include "," on FILE line.')
+            sys.exit(1)
+
+        file_list = []
+
+        for file_name in [item.strip() for item in file_string.split('\n') if item.strip()]:
+            if re.search('<TASK>', file_name) or re.search('<BLOCK>', file_name) or re.search('<CORNER>', file_name):
+                file_name = re.sub(r'\s+', '', re.sub('<TASK>', task, file_name))
+
+            file_list.append(file_name)
+
+        return (file_list)
+
+    def write_rule_file(self):
+        """
+        Write checklist rule file for all tasks, ic_check.py checks tasks with it in one process.
+        """
+        rule_file = str(self.outdir) + '/' + str(self.flow) + '_' + str(self.vendor) + '.checklist.json'
+        rule_dic = {'flow': self.flow, 'vendor': self.vendor, 'task': collections.OrderedDict()}
+
+        for task in self.checklist_dic.keys():
+            rule_dic['task'][task] = []
+
+            for item_dic in self.checklist_dic[task]:
+                (message_list, waive_message_list) = self.process_message_setting(item_dic['MESSAGE'], item_dic['WAIVE_MESSAGE'])
+
+                # Check messages are valid regular expressions.
+                for message in message_list + waive_message_list:
+                    try:
+                        re.compile(message)
+                    except re.error as error:
+                        print('*Error*: Invalid message "' + str(message) + '" for task "' + str(task) + '": ' + str(error))
+                        sys.exit(1)
+
+                rule_dic['task'][task].append({'type': item_dic['TYPE'],
+                                               'description': item_dic['DESCRIPTION'],
+                                               'file_list': self.process_rule_file_setting(task, item_dic['FILE']),
+                                               'message_list': message_list,
+                                               'waive_message_list': waive_message_list})
+
+        print('>>> Generating checklist rule file for ' + str(self.flow) + ' ' + str(len(rule_dic['task'])) + ' tasks ...')
+        print('    ' + str(rule_file))
+
+        with open(rule_file, 'w') as RF:
+            RF.write(json.dumps(rule_dic, indent=4))
+
     def write_task_script(self, task):
         """
         Write checklist script for one task.
@@ -237,7 +293,8 @@ def read_args():
 
             FL.write("""
 def file_check(block, task, corner):
-    my_file_check = common_file_check.FileCheck()
+    my_file_check = common_file_check.FileCheck(task=task)
+    item_list = []
 
 """)
 
@@ -249,20 +306,13 @@ def file_check(block, task, corner):
                 files = self.process_file_setting(task, item_dic['FILE'], 'file_list')
                 FL.write('    file_list = [' + str(files) + ']\n')
                 (message_list, waive_message_list) = self.process_message_setting(item_dic['MESSAGE'], item_dic['WAIVE_MESSAGE'])
-
-                if message_list and waive_message_list:
-                    FL.write('    message_list = ' + str(message_list) + '\n')
-                    FL.write('    waive_message_list = ' + str(waive_message_list) + '\n')
-                    FL.write('    my_file_check.' + str(item_dic['TYPE']) + '(description, file_list, message_list, waive_message_list)\n')
-                elif message_list:
-                    FL.write('    message_list = ' + str(message_list) + '\n')
-                    FL.write('    my_file_check.' + str(item_dic['TYPE']) + '(description, file_list, message_list)\n')
-                else:
-                    FL.write('    my_file_check.' + str(item_dic['TYPE']) + '(description, file_list)\n')
-
+                FL.write("    item_list.append({'type': '" + str(item_dic['TYPE']) + "', 'description': description, 'file_list': file_list, 'message_list': " + str(message_list) + ", 'waive_message_list': " + str(waive_message_list) + "})\n")
                 FL.write('\n')
 
-            FL.write("""    if my_file_check.final_return_code == 0:
+            FL.write("""    # Files are checked in parallel, report is written once.
+    my_file_check.run_checklist(item_list)
+
+    if my_file_check.final_return_code == 0:
         print(str(task) + ' check pass')
     else:
         common.print_error(str(task) + ' check fail')
@@ -293,12 +343,16 @@ if __name__ == '__main__':
 
             os.chmod(task_script, stat.S_IRWXU+stat.S_IRWXG+stat.S_IRWXO)
 
-    def gen_scripts(self):
+    def gen_scripts(self, format='rule'):
         """
-        Generate check scripts with checklist excel.
+        Generate check rule file (or scripts) with checklist excel.
         """
         self.parse_checklist_excel()
 
+        if format == 'rule':
+            self.write_rule_file()
+            return
+
         for task in self.checklist_dic.keys():
             task_script = str(self.outdir) + '/' + str(self.flow) + '_' + str(self.vendor) + '.' + str(task) + '.py'
             print('>>> Generating checklist script for ' + str(self.flow) + ' task "' + str(task) + '" ...')
@@ -310,9 +364,9 @@ if __name__ == '__main__':
 # Main Process #
 ################
 def main():
-    (input, flow, vendor, outdir) = readArgs()
+    (input, flow, vendor, outdir, format) = readArgs()
     myGenQualityScript = GenScripts(input, flow, vendor, outdir)
-    myGenQualityScript.gen_scripts()
+    myGenQualityScript.gen_scripts(format)
 
 
 if __name__ == '__main__':
@@ -8,9 +8,11 @@
 import os
 import re
 import sys
+import json
 import argparse
-import xlwt
+import xlsxwriter
 import collections
+from concurrent.futures import ProcessPoolExecutor
 
 sys.path.append(str(os.environ['IFP_INSTALL_PATH']) + '/bin')
 import parse_config
@@ -18,6 +20,10 @@ import parse_config
 os.environ['PYTHONUNBUFFERED'] = '1'
 CWD = os.getcwd()
 
+REPORT_LINE_PATTERN = re.compile(r'^\s*(\w+?)\s*:\s*(.+?)\s*(\(details please see (.+?)\))?\s*$')
+# Excel limit of hyperlinks on one worksheet.
+MAX_URL_NUM = 65530
+
 
 def read_args():
     """
@@ -31,11 +37,15 @@ def read_args():
     parser.add_argument('-r', '--report',
                         default=str(CWD)+'/checklist.sum.xlsx',
                         help='Specify the checklist summary report, default is "<CWD>/checklist.sum.xlsx".')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=os.cpu_count(),
+                        help='Specify the process number to parse checklist reports, default is the cpu number.')
 
     args = parser.parse_args()
 
     # Check report
-    report_dir = os.path.dirname(args.report)
+    report_dir = os.path.dirname(os.path.abspath(args.report))
 
     if not os.path.exists(report_dir):
         print('*Error*: ' + str(report_dir) + ': No such report directory.')
@@ -48,235 +58,247 @@ def read_args():
             print('*Error*: Failed on removing old report "' + str(args.report) + '": ' + str(error))
             sys.exit(1)
 
-    return (args.config_file, args.report)
+    return (args.config_file, os.path.abspath(args.report), max(1, args.jobs))
 
 
-class GenChecklistSummary():
-    def __init__(self, config_file, report):
-        config_obj = parse_config.Config(config_file)
-        self.config_dic = config_obj.config_dic
-        self.report = report
+def parse_checklist_report(file_check_report):
+    """
+    Parse file_check report, return [[result, description, review_file], ...].
+    review_file is '' if it is not specified or missing.
+    """
+    item_list = []
 
-    def get_task_checklist_dic(self):
-        task_checklist_dic = collections.OrderedDict()
+    with open(file_check_report, 'r') as FCR:
+        for line in FCR:
+            my_match = REPORT_LINE_PATTERN.match(line)
 
-        for block in self.config_dic['BLOCK'].keys():
-            for version in self.config_dic['BLOCK'][block].keys():
-                for flow in self.config_dic['BLOCK'][block][version].keys():
-                    for vendor in self.config_dic['BLOCK'][block][version][flow].keys():
-                        for branch in self.config_dic['BLOCK'][block][version][flow][vendor].keys():
-                            for task in self.config_dic['BLOCK'][block][version][flow][vendor][branch].keys():
-                                task_path = ''
-                                task_obj = self.config_dic['BLOCK'][block][version][flow][vendor][branch][task]
-
-                                if 'CHECK' in task_obj.ACTION.keys():
-                                    if 'PATH' in task_obj.ACTION['CHECK'].keys():
-                                        if os.path.exists(task_obj.ACTION['CHECK']['PATH']):
-                                            task_path = task_obj.ACTION['CHECK']['PATH']
-
-                                if task_path:
-                                    task_checklist_result_dic = self.get_task_checklist_result(task_path)
-
-                                    task_checklist_dic.setdefault(flow, collections.OrderedDict())
-                                    task_checklist_dic[flow].setdefault(vendor, collections.OrderedDict())
-                                    task_checklist_dic[flow][vendor].setdefault(block, collections.OrderedDict())
-                                    task_checklist_dic[flow][vendor][block].setdefault(str(version)+'_'+str(branch), collections.OrderedDict())
-                                    task_checklist_dic[flow][vendor][block][str(version)+'_'+str(branch)].setdefault(task, collections.OrderedDict())
-                                    task_checklist_dic[flow][vendor][block][str(version)+'_'+str(branch)][task] = task_checklist_result_dic
+            if my_match:
+                review_file = my_match.group(4) or ''
 
-        return (task_checklist_dic)
+                if review_file and (not os.path.exists(review_file)):
+                    review_file = ''
 
-    def get_task_checklist_result(self, task_path):
-        task_checklist_result_dic = collections.OrderedDict()
+                item_list.append([my_match.group(1), my_match.group(2), review_file])
 
-        if task_path:
-            file_check_report = str(task_path) + '/file_check/file_check.rpt'
+    return (item_list)
 
-            if not os.path.exists(file_check_report):
-                print('*Warning*: file_check report "' + str(file_check_report) + '" is missing.')
 
-                result = 'NA'
-                description = 'NA'
-                review_file = ''
-                task_checklist_result_dic.setdefault(description, collections.OrderedDict())
-                task_checklist_result_dic[description]['result'] = result
-                task_checklist_result_dic[description]['review_file'] = review_file
-            else:
-                with open(file_check_report, 'r') as FCR:
-                    for line in FCR.readlines():
-                        if re.match(r'^\s*(\w+?)\s*:\s*(.+?)\s*(\(details please see (.+?)\))?\s*$', line):
-                            my_match = re.match(r'^\s*(\w+?)\s*:\s*(.+?)\s*(\(details please see (.+?)\))?\s*$', line)
-                            result = my_match.group(1)
-                            description = my_match.group(2)
-                            review_file = my_match.group(4)
-                            task_checklist_result_dic.setdefault(description, collections.OrderedDict())
-                            task_checklist_result_dic[description]['result'] = result
-                            task_checklist_result_dic[description]['review_file'] = review_file
-
-        return (task_checklist_result_dic)
+class GenChecklistSummary():
+    def __init__(self, config_file, report, jobs=1):
+        self.config_obj = parse_config.Config(config_file)
+        self.report = report
+        self.jobs = jobs
+
+        # Parsed checklist reports are cached by mtime/size, only new or changed reports are parsed again.
+        self.cache_file = str(os.path.dirname(self.report)) + '/.' + str(os.path.basename(self.report)) + '.cache.json'
+
+    def get_task_check_path_list(self):
+        """
+        Return [(flow, block, version, task, check_path), ...] for all tasks with CHECK action.
+        """
+        task_check_path_list = []
+        var_resolver = self.config_obj.var_resolver
+
+        for item in self.config_obj.main_table_info_list:
+            task_obj = self.config_obj.get_task(item.Block, item.Version, item.Flow, item.Task)
+
+            if ('CHECK' in task_obj.ACTION) and task_obj.ACTION['CHECK'].get('PATH'):
+                check_path = var_resolver.expand(str(task_obj.ACTION['CHECK']['PATH']), show_warning=False, BLOCK=item.Block, VERSION=item.Version, FLOW=item.Flow, TASK=item.Task)
+                task_check_path_list.append((item.Flow, item.Block, item.Version, item.Task, check_path))
+
+        return (task_check_path_list)
+
+    @staticmethod
+    def find_report_files(check_path_list):
+        """
+        Find "<check_path>/file_check/file_check.rpt" with one scandir on every file_check directory.
+        Return {check_path: (file_check_report, mtime, size)}, missing report is not on the dict.
+        """
+        report_dic = {}
+
+        for check_path in set(check_path_list):
+            try:
+                with os.scandir(str(check_path) + '/file_check') as entries:
+                    for entry in entries:
+                        if (entry.name == 'file_check.rpt') and entry.is_file():
+                            file_stat = entry.stat()
+                            report_dic[check_path] = (entry.path, file_stat.st_mtime, file_stat.st_size)
+                            break
+            except OSError:
+                continue
+
+        return (report_dic)
+
+    def load_cache(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as CF:
+                    return json.load(CF)
+            except Exception as warning:
+                print('*Warning*: Failed on loading checklist summary cache "' + str(self.cache_file) + '": ' + str(warning))
+
+        return {}
+
+    def save_cache(self, cache_dic):
+        try:
+            tmp_file = str(self.cache_file) + '.' + str(os.getpid()) + '.tmp'
 
-    def write_excel(self, task_checklist_dic):
-        workbook = xlwt.Workbook(encoding='utf-8')
-
-        for flow in task_checklist_dic.keys():
-            for vendor in task_checklist_dic[flow].keys():
-                worksheet = workbook.add_sheet(str(flow) + '_' + str(vendor))
-
-                title_style = xlwt.XFStyle()
-                font = xlwt.Font()
-                font.bold = True
-                title_style.font = font
-                borders = xlwt.Borders()
-                borders.left = 1
-                borders.right = 1
-                borders.top = 1
-                borders.bottom = 1
-                title_style.borders = borders
-                pattern = xlwt.Pattern()
-                pattern.pattern = xlwt.Pattern.SOLID_PATTERN
-                pattern.pattern_fore_colour = 22
-                title_style.pattern = pattern
-                alignment = xlwt.Alignment()
-                alignment.horz = 0x02
-                alignment.vert = 0x01
-                title_style.alignment = alignment
-
-                content_style = xlwt.XFStyle()
-                content_style.alignment = alignment
-                content_style.borders = borders
-
-                left_content_style = xlwt.XFStyle()
-                left_alignment = xlwt.Alignment()
-                left_alignment.horz = 0x01
-                left_content_style.alignment = left_alignment
-                left_content_style.borders = borders
-
-                red_content_style = xlwt.XFStyle()
-                red_content_style.alignment = alignment
-                red_content_style.borders = borders
-                red_font = xlwt.Font()
-                red_font.colour_index = 2
-                red_content_style.font = red_font
-
-                green_content_style = xlwt.XFStyle()
-                green_content_style.alignment = alignment
-                green_content_style.borders = borders
-                green_font = xlwt.Font()
-                green_font.colour_index = 3
-                green_content_style.font = green_font
-
-                pink_content_style = xlwt.XFStyle()
-                pink_content_style.alignment = alignment
-                pink_content_style.borders = borders
-                pink_font = xlwt.Font()
-                pink_font.colour_index = 2
-                pink_content_style.font = pink_font
-
-                (block_version_dic, task_list, task_checklist_description_dic) = self.get_block_version_task_info(task_checklist_dic[flow][vendor])
-
-                # Column 0-1 title
-                worksheet.write_merge(0, 1, 0, 0, 'Task', title_style)
-                worksheet.write_merge(0, 1, 1, 1, 'Description', title_style)
-
-                # Column 0, tasks (row 1-end)
-                row = 2
-                max_length = 0
-
-                for task in task_list:
-                    if len(task) > max_length:
-                        max_length = len(task)
-                        worksheet.col(0).width = 256*(max_length+4)
-
-                    if len(task_checklist_description_dic[task]) > 1:
-                        worksheet.write_merge(row, row+len(task_checklist_description_dic[task])-1, 0, 0, task, content_style)
-                    else:
-                        worksheet.write(row, 0, task, content_style)
+            with open(tmp_file, 'w') as CF:
+                CF.write(json.dumps(cache_dic))
 
-                    row += len(task_checklist_description_dic[task])
+            os.replace(tmp_file, self.cache_file)
+        except Exception as warning:
+            print('*Warning*: Failed on saving checklist summary cache "' + str(self.cache_file) + '": ' + str(warning))
 
-                # Column 1, task checklist description (row 1-end)
-                row = 2
-                max_length = 0
+    def parse_report_files(self, report_dic):
+        """
+        Parse reports on a worker pool, unchanged reports are got from cache.
+        Return {file_check_report: [[result, description, review_file], ...]}.
+        """
+        cache_dic = self.load_cache()
+        new_cache_dic = {}
+        todo_list = []
 
-                for task in task_list:
-                    for description in task_checklist_description_dic[task]:
-                        worksheet.write(row, 1, description, left_content_style)
+        for (file_check_report, mtime, size) in report_dic.values():
+            cache = cache_dic.get(file_check_report)
 
-                        if len(description) > max_length:
-                            max_length = len(description)
-                            worksheet.col(1).width = 256*(max_length+4)
+            if cache and (cache['mtime'] == mtime) and (cache['size'] == size):
+                new_cache_dic[file_check_report] = cache
+            else:
+                todo_list.append((file_check_report, mtime, size))
 
-                        row += 1
+        max_workers = min(self.jobs, len(todo_list))
+        file_list = [file_check_report for (file_check_report, mtime, size) in todo_list]
 
-                # Column 2-end, block checklist result (row 1-end)
-                column = 2
+        if max_workers > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                item_list_list = list(executor.map(parse_checklist_report, file_list, chunksize=max(1, len(file_list) // (max_workers * 4))))
+        else:
+            item_list_list = [parse_checklist_report(file_check_report) for file_check_report in file_list]
 
-                for (index, block) in enumerate(list(block_version_dic.keys())):
-                    worksheet.write_merge(0, 0, column, column+(len(block_version_dic[block])-1), block, title_style)
+        for ((file_check_report, mtime, size), item_list) in zip(todo_list, item_list_list):
+            new_cache_dic[file_check_report] = {'mtime': mtime, 'size': size, 'item_list': item_list}
 
-                    for version in block_version_dic[block]:
-                        worksheet.write(1, column, version, title_style)
-                        worksheet.col(column).width = 256*(len(version)+4)
+        if todo_list or (len(new_cache_dic) != len(cache_dic)):
+            self.save_cache(new_cache_dic)
 
-                        row = 2
-                        max_length = len(block)
+        print('Parsed ' + str(len(todo_list)) + ' checklist report(s), ' + str(len(report_dic) - len(todo_list)) + ' from cache.')
 
-                        for task in task_list:
-                            if task in task_checklist_dic[flow][vendor][block][version].keys():
-                                for description in task_checklist_dic[flow][vendor][block][version][task].keys():
-                                    result = task_checklist_dic[flow][vendor][block][version][task][description]['result']
-                                    review_file = task_checklist_dic[flow][vendor][block][version][task][description]['review_file']
+        return {file_check_report: cache['item_list'] for (file_check_report, cache) in new_cache_dic.items()}
 
-                                    if result == 'PASSED':
-                                        worksheet.write(row, column, result, green_content_style)
-                                    elif result == 'FAILED':
-                                        if review_file and os.path.exists(review_file):
-                                            worksheet.write(row, column, xlwt.Formula('HYPERLINK("file://' + str(review_file) + '"; "' + str(result) + '")'), red_content_style)
-                                        else:
-                                            worksheet.write(row, column, result, red_content_style)
-                                    elif result == 'REVIEW':
-                                        if review_file and os.path.exists(review_file):
-                                            worksheet.write(row, column, xlwt.Formula('HYPERLINK("file://' + str(review_file) + '"; "' + str(result) + '")'), pink_content_style)
-                                        else:
-                                            worksheet.write(row, column, result, pink_content_style)
-                                    else:
-                                        worksheet.write(row, column, result, content_style)
+    def get_task_checklist_dic(self):
+        """
+        Return {flow: {'block_version_dic': {block: [version, ...]}, 'task_description_dic': {task: [description, ...]}, 'result_dic': {(block, version, task): {description: (result, review_file)}}}}.
+        """
+        task_check_path_list = self.get_task_check_path_list()
+        report_dic = self.find_report_files([check_path for (flow, block, version, task, check_path) in task_check_path_list])
+        report_item_dic = self.parse_report_files(report_dic)
+        task_checklist_dic = collections.OrderedDict()
+
+        for (flow, block, version, task, check_path) in task_check_path_list:
+            if not os.path.isdir(check_path):
+                continue
+
+            if check_path in report_dic:
+                item_list = report_item_dic[report_dic[check_path][0]]
+            else:
+                print('*Warning*: file_check report "' + str(check_path) + '/file_check/file_check.rpt" is missing.')
+                item_list = [['NA', 'NA', '']]
 
-                                    if len(result) > max_length:
-                                        max_length = len(result)
-                                        worksheet.col(column).width = 256*(max_length+4)
+            flow_dic = task_checklist_dic.setdefault(flow, {'block_version_dic': collections.OrderedDict(), 'task_description_dic': collections.OrderedDict(), 'result_dic': {}})
+            version_list = flow_dic['block_version_dic'].setdefault(block, [])
 
-                                    row += 1
+            if version not in version_list:
+                version_list.append(version)
 
-                            else:
-                                for description in task_checklist_description_dic[task]:
-                                    worksheet.write(row, column, 'NA', content_style)
-                                    row += 1
+            description_dic = flow_dic['task_description_dic'].setdefault(task, collections.OrderedDict())
+            result_dic = flow_dic['result_dic'].setdefault((block, version, task), {})
 
-                        column += 1
+            for (result, description, review_file) in item_list:
+                description_dic[description] = None
+                result_dic[description] = (result, review_file)
+
+        return (task_checklist_dic)
+
+    def write_excel(self, task_checklist_dic):
+        """
+        Write summary with constant memory mode, rows are written (and flushed) one by one.
+        """
+        workbook = xlsxwriter.Workbook(self.report, {'constant_memory': True})
+
+        title_style = workbook.add_format({'bold': True, 'border': 1, 'bg_color': '#C0C0C0', 'align': 'center', 'valign': 'vcenter'})
+        content_style = workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter'})
+        left_content_style = workbook.add_format({'border': 1, 'align': 'left'})
+        result_style_dic = {'PASSED': workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter', 'font_color': '#00FF00'}),
+                            'FAILED': workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter', 'font_color': '#FF0000'}),
+                            'REVIEW': workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter', 'font_color': '#FF0000'})}
+
+        for (flow, flow_dic) in task_checklist_dic.items():
+            # Sheet name is limited to 31 characters.
+            worksheet = workbook.add_worksheet(str(flow)[:31])
+            block_version_list = [(block, version) for (block, version_list) in flow_dic['block_version_dic'].items() for version in version_list]
+            task_description_dic = flow_dic['task_description_dic']
+            result_dic = flow_dic['result_dic']
+
+            # Column width (set before rows are written).
+            worksheet.set_column(0, 0, max([len(str(task)) for task in task_description_dic] + [4]) + 4)
+            worksheet.set_column(1, 1, max([len(str(description)) for description_dic in task_description_dic.values() for description in description_dic] + [11]) + 4)
+
+            for (column, (block, version)) in enumerate(block_version_list, start=2):
+                worksheet.set_column(column, column, max(len(str(block)), len(str(version)), 6) + 4)
+
+            worksheet.freeze_panes(2, 2)
+
+            # Row 0, block titles.
+            worksheet.write(0, 0, 'Task', title_style)
+            worksheet.write(0, 1, 'Description', title_style)
+            column = 2
+
+            for (block, version_list) in flow_dic['block_version_dic'].items():
+                if len(version_list) > 1:
+                    worksheet.merge_range(0, column, 0, column+len(version_list)-1, block, title_style)
+                else:
+                    worksheet.write(0, column, block, title_style)
+
+                column += len(version_list)
+
+            # Row 1, version titles.
+            worksheet.write_blank(1, 0, None, title_style)
+            worksheet.write_blank(1, 1, None, title_style)
+
+            for (column, (block, version)) in enumerate(block_version_list, start=2):
+                worksheet.write(1, column, version, title_style)
+
+            # Row 2-end, one row for every task checklist description.
+            row = 2
+            url_num = 0
+
+            for (task, description_dic) in task_description_dic.items():
+                task_result_dic_list = [result_dic.get((block, version, task)) for (block, version) in block_version_list]
+
+                for (index, description) in enumerate(description_dic):
+                    if index == 0:
+                        worksheet.write(row, 0, task, content_style)
+                    else:
+                        worksheet.write_blank(row, 0, None, content_style)
 
-        workbook.save(self.report)
+                    worksheet.write(row, 1, description, left_content_style)
 
-    def get_block_version_task_info(self, task_checklist_dic):
-        task_list = []
-        task_checklist_description_dic = collections.OrderedDict()
-        block_version_dic = collections.OrderedDict()
+                    for (column, task_result_dic) in enumerate(task_result_dic_list, start=2):
+                        (result, review_file) = task_result_dic.get(description, ('NA', '')) if task_result_dic else ('NA', '')
+                        style = result_style_dic.get(result, content_style)
 
-        for block in task_checklist_dic.keys():
-            block_version_dic.setdefault(block, [])
+                        if review_file and (result in ['FAILED', 'REVIEW']) and (url_num < MAX_URL_NUM):
+                            url_num += 1
 
-            for version in task_checklist_dic[block].keys():
-                block_version_dic[block].append(version)
+                            if worksheet.write_url(row, column, 'file://' + str(review_file), style, string=result) >= 0:
+                                continue
 
-                for task in task_checklist_dic[block][version].keys():
-                    if task not in task_list:
-                        task_list.append(task)
-                        task_checklist_description_dic.setdefault(task, [])
+                        worksheet.write(row, column, result, style)
 
-                        for description in task_checklist_dic[block][version][task].keys():
-                            task_checklist_description_dic[task].append(description)
+                    row += 1
 
-        return (block_version_dic, task_list, task_checklist_description_dic)
+        workbook.close()
 
     def gen_checklist_summary(self):
         task_checklist_dic = self.get_task_checklist_dic()
@@ -290,8 +312,8 @@ class GenChecklistSummary():
 # Main Process #
 ################
 def main():
-    (config_file, report) = read_args()
-    my_gen_checklist_summary = GenChecklistSummary(config_file, report)
+    (config_file, report, jobs) = read_args()
+    my_gen_checklist_summary = GenChecklistSummary(config_file, report, jobs)
     my_gen_checklist_summary.gen_checklist_summary()
 
 
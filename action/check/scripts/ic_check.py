@@ -10,9 +10,11 @@ import sys
 import argparse
 import datetime
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 sys.path.append(str(os.environ['IFP_INSTALL_PATH']) + '/common')
 import common
+import common_file_check
 
 os.environ['PYTHONUNBUFFERED'] = '1'
 CWD = os.getcwd()
@@ -25,8 +27,9 @@ def read_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('-d', '--dir',
-                        default=CWD,
-                        help='Specify the check directory, default is current directory.')
+                        nargs='+',
+                        default=[CWD],
+                        help='Specify the check directory, default is current directory. (one directory for all tasks, or one directory per task)')
     parser.add_argument('-f', '--flow',
                         required=True,
                         help='Specify the flow name.')
@@ -37,19 +40,40 @@ def read_args():
                         required=True,
                         help='Specify the block name')
     parser.add_argument('-t', '--task',
-                        default='',
-                        help='Specify the task name')
+                        nargs='+',
+                        default=[''],
+                        help='Specify the task name(s), all tasks are checked in one process with checklist rule file.')
     parser.add_argument('-c', '--corner',
                         default='',
                         help='Specify the corner name')
+    parser.add_argument('-r', '--rule_file',
+                        default='',
+                        help='Specify checklist rule file (generated by gen_checklist_scripts.py), default is "<IFP_INSTALL_PATH>/function/check/<flow>/<vendor>/<flow>_<vendor>.checklist.json".')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=os.cpu_count(),
+                        help='Specify the process number for file check, default is cpu number.')
 
     args = parser.parse_args()
 
-    if not os.path.exists(args.dir):
-        print('*Error*: "' + str(args.dir) + '": No such directory.')
+    for check_dir in args.dir:
+        if not os.path.exists(check_dir):
+            print('*Error*: "' + str(check_dir) + '": No such directory.')
+            sys.exit(1)
+
+    # Task directories are entered one by one, so relative path must be converted first.
+    args.dir = [os.path.abspath(check_dir) for check_dir in args.dir]
+
+    if len(args.dir) == 1:
+        args.dir = args.dir * len(args.task)
+    elif len(args.dir) != len(args.task):
+        print('*Error*: Directory number must be 1 or the same as task number.')
         sys.exit(1)
 
-    return (args.dir, args.flow, args.vendor, args.block, args.task, args.corner)
+    if not args.rule_file:
+        args.rule_file = str(os.environ['IFP_INSTALL_PATH']) + '/function/check/' + str(args.flow) + '/' + str(args.vendor) + '/' + str(args.flow) + '_' + str(args.vendor) + '.checklist.json'
+
+    return (args.dir, args.flow, args.vendor, args.block, args.task, args.corner, args.rule_file, args.jobs)
 
 
 def write_result_file(result, check_report):
@@ -76,6 +100,59 @@ def write_result_file(result, check_report):
             RE.write(str(current_time) + '\n')
 
 
+def create_check_report_dir(check_dir):
+    """
+    Remove old check report directory and create a new one.
+    """
+    check_report_dir = str(check_dir) + '/file_check'
+
+    if os.path.exists(check_report_dir):
+        try:
+            print('Remove ' + str(check_report_dir))
+            shutil.rmtree(check_report_dir)
+        except Exception as warning:
+            print('*Warning*: Failed on removing old check report directory "' + str(check_report_dir) + '".')
+            print('           ' + str(warning))
+
+    try:
+        print('Create ' + str(check_report_dir))
+        os.makedirs(check_report_dir)
+    except Exception as error:
+        print('*Error*: Failed on creating check report directory "' + str(check_report_dir) + '": ' + str(error))
+        sys.exit(1)
+
+    return (check_report_dir)
+
+
+def check_rule_result(rule_dic, check_dir, block, task, corner, executor=None, jobs=1):
+    """
+    Check task run result with checklist rule set (in current process).
+    Write the result file "PASS" or "FAIL" to mark the result.
+    """
+    if task not in rule_dic['task']:
+        print('*Error*: task "' + str(task) + '" is not on checklist rule file.')
+        return (1)
+
+    print('Come into ' + str(check_dir))
+    os.chdir(check_dir)
+    check_report_dir = create_check_report_dir(check_dir)
+    check_report = str(check_report_dir) + '/file_check.rpt'
+
+    my_file_check = common_file_check.FileCheck(report_dir=check_report_dir, task=task)
+    return_code = my_file_check.run_checklist(common_file_check.get_checklist_item_list(rule_dic, task, block, corner), max_workers=jobs, executor=executor)
+
+    if return_code == 0:
+        print(str(task) + ' check pass')
+        print('Check report : ' + str(check_report))
+        write_result_file('PASS', check_report)
+        return (0)
+    else:
+        print(str(task) + ' check fail')
+        print('Check report : ' + str(check_report))
+        write_result_file('FAIL', check_report)
+        return (1)
+
+
 def check_result(check_dir, flow, vendor, block, task, corner):
     """
     Check task run result with checklist script.
@@ -89,32 +166,14 @@ def check_result(check_dir, flow, vendor, block, task, corner):
         else:
             check_script = str(os.environ['IFP_INSTALL_PATH']) + '/function/check/' + str(flow) + '/' + 'preSTA.py'
 
-    if not os.patt.exists(check_script):
+    if not os.path.exists(check_script):
         print('*Error*: check script "' + str(check_script) + '" is missing.')
         return (1)
     else:
         print('Come into ' + str(check_dir))
 
         os.chdir(check_dir)
-
-        # Remove old check report directory.
-        check_report_dir = str(check_dir) + '/file_check'
-
-        if os.path.exists(check_report_dir):
-            try:
-                print('Remove ' + str(check_report_dir))
-                shutil.rmtree(check_report_dir)
-            except Exception as warning:
-                print('*Warning*: Failed on removing old check report directory "' + str(check_report_dir) + '".')
-                print('           ' + str(warning))
-
-        # Create new check report directory.
-        try:
-            print('Create ' + str(check_report_dir))
-            os.makedirs(check_report_dir)
-        except Exception as error:
-            print('*Error*: Failed on creating check report directory "' + str(check_report_dir) + '": ' + str(error))
-            sys.exit(1)
+        check_report_dir = create_check_report_dir(check_dir)
 
         # Run checklist script.
         command = str(check_script) + ' -b ' + str(block)
@@ -154,8 +213,23 @@ def check_result(check_dir, flow, vendor, block, task, corner):
 # Main Process #
 ################
 def main():
-    (check_dir, flow, vendor, block, task, corner) = read_args()
-    check_result(check_dir, flow, vendor, block, task, corner)
+    (check_dir_list, flow, vendor, block, task_list, corner, rule_file, jobs) = read_args()
+
+    if os.path.exists(rule_file):
+        # All tasks share one worker pool and the compiled message patterns.
+        rule_dic = common_file_check.load_checklist_rule(rule_file)
+
+        executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+        try:
+            for (check_dir, task) in zip(check_dir_list, task_list):
+                check_rule_result(rule_dic, check_dir, block, task, corner, executor=executor, jobs=max(1, jobs))
+        finally:
+            if executor:
+                executor.shutdown()
+    else:
+        for (check_dir, task) in zip(check_dir_list, task_list):
+            check_result(check_dir, flow, vendor, block, task, corner)
 
 
 if __name__ == '__main__':
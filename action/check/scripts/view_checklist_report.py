@@ -8,19 +8,24 @@
 import os
 import re
 import sys
+import sqlite3
 import argparse
 from threading import Thread
-from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QTabWidget, QTableWidget, QTableWidgetItem, QFrame, QGridLayout, QPushButton, QHeaderView
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QTableView, QFrame, QGridLayout, QHeaderView, QLabel, QComboBox, QLineEdit
 from PyQt5.QtGui import QBrush
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
 
 sys.path.append(str(os.environ['IFP_INSTALL_PATH']) + '/common')
 import common
 import common_pyqt5
+import common_file_check
 
 os.environ['PYTHONUNBUFFERED'] = '1'
 CWD = os.getcwd()
 
+PASSED_LINE_PATTERN = re.compile(r'^\s*PASSED\s*:\s*(.+?)\s*$')
+DETAIL_LINE_PATTERN = re.compile(r'^\s*(.+?)\s*:\s*(.+?)\s+\(details please see (.*)\)\s*$')
+
 
 def read_args():
     """
@@ -59,46 +64,169 @@ def read_args():
 def parse_checklist_report(checklist_report):
     """
     Parse checklist report.
-    Every item check result is saved as a dict.
-    All item dict are saved as a list.
+    Every item check result is saved as a tuple.
+    All item tuples are saved as a list.
     [
-     {'result' : <result>; 'description' : <description>; 'log_file' : <log_file>},
+     (<task>, <result>, <description>, <log_file>),
      ...,
     ]
     """
-    checklist_dic_list = []
+    checklist_row_list = []
 
     with open(checklist_report, 'r') as CR:
-        for line in CR.readlines():
-            if re.match(r'^\s*PASSED\s*:\s*(.+?)\s*$', line):
-                my_match = re.match(r'^\s*PASSED\s*:\s*(.+?)\s*$', line)
-                description = my_match.group(1)
+        for line in CR:
+            my_match = PASSED_LINE_PATTERN.match(line)
+
+            if my_match:
+                checklist_row_list.append(('', 'PASSED', my_match.group(1), ''))
+                continue
+
+            my_match = DETAIL_LINE_PATTERN.match(line)
+
+            if my_match:
+                checklist_row_list.append(('', my_match.group(1), my_match.group(2), my_match.group(3)))
+
+    return (checklist_row_list)
+
 
-                item_dic = {'result': 'PASSED',
-                            'description': description,
-                            'log_file': ''}
+def get_checklist_db(checklist_report):
+    """
+    Get check results database of checklist report (written by check run).
+    If it is missing or older than the report, it is imported from the report once, so later opens are fast.
+    """
+    checklist_db = re.sub(r'\.rpt$', '', str(checklist_report)) + '.db'
 
-                checklist_dic_list.append(item_dic)
-            elif re.match(r'^\s*(.+?)\s*:\s*(.+?)\s+\(details please see (.*)\)\s*$', line):
-                my_match = re.match(r'^\s*(.+?)\s*:\s*(.+?)\s+\(details please see (.*)\)\s*$', line)
-                result = my_match.group(1)
-                description = my_match.group(2)
-                log_file = my_match.group(3)
+    if (not os.path.exists(checklist_db)) or (os.path.getmtime(checklist_db) < os.path.getmtime(checklist_report)):
+        if not common_file_check.write_result_db(checklist_db, parse_checklist_report(checklist_report)):
+            # Report directory is not writable, use an in-memory database.
+            checklist_db = ':memory:'
 
-                item_dic = {'result': result,
-                            'description': description,
-                            'log_file': log_file}
+    return (checklist_db)
 
-                checklist_dic_list.append(item_dic)
 
-    return (checklist_dic_list)
+class ChecklistModel(QAbstractTableModel):
+    """
+    Table model on sqlite table "checklist".
+    Rows are filtered by sqlite query and fetched batch by batch when the view scrolls (canFetchMore/fetchMore).
+    """
+    def __init__(self, checklist_report, batch_size=500):
+        super().__init__()
+        self.title_list = ['Result', 'Description', 'Detail']
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(get_checklist_db(checklist_report))
+
+        if not self.connection.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='checklist'").fetchone():
+            self.connection.close()
+            self.connection = sqlite3.connect(':memory:')
+            self.connection.execute('CREATE TABLE checklist (id INTEGER PRIMARY KEY, task TEXT, status TEXT, item TEXT, log_file TEXT)')
+            self.connection.executemany('INSERT INTO checklist (task, status, item, log_file) VALUES (?, ?, ?, ?)', parse_checklist_report(checklist_report))
+
+        self.cursor = None
+        self.row_list = []
+        self.total_count = 0
+        self.set_filter()
+
+    def get_status_list(self):
+        return [row[0] for row in self.connection.execute('SELECT DISTINCT status FROM checklist ORDER BY status')]
+
+    def set_filter(self, status='', keyword=''):
+        """
+        Filter rows by status and description keyword, only the first batch is fetched.
+        """
+        condition_list = []
+        parameter_list = []
+
+        if status:
+            condition_list.append('status = ?')
+            parameter_list.append(status)
+
+        if keyword:
+            condition_list.append("item LIKE ? ESCAPE '\\'")
+            parameter_list.append('%' + re.sub(r'([\\%_])', r'\\\1', keyword) + '%')
+
+        where_string = (' WHERE ' + ' AND '.join(condition_list)) if condition_list else ''
+
+        self.beginResetModel()
+        self.total_count = self.connection.execute('SELECT COUNT(*) FROM checklist' + where_string, parameter_list).fetchone()[0]
+        self.cursor = self.connection.execute('SELECT status, item, log_file FROM checklist' + where_string + ' ORDER BY id', parameter_list)
+        self.row_list = self.cursor.fetchmany(self.batch_size)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.row_list)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.title_list)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid()) and (len(self.row_list) < self.total_count)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+
+        row_list = self.cursor.fetchmany(self.batch_size)
+
+        if not row_list:
+            # Database is changed after query.
+            self.total_count = len(self.row_list)
+            return
+
+        self.beginInsertRows(QModelIndex(), len(self.row_list), len(self.row_list) + len(row_list) - 1)
+        self.row_list.extend(row_list)
+        self.endInsertRows()
+
+    def get_log_file(self, row):
+        return self.row_list[row][2]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+
+        (result, description, log_file) = self.row_list[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return result
+            elif column == 1:
+                return description
+            elif column == 2:
+                return 'view' if log_file else ''
+        elif role == Qt.ForegroundRole:
+            if column == 0:
+                if result == 'PASSED':
+                    return QBrush(Qt.green)
+                elif result == 'FAILED':
+                    return QBrush(Qt.red)
+                elif result == 'REVIEW':
+                    return QBrush(Qt.magenta)
+            elif (column == 2) and log_file:
+                return QBrush(Qt.blue)
+        elif role == Qt.TextAlignmentRole:
+            if column != 1:
+                return Qt.AlignCenter
+        elif role == Qt.ToolTipRole:
+            if (column == 2) and log_file:
+                return log_file
+
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return self.title_list[section]
+            else:
+                return section + 1
+
+        return QVariant()
 
 
 class MainWindow(QMainWindow):
     def __init__(self, checklist_report):
         super().__init__()
         self.checklist_report = checklist_report
-        self.checklist_dic_list = parse_checklist_report(checklist_report)
+        self.checklist_model = ChecklistModel(checklist_report)
 
         self.init_ui()
 
@@ -122,67 +250,60 @@ class MainWindow(QMainWindow):
         self.gen_main_frame()
 
     def gen_main_frame(self):
-        self.main_table = QTableWidget(self.main_frame)
+        # Filter
+        self.status_combo = QComboBox(self.main_frame)
+        self.status_combo.addItems(['ALL'] + self.checklist_model.get_status_list())
+        self.status_combo.currentIndexChanged.connect(self.filter_main_table)
+
+        self.keyword_line = QLineEdit(self.main_frame)
+        self.keyword_line.setPlaceholderText('Description keyword')
+        self.keyword_line.returnPressed.connect(self.filter_main_table)
+
+        self.count_label = QLabel(self.main_frame)
+
+        self.main_table = QTableView(self.main_frame)
 
         # Grid
         main_frame_grid = QGridLayout()
-        main_frame_grid.addWidget(self.main_table, 0, 0)
+        main_frame_grid.addWidget(self.status_combo, 0, 0)
+        main_frame_grid.addWidget(self.keyword_line, 0, 1)
+        main_frame_grid.addWidget(self.count_label, 0, 2)
+        main_frame_grid.addWidget(self.main_table, 1, 0, 1, 3)
+        main_frame_grid.setColumnStretch(1, 1)
         self.main_frame.setLayout(main_frame_grid)
 
         self.gen_main_table()
 
     def gen_main_table(self):
         self.main_table.setShowGrid(True)
-        self.main_table.setColumnCount(3)
-        self.main_table_title_list = ['Result', 'Description', 'Detail']
-        self.main_table.setHorizontalHeaderLabels(self.main_table_title_list)
+        self.main_table.setModel(self.checklist_model)
         self.main_table.setColumnWidth(0, 70)
         self.main_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.main_table.setColumnWidth(2, 70)
-        self.main_table.setRowCount(len(self.checklist_dic_list))
-
-        for (row, checklist_dic) in enumerate(self.checklist_dic_list):
-            result = checklist_dic['result']
-            item = QTableWidgetItem()
-            item.setText(result)
-
-            if result == 'PASSED':
-                item.setForeground(QBrush(Qt.green))
-            elif result == 'FAILED':
-                item.setForeground(QBrush(Qt.red))
-            elif result == 'REVIEW':
-                item.setForeground(QBrush(Qt.magenta))
+        self.main_table.clicked.connect(self.main_table_clicked)
+        self.update_count_label()
 
-            self.main_table.setItem(row, 0, item)
+    def filter_main_table(self):
+        status = self.status_combo.currentText()
+        self.checklist_model.set_filter(status='' if status == 'ALL' else status, keyword=self.keyword_line.text().strip())
+        self.update_count_label()
 
-            description = checklist_dic['description']
-            self.main_table.setItem(row, 1, QTableWidgetItem(description))
+    def update_count_label(self):
+        self.count_label.setText(str(self.checklist_model.total_count) + ' items')
 
-            log_file = checklist_dic['log_file']
-
-            if os.path.exists(log_file):
-                self.main_table.setCellWidget(row, 2, self.button_for_check_view(log_file))
-
-    def button_for_check_view(self, log_file):
-        widget = QWidget()
-
-        view_button = QPushButton('view')
-        view_button.setStyleSheet('text-align : center; backgroud-color : LightCoral;')
-        view_button.clicked.connect(lambda: self.show_checklist(log_file))
-
-        # Grid
-        widget_grid = QGridLayout()
-        widget_grid.addWidget(view_button, 0, 0)
-        widget.setLayout(widget_grid)
+    def main_table_clicked(self, index):
+        if index.column() == 2:
+            log_file = self.checklist_model.get_log_file(index.row())
 
-        return (widget)
+            if log_file and os.path.exists(log_file):
+                self.show_checklist(log_file)
 
     def open_log_file(self, log_file):
         command = '/bin/xterm -T ' + str(log_file) + ' -e "/usr/bin/vim ' + str(log_file) + '"'
         (returnCode, stdout, stderr) = common.run_command(command)
 
         if returnCode != 0:
-            self.message_text.insertPlainText('*Error*: Failed on showing check item log file "' + str(log_file) + '": ' + str(stderr, 'utf-8'))
+            print('*Error*: Failed on showing check item log file "' + str(log_file) + '": ' + str(stderr, 'utf-8'))
 
     def show_checklist(self, log_file):
         thread = Thread(target=self.open_log_file, args=(log_file,))
@@ -301,8 +301,7 @@ class IfpRun(IfpCommon):
             # Run command
             if re.search(r'^\s*bsub', run_method):
                 process = common.spawn_process(command)
-                stdout = process.stdout.readline().decode('utf-8')
-                jobid = 'b:{}'.format(common.get_jobid(stdout))
+                jobid = 'b:{}'.format(process.get_jobid())
 
                 self.set_one_jobid_signal.emit(block, version, flow, vendor, branch, task, 'Job', str(jobid))
                 self.set_run_time_signal.emit(block, version, flow, vendor, branch, task, 'Runtime', "pending")
@@ -213,6 +213,7 @@ class MainWindow(QMainWindow):
 
         self.gen_gui()
         self.load_status_file('./.ifp.status.yaml')
+        self.job_manager.recover_from_journal()
 
         # System log
         self.ifp_start_time = datetime.datetime.now()
@@ -613,8 +614,9 @@ Copyright © 2021 ByteDance. All Rights Reserved worldwide.""")
         seconds = run_time % 60
         self.write_system_log("close ifp, total runtime %02d:%02d:%02d" % (hours, minutes, seconds))
 
-        self.task_window.thread.quit()
+        self.task_window.save_cache()
         self.save_status_file('./.ifp.status.yaml')
+        self.job_manager.job_journal.clear()
         self.timer.stop()
         event.accept()
     # CloseDialog (end)
@@ -931,43 +933,55 @@ Copyright © 2021 ByteDance. All Rights Reserved worldwide.""")
                     self.update_message_text({'message': 'Failed load status with file "' + str(status_file) + '" due to format is wrong.', 'color': 'red'})
                     return
 
-            # Update self.main_table_info_list with new status_file.
+            # Index saved status by block/version/flow/task.
+            saved_status_index_dic = {}
+
+            for (j, status_dic) in saved_status_dic.items():
+                saved_status_index_dic[(status_dic['Block'], status_dic['Version'], status_dic['Flow'], status_dic['Task'])] = status_dic
+
+            # Check all running jobs with one batch query.
+            running_job_list = [status_dic['Job'] for status_dic in saved_status_index_dic.values() if (status_dic['Status'] == common.status.running) and status_dic['Runtime'] and (status_dic['Runtime'] != "pending")]
+            job_status_dic = TaskJobCheckWorker.get_job_status_dic(running_job_list)
+
+            # Update self.main_table_info_list with new status_file, record the changed items {row: [key, ...]}.
+            changed_row_dic = {}
+            visible_changed = False
+
             for (i, main_table_info) in enumerate(self.main_table_info_list):
-                for (j, status_dic) in saved_status_dic.items():
-                    if (main_table_info['Block'] == status_dic['Block']) and (main_table_info['Version'] == status_dic['Version']) and (main_table_info['Flow'] == status_dic['Flow']) and (main_table_info['Task'] == status_dic['Task']):
-                        status = status_dic['Status']
-                        runtime = status_dic['Runtime']
-                        job = status_dic['Job']
-
-                        if status == common.status.running and runtime and runtime != "pending":
-                            status = self._update_main_tab_job_status(status=status, job=job)
-
-                        self.main_table_info_list[i]['Status'] = status
-                        self.main_table_info_list[i]['BuildStatus'] = status_dic['BuildStatus']
-                        self.main_table_info_list[i]['RunStatus'] = status_dic['RunStatus']
-                        self.main_table_info_list[i]['CheckStatus'] = status_dic['CheckStatus']
-                        self.main_table_info_list[i]['SummarizeStatus'] = status_dic['SummarizeStatus']
-                        self.main_table_info_list[i]['ReleaseStatus'] = status_dic['ReleaseStatus']
-                        self.main_table_info_list[i]['Job'] = status_dic['Job']
-                        self.main_table_info_list[i]['Runtime'] = status_dic['Runtime']
-                        self.main_table_info_list[i]['Visible'] = status_dic['Visible']
-                        self.main_table_info_list[i]['Selected'] = status_dic['Selected']
+                status_dic = saved_status_index_dic.get((main_table_info['Block'], main_table_info['Version'], main_table_info['Flow'], main_table_info['Task']), None)
 
-            # Update related GUI parts.
-            self.update_main_table()
-            self.update_status_table()
+                if status_dic:
+                    status = status_dic['Status']
+                    runtime = status_dic['Runtime']
+                    job = status_dic['Job']
+
+                    if status == common.status.running and runtime and runtime != "pending":
+                        status = job_status_dic.get(job) or status
 
-    def _update_main_tab_job_status(self, status: str, job: str) -> str:
-        check, job_dic = TaskJobCheckWorker.check_job_id(job_id=job)
-        new_status = ''
+                    new_info_dic = {'Status': status}
 
-        if check:
-            if job_dic.get('job_type') == 'LSF':
-                new_status = TaskJobCheckWorker.get_lsf_job_status(job_id=str(job_dic['job_id']))
-            elif job_dic.get('job_type') == 'LOCAL':
-                new_status = TaskJobCheckWorker.get_local_job_status(job_id=str(job_dic['job_id']))
+                    for key in ['BuildStatus', 'RunStatus', 'CheckStatus', 'SummarizeStatus', 'ReleaseStatus', 'Job', 'Runtime', 'Visible', 'Selected']:
+                        new_info_dic[key] = status_dic[key]
 
-        return new_status if new_status else status
+                    for (key, value) in new_info_dic.items():
+                        if main_table_info[key] != value:
+                            self.main_table_info_list[i][key] = value
+                            changed_row_dic.setdefault(i, []).append(key)
+
+                            if key == 'Visible':
+                                visible_changed = True
+
+            # Update related GUI parts, the whole table is drawn only if visible rows are changed (update_status_table draws it with status filter).
+            if visible_changed:
+                self.update_main_table()
+            elif self.status_filt_flag == 'Total':
+                self.update_main_table_rows(changed_row_dic)
+
+            self.update_status_table()
+
+            return True
+
+        return False
 
     def save(self, save_mode='keep'):
         """
@@ -1027,11 +1041,16 @@ Copyright © 2021 ByteDance. All Rights Reserved worldwide.""")
             self.update_dict_by_load_config_file(config_file)
             # Update related GUI parts.
             self._load_cache()
-            self.update_sidebar_tree()
+
+            if self.config_diff_dic['structure']:
+                self.update_sidebar_tree()
+
             self.update_status_table()
             self.update_tab_index_dic()
-            self.update_main_table()
-            self.load_status_file('./.ifp.status.yaml')
+
+            # Main table is re-drawn by load_status_file.
+            if not self.load_status_file('./.ifp.status.yaml'):
+                self.update_main_table()
             self.task_window.config_file = config_file
             self.task_window.config_path_edit.setText(config_file)
             self.task_window.load()
@@ -1069,7 +1088,8 @@ Copyright © 2021 ByteDance. All Rights Reserved worldwide.""")
         self.user_api = common.parse_user_api(self.api_yaml)
         self.config_dic = self.config_obj.config_dic
         self.main_table_info_list = self.config_obj.main_table_info_list
-        self.job_manager.update(self.config_dic)
+        # Only changed tasks are updated on JobManager.
+        self.config_diff_dic = self.job_manager.update(self.config_dic)
         self.block_row_mapping = {}
         self.task_row_mapping = {}
         self.parse_ifp_env_setting()
@@ -2096,6 +2116,32 @@ Copyright © 2021 ByteDance. All Rights Reserved worldwide.""")
 
                 row_dic[key]['last'] = row_dic[key]['current']
 
+    def update_main_table_rows(self, changed_row_dic):
+        """
+        Update the changed items ({row: [key, ...]}) of Main TAB table, visible rows must not be changed.
+        """
+        if not changed_row_dic:
+            return
+
+        visible_row = -1
+
+        for (row, main_table_info) in enumerate(self.main_table_info_list):
+            if not main_table_info['Visible'] or not self.filt_task_status(main_table_info):
+                continue
+
+            visible_row += 1
+
+            for key in changed_row_dic.get(row, []):
+                block = main_table_info['Block']
+                version = main_table_info['Version']
+                flow = main_table_info['Flow']
+                task = main_table_info['Task']
+
+                if key == 'Selected':
+                    self.update_main_table_item(block, version, flow, task, 'Task', task, selected=Qt.Checked if main_table_info['Selected'] else Qt.Unchecked, mode='create', row=row, vrow=visible_row)
+                else:
+                    self.update_main_table_item(block, version, flow, task, key, main_table_info[key], mode='create', row=row, vrow=visible_row)
+
     def filt_task_status(self, main_table_info):
         status = self.status_filt_flag
         row_status = main_table_info["RunStatus"]
@@ -6,6 +6,7 @@
 # Created On  : 2023-09-27 14:59:51
 # Description :
 ################################
+import json
 import os
 import re
 import sys
@@ -18,6 +19,7 @@ from PyQt5.QtGui import QStandardItemModel, QStandardItem, QColor, QBrush
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTableView, QHeaderView
 
 import common_lsf
+import common_scheduler
 import common_pyqt5
 
 os.environ['PYTHONUNBUFFERED'] = '1'
@@ -114,6 +116,137 @@ def transfer_formula_list_to_bool_equation(task_obj, formula):
     return new_formula_list
 
 
+class JobJournal:
+    """
+    Append-only write-ahead journal of scheduler transitions.
+    Every record (one json line) is the scheduling state of one task, records are flushed and fsync'd in batches by one writer thread.
+    On restart, replay() keeps the last record of each task, so the dependency state can be rebuilt exactly.
+    """
+    def __init__(self, journal_file, sync_interval=1, sync_count=200):
+        self.journal_file = journal_file
+        self.sync_interval = sync_interval
+        self.sync_count = sync_count
+        self.lock = threading.Lock()
+        self.pending_list = []
+        self.state_dic = {}
+        self.wake_event = threading.Event()
+        self.writer_thread = None
+        # Journal is closed by clear(), later records/flushes are ignored.
+        self.closed = False
+
+    def start_writer(self):
+        if self.writer_thread:
+            return
+
+        self.writer_thread = threading.Thread(target=self.write_loop, name='JobJournal', daemon=True)
+        self.writer_thread.start()
+
+    def write_loop(self):
+        while not self.closed:
+            self.wake_event.wait(self.sync_interval)
+            self.wake_event.clear()
+
+            try:
+                self.flush()
+            except Exception as error:
+                common.print_warning('*Warning*: Failed on writing job journal "' + str(self.journal_file) + '": ' + str(error))
+
+    def record(self, state_dic, sync=False):
+        """
+        Append one task state record, sync=True means the record is fsync'd before return (used for job id).
+        """
+        line = json.dumps(state_dic) + '\n'
+
+        with self.lock:
+            if self.closed:
+                return
+
+            self.state_dic[tuple(state_dic['task'])] = state_dic
+            self.pending_list.append(line)
+            pending_num = len(self.pending_list)
+
+        if sync:
+            self.flush()
+        else:
+            self.start_writer()
+
+            if pending_num >= self.sync_count:
+                self.wake_event.set()
+
+    def flush(self):
+        with self.lock:
+            if self.closed or (not self.pending_list):
+                return
+
+            journal_dir = os.path.dirname(self.journal_file)
+
+            if journal_dir and not os.path.exists(journal_dir):
+                os.makedirs(journal_dir, exist_ok=True)
+
+            with open(self.journal_file, 'a') as JF:
+                JF.write(''.join(self.pending_list))
+                JF.flush()
+                os.fsync(JF.fileno())
+
+            self.pending_list = []
+
+    def checkpoint(self):
+        """
+        Compact journal into the last state of every task, with atomic rename.
+        """
+        with self.lock:
+            if self.closed:
+                return
+
+            self.pending_list = []
+            tmp_journal_file = str(self.journal_file) + '.tmp'
+
+            with open(tmp_journal_file, 'w') as JF:
+                for state_dic in self.state_dic.values():
+                    JF.write(json.dumps(state_dic) + '\n')
+
+                JF.flush()
+                os.fsync(JF.fileno())
+
+            os.replace(tmp_journal_file, self.journal_file)
+
+    def clear(self):
+        """
+        Close journal and remove journal file, in-flight and later records are not written back.
+        """
+        with self.lock:
+            self.closed = True
+            self.pending_list = []
+            self.state_dic = {}
+
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+
+        self.wake_event.set()
+
+    def replay(self):
+        """
+        Return {(block, version, flow, task): last_state_dic}, the broken tail line (crash during write) is ignored.
+        """
+        state_dic = {}
+
+        if not os.path.exists(self.journal_file):
+            return state_dic
+
+        with open(self.journal_file, 'r') as JF:
+            for line in JF:
+                try:
+                    record_dic = json.loads(line)
+                    state_dic[tuple(record_dic['task'])] = record_dic
+                except Exception:
+                    break
+
+        with self.lock:
+            self.state_dic.update(state_dic)
+
+        return state_dic
+
+
 class DebugWindow(QMainWindow):
     def __init__(self, debug=True):
         super().__init__()
@@ -207,10 +340,17 @@ class JobManager(QThread):
         self.ifp_obj = ifp_obj
         self.config_dic = None
         self.all_tasks = AutoVivification()
+        self.pending_remove_task_list = []
         self.monitor_flag = False
         self.send_result_flag = False
         self.close_flag = False
 
+        # Write-ahead journal for scheduler state, it is used to resume after ifp crashed.
+        self.job_journal = JobJournal('%s/.ifp/job_journal.log' % os.getcwd())
+        self.reattached_task_dic = {}
+        self.reattached_task_lock = threading.Lock()
+        self.reattach_monitor_thread = None
+
         # Define QTimer
         timer = QTimer(self)
         timer.start(1000)
@@ -284,88 +424,228 @@ class JobManager(QThread):
 
         return valid_dependency
 
-    def update(self, config_dic):
+    @staticmethod
+    def get_config_diff(old_config_dic, new_config_dic):
+        """
+        Compare task settings between old/new config_dic.
+        Return dict with keys:
+        add/remove/change : list of (block, version, flow, task).
+        dependency        : changed tasks which RUN_AFTER setting is changed.
+        group             : set of (block, version) which task list is changed.
+        structure         : True if task order (table rows) is changed.
+        """
+        config_diff_dic = {'add': [], 'remove': [], 'change': [], 'dependency': [], 'group': set(), 'structure': False}
+        old_task_dic = {}
+        new_task_dic = {}
+
+        for (config_dic, task_dic) in [(old_config_dic, old_task_dic), (new_config_dic, new_task_dic)]:
+            if not config_dic:
+                continue
+
+            for block in config_dic['BLOCK'].keys():
+                for version in config_dic['BLOCK'][block].keys():
+                    for flow in config_dic['BLOCK'][block][version].keys():
+                        for task in config_dic['BLOCK'][block][version][flow].keys():
+                            task_dic[(block, version, flow, task)] = config_dic['BLOCK'][block][version][flow][task]
+
+        if list(old_task_dic.keys()) != list(new_task_dic.keys()):
+            config_diff_dic['structure'] = True
+
+        for (key, new_task) in new_task_dic.items():
+            old_task = old_task_dic.get(key, None)
+
+            if old_task is None:
+                config_diff_dic['add'].append(key)
+                config_diff_dic['group'].add(key[:2])
+            elif old_task is not new_task:
+                if getattr(old_task, 'RUN_AFTER', None) != getattr(new_task, 'RUN_AFTER', None):
+                    config_diff_dic['change'].append(key)
+                    config_diff_dic['dependency'].append(key)
+                else:
+                    for field in ['ACTION', 'DEPENDENCY', 'PATH', 'SETTING']:
+                        if getattr(old_task, field, None) != getattr(new_task, field, None):
+                            config_diff_dic['change'].append(key)
+                            break
+
+        for key in old_task_dic.keys():
+            if key not in new_task_dic:
+                config_diff_dic['remove'].append(key)
+                config_diff_dic['group'].add(key[:2])
 
+        return config_diff_dic
+
+    def create_task_obj(self, block, version, flow, task):
+        task_obj = TaskObject(self.config_dic, block, version, flow, task, self.ifp_obj, self.debug_window)
+        task_obj.update_status_signal.connect(self.ifp_obj.update_task_status)
+        task_obj.msg_signal.connect(self.ifp_obj.update_message_text)
+        task_obj.set_one_jobid_signal.connect(self.ifp_obj.update_main_table_item)
+        task_obj.set_run_time_signal.connect(self.ifp_obj.update_main_table_item)
+        task_obj.update_debug_info_signal.connect(self.debug_window.update_info)
+        task_obj.job_journal = self.job_journal
+        task_obj.formula_list = {}
+        self.all_tasks[block][version][flow][task] = task_obj
+
+        return task_obj
+
+    @staticmethod
+    def is_busy_task(task_obj):
+        return bool(task_obj.action) or (task_obj.status == common.status.running)
+
+    def remove_task_obj(self, block, version, flow, task):
+        """
+        Remove task from all_tasks, running task is kept until it is finished.
+        """
+        task_obj = self.all_tasks[block][version][flow].get(task, None)
+
+        if not isinstance(task_obj, TaskObject):
+            return True
+
+        if self.is_busy_task(task_obj):
+            return False
+
+        for parent_obj in task_obj.parent.keys():
+            if task_obj in parent_obj.child:
+                parent_obj.child.remove(task_obj)
+
+        for child_obj in task_obj.child:
+            child_obj.parent.pop(task_obj, None)
+
+        del self.all_tasks[block][version][flow][task]
+        self.debug_window.row_mapping.pop(task_obj, None)
+
+        return True
+
+    def update_task_dependency(self, task_object, task_flow_dic):
+        """
+        Rebuild parent/child/formula for one task.
+        task_flow_dic : {task: flow} of the task's block/version.
+        """
+        block = task_object.block
+        version = task_object.version
+        task_formula = []
+        run_after = self.config_dic['BLOCK'][block][version][task_object.flow][task_object.task].get('RUN_AFTER', {}).get('TASK', {})
+
+        if run_after:
+            run_after = self.clean_dependency(item_list=list(task_flow_dic.keys()), item=task_object.task, dependency=run_after)
+            task_formula = transfer_formula_to_list(run_after)
+
+        # Drop old edges, keep the state of remained parents.
+        old_parent_dic = task_object.parent
+        task_object.parent = {}
+
+        for parent_obj in old_parent_dic.keys():
+            if task_object in parent_obj.child:
+                parent_obj.child.remove(task_object)
+
+        for (i, prepositive_task) in enumerate(task_formula):
+            if prepositive_task in ['', '&', '|', ','] or prepositive_task not in task_flow_dic:
+                continue
+
+            task_obj = self.all_tasks[block][version][task_flow_dic[prepositive_task]][prepositive_task]
+
+            if task_obj not in task_object.parent.keys():
+                task_object.parent[task_obj] = old_parent_dic.get(task_obj, 'True')
+
+            task_formula[i] = task_obj
+
+        old_formula_list = task_object.formula_list or {}
+        task_object.formula_list = {}
+        task_formula_child = []
+        run_time = 1
+
+        if not len(task_formula) == 0:
+            for j in range(len(task_formula)):
+                task_obj = task_formula[j]
+
+                if not task_obj == ',' and not j == len(task_formula) - 1:
+                    task_formula_child.append(task_obj)
+                    continue
+
+                if j == len(task_formula) - 1:
+                    task_formula_child.append(task_obj)
+
+                formula = task_formula_child
+                self.record_formula(task_obj=task_object, task_formula=task_formula_child, formula=formula, run_time=run_time)
+                run_time += 1
+                task_formula_child = []
+
+        # Running/queued task keeps its enable/finish flags, it is still scheduled with them.
+        if self.is_busy_task(task_object) or task_object.job_id or (task_object.status in common.status_ing.values()):
+            for (run_time, formula_dic) in task_object.formula_list.items():
+                if run_time in old_formula_list:
+                    formula_dic['enable'] = old_formula_list[run_time]['enable']
+                    formula_dic['finish'] = old_formula_list[run_time]['finish']
+
+            if task_object.current_formula_id in task_object.formula_list:
+                task_object.current_formula = task_object.formula_list[task_object.current_formula_id]['formula']
+
+    def update(self, config_dic):
+        """
+        Apply new config_dic incrementally, only added/removed/changed tasks and affected dependencies are updated.
+        Return the config diff, see get_config_diff.
+        """
+        old_config_dic = self.config_dic
         self.config_dic = config_dic
+        config_diff_dic = self.get_config_diff(old_config_dic, config_dic)
 
-        row = 0
+        # Running tasks which were removed from config before, remove them after finished.
+        for (block, version, flow, task) in self.pending_remove_task_list[:]:
+            if task in config_dic['BLOCK'].get(block, {}).get(version, {}).get(flow, {}):
+                self.pending_remove_task_list.remove((block, version, flow, task))
+            elif self.remove_task_obj(block, version, flow, task):
+                self.pending_remove_task_list.remove((block, version, flow, task))
 
-        total_tasks = AutoVivification()
-        for block in self.config_dic['BLOCK'].keys():
-            for version in self.config_dic['BLOCK'][block].keys():
-                total_tasks[block][version] = []
-
-                for flow in self.config_dic['BLOCK'][block][version].keys():
-                    for task in self.config_dic['BLOCK'][block][version][flow].keys():
-                        total_tasks[block][version].append(task)
-
-                        if self.all_tasks[block][version][flow][task] == {}:
-                            task_obj = TaskObject(self.config_dic, block, version, flow, task, self.ifp_obj, self.debug_window)
-                            task_obj.update_status_signal.connect(self.ifp_obj.update_task_status)
-                            task_obj.msg_signal.connect(self.ifp_obj.update_message_text)
-                            task_obj.set_one_jobid_signal.connect(self.ifp_obj.update_main_table_item)
-                            task_obj.set_run_time_signal.connect(self.ifp_obj.update_main_table_item)
-                            task_obj.update_debug_info_signal.connect(self.debug_window.update_info)
-                            self.all_tasks[block][version][flow][task] = task_obj
-                            self.debug_window.row_mapping[task_obj] = row
-                        else:
-                            self.all_tasks[block][version][flow][task].config_dic = config_dic
-                            self.debug_window.row_mapping[self.all_tasks[block][version][flow][task]] = row
+        for (block, version, flow, task) in config_diff_dic['remove']:
+            if not self.remove_task_obj(block, version, flow, task):
+                self.pending_remove_task_list.append((block, version, flow, task))
 
-                        row += 1
-        # update parent/child/formula
-        for block in self.config_dic['BLOCK'].keys():
-            for version in self.config_dic['BLOCK'][block].keys():
-                # No repeated tasks belongs to specific block/version
-                for flow in self.config_dic['BLOCK'][block][version].keys():
-                    for task in self.config_dic['BLOCK'][block][version][flow].keys():
-
-                        # run_after_task = []
-                        task_formula = []
-
-                        if self.config_dic['BLOCK'][block][version][flow][task].get('RUN_AFTER', {}).get('TASK', {}):
-                            run_after = self.clean_dependency(item_list=total_tasks[block][version], item=task, dependency=self.config_dic['BLOCK'][block][version][flow][task]['RUN_AFTER']['TASK'])
-                            # run_after_task = set(run_after.replace('|', '&').replace(',', '&').split('&'))
-                            task_formula = transfer_formula_to_list(run_after)
-
-                        for prepositive_task in task_formula:
-                            if prepositive_task in ['', '&', '|', ',']:
-                                continue
+        for (block, version, flow, task) in config_diff_dic['add']:
+            if not isinstance(self.all_tasks[block][version][flow].get(task, None), TaskObject):
+                self.create_task_obj(block, version, flow, task)
 
-                            for flow2 in self.config_dic['BLOCK'][block][version].keys():
-                                for task2 in self.config_dic['BLOCK'][block][version][flow2].keys():
-                                    if prepositive_task == task2:
+        # TaskObject reads its settings from config_dic.
+        for block in config_dic['BLOCK'].keys():
+            for version in config_dic['BLOCK'][block].keys():
+                for flow in config_dic['BLOCK'][block][version].keys():
+                    for task in config_dic['BLOCK'][block][version][flow].keys():
+                        self.all_tasks[block][version][flow][task].config_dic = config_dic
 
-                                        task_obj = self.all_tasks[block][version][flow2][prepositive_task]
+        # Update parent/child/formula for affected tasks only.
+        update_task_list = list(config_diff_dic['dependency'])
+        task_flow_dic = {}
 
-                                        if task_obj not in self.all_tasks[block][version][flow][task].parent.keys():
-                                            self.all_tasks[block][version][flow][task].parent[task_obj] = 'True'
+        for (block, version) in config_diff_dic['group']:
+            if version in config_dic['BLOCK'].get(block, {}):
+                for flow in config_dic['BLOCK'][block][version].keys():
+                    for task in config_dic['BLOCK'][block][version][flow].keys():
+                        update_task_list.append((block, version, flow, task))
+
+        for (block, version, flow, task) in update_task_list:
+            if (block, version) not in task_flow_dic:
+                task_flow_dic[(block, version)] = {}
 
-                                        task_formula[task_formula.index(prepositive_task)] = task_obj
+                for flow2 in config_dic['BLOCK'][block][version].keys():
+                    for task2 in config_dic['BLOCK'][block][version][flow2].keys():
+                        task_flow_dic[(block, version)].setdefault(task2, flow2)
 
-                        task_object = self.all_tasks[block][version][flow][task]
-                        task_object.formula_list = {}
-                        task_formula_child = []
-                        run_time = 1
-                        if not len(task_formula) == 0:
-                            for j in range(len(task_formula)):
-                                task_obj = task_formula[j]
+            self.update_task_dependency(self.all_tasks[block][version][flow][task], task_flow_dic[(block, version)])
 
-                                if not task_obj == ',' and not j == len(task_formula) - 1:
-                                    task_formula_child.append(task_obj)
-                                    continue
+        if config_diff_dic['structure']:
+            row = 0
 
-                                if j == len(task_formula) - 1:
-                                    task_formula_child.append(task_obj)
+            for block in config_dic['BLOCK'].keys():
+                for version in config_dic['BLOCK'][block].keys():
+                    for flow in config_dic['BLOCK'][block][version].keys():
+                        for task in config_dic['BLOCK'][block][version][flow].keys():
+                            self.debug_window.row_mapping[self.all_tasks[block][version][flow][task]] = row
+                            row += 1
 
-                                formula = task_formula_child
-                                self.record_formula(task_obj=task_object, task_formula=task_formula_child, formula=formula, run_time=run_time)
-                                run_time += 1
-                                task_formula_child = []
+            self.debug_window.update_gui(self.config_dic)
 
-                        self.debug_window.update_info(task_object)
+        for (block, version, flow, task) in set(update_task_list):
+            self.debug_window.update_info(self.all_tasks[block][version][flow][task])
 
-        self.debug_window.update_gui(self.config_dic)
+        return config_diff_dic
 
     def receive_action(self, action_name, task_dic_list, run_all_steps=False):
         self.disable_gui_signal.emit(True)
@@ -466,6 +746,10 @@ class JobManager(QThread):
                 task_obj.total_run_times = enable_count
 
             task_obj.current_run_times = 0
+            task_obj.record_state()
+
+            for child_task in task_obj.child:
+                child_task.record_state()
 
         self.debug_window.update_gui(self.config_dic)
 
@@ -541,6 +825,11 @@ class JobManager(QThread):
             self.disable_gui_signal.emit(False)
             self.monitor_flag = False
 
+            try:
+                self.job_journal.checkpoint()
+            except Exception as error:
+                common.print_warning('*Warning*: Failed on checkpointing job journal: ' + str(error))
+
             if self.send_result_flag:
                 self.finish_signal.emit()
                 self.send_result_flag = False
@@ -548,6 +837,131 @@ class JobManager(QThread):
             if self.close_flag:
                 self.close_signal.emit()
 
+    def get_task_obj(self, block, version, flow, task):
+        """
+        Get TaskObject without creating new AutoVivification items.
+        """
+        try:
+            task_obj = dict.get(dict.get(dict.get(dict.get(self.all_tasks, block, {}), version, {}), flow, {}), task, None)
+        except Exception:
+            task_obj = None
+
+        if isinstance(task_obj, TaskObject):
+            return task_obj
+
+    def recover_from_journal(self):
+        """
+        Rebuild scheduler state with job journal after ifp crashed.
+        Running LSF jobs are re-attached with one bulk bjobs query, so nothing is re-submitted.
+        """
+        try:
+            state_dic = self.job_journal.replay()
+        except Exception as error:
+            common.print_warning('*Warning*: Failed on reading job journal: ' + str(error))
+            return
+
+        if not state_dic:
+            return
+
+        in_flight_task_list = []
+
+        for ((block, version, flow, task), task_state_dic) in state_dic.items():
+            task_obj = self.get_task_obj(block, version, flow, task)
+
+            if not task_obj:
+                continue
+
+            task_obj.restore_state(task_state_dic, self)
+
+            if task_obj.status:
+                self.ifp_obj.update_task_status(task_obj, task_obj.get_running_action() or str(task_obj.status).split()[0], task_obj.status)
+
+            if task_obj.action:
+                in_flight_task_list.append(task_obj)
+
+        if not in_flight_task_list:
+            return
+
+        # One bulk query for all LSF jobs.
+        lsf_job_list = [str(task_obj.job_id)[2:] for task_obj in in_flight_task_list if task_obj.get_running_action() and str(task_obj.job_id).startswith('b:')]
+        lsf_job_status_dic = self.get_lsf_job_status_dic(lsf_job_list)
+
+        for task_obj in in_flight_task_list:
+            running_action = task_obj.get_running_action()
+
+            if not running_action:
+                if task_obj.get_finished_action():
+                    # Action result was recorded before crash but the left steps were not, continue them without re-executing the action.
+                    task_obj.finish_reattached_action(None)
+
+                # Otherwise task is waiting for pre-tasks, launch_task will continue it.
+                continue
+
+            if str(task_obj.job_id).startswith('b:'):
+                job_status = lsf_job_status_dic.get(str(task_obj.job_id)[2:], '')
+            elif str(task_obj.job_id).startswith('l:'):
+                job_status = 'RUN' if os.path.exists('/proc/%s' % str(task_obj.job_id)[2:]) else 'EXIT'
+            else:
+                # Job was not submitted (or submit fail) before crash, it is never taken as finished, execute the action again.
+                self.ifp_obj.update_message_text({'message': '[%s/%s/%s/%s] %s job was not submitted before ifp exited, execute it again.' % (task_obj.block, task_obj.version, task_obj.flow, task_obj.task, running_action), 'color': 'black'})
+                task_obj.job_id = None
+                task_obj.finish_reattached_action(None)
+                continue
+
+            self.ifp_obj.update_message_text({'message': '[%s/%s/%s/%s] re-attach job %s (%s) from job journal.' % (task_obj.block, task_obj.version, task_obj.flow, task_obj.task, task_obj.job_id, job_status if job_status else 'UNKNOWN'), 'color': 'black'})
+
+            if task_obj.job_id and (running_action == common.action.run):
+                task_obj.set_one_jobid_signal.emit(task_obj.block, task_obj.version, task_obj.flow, task_obj.task, 'Job', str(task_obj.job_id))
+
+            if job_status in ['DONE', 'EXIT', '']:
+                task_obj.finish_reattached_action(job_status)
+            else:
+                with self.reattached_task_lock:
+                    self.reattached_task_dic[task_obj.job_id] = task_obj
+
+        if self.reattached_task_dic and (not self.reattach_monitor_thread):
+            self.reattach_monitor_thread = threading.Thread(target=self.monitor_reattached_jobs, daemon=True)
+            self.reattach_monitor_thread.start()
+
+        self.disable_gui_signal.emit(True)
+        self.monitor_flag = True
+
+    @staticmethod
+    def get_lsf_job_status_dic(job_list):
+        """
+        Get {jobid: STAT} with one scheduler query.
+        """
+        return common_scheduler.get_scheduler_backend().status_many(job_list)
+
+    def monitor_reattached_jobs(self, interval=10):
+        """
+        Check all re-attached jobs with one bulk query per interval, finish task action when job is done.
+        """
+        while True:
+            with self.reattached_task_lock:
+                reattached_task_dic = dict(self.reattached_task_dic)
+
+            if not reattached_task_dic:
+                self.reattach_monitor_thread = None
+                break
+
+            lsf_job_list = [str(job_id)[2:] for job_id in reattached_task_dic.keys() if str(job_id).startswith('b:')]
+            lsf_job_status_dic = self.get_lsf_job_status_dic(lsf_job_list)
+
+            for (job_id, task_obj) in reattached_task_dic.items():
+                if str(job_id).startswith('b:'):
+                    job_status = lsf_job_status_dic.get(str(job_id)[2:], '')
+                else:
+                    job_status = 'RUN' if os.path.exists('/proc/%s' % str(job_id)[2:]) else 'EXIT'
+
+                if job_status in ['DONE', 'EXIT', '']:
+                    with self.reattached_task_lock:
+                        self.reattached_task_dic.pop(job_id, None)
+
+                    task_obj.finish_reattached_action(job_status)
+
+            time.sleep(interval)
+
     def kill_all_jobs_before_close_window(self):
         # Send kill action to all tasks
         for block in self.all_tasks.keys():
@@ -612,6 +1026,8 @@ class TaskObject(QThread):
         self.skipped = False
         self.ignore_fail = False
         self.dependency_traceback_stage = 0
+        self.main_action = None
+        self.job_journal = None
 
         self.action_progress = {common.action.build: ActionProgressObject(common.action.build),
                                 common.action.run: ActionProgressObject(common.action.run),
@@ -626,6 +1042,159 @@ class TaskObject(QThread):
     def __hash__(self):
         return hash((self.block, self.version, self.flow, self.task))
 
+    def get_state_dic(self):
+        """
+        Scheduling state of current task, it is saved into job journal.
+        """
+        formula_state_dic = {}
+
+        for run_time in (self.formula_list or {}).keys():
+            formula_state_dic[str(run_time)] = [self.formula_list[run_time]['enable'], self.formula_list[run_time]['finish']]
+
+        parent_state_list = []
+
+        for (task_obj, state) in self.parent.items():
+            parent_state_list.append([task_obj.block, task_obj.version, task_obj.flow, task_obj.task, state])
+
+        state_dic = {'task': [self.block, self.version, self.flow, self.task],
+                     'time': time.time(),
+                     'action': self.action,
+                     'main_action': self.main_action,
+                     'killed_action': self.killed_action,
+                     'status': self.status,
+                     'check_status': self.check_status,
+                     'summarize_status': self.summarize_status,
+                     'job_id': self.job_id,
+                     'run_all_steps': self.run_all_steps,
+                     'total_run_times': self.total_run_times,
+                     'current_run_times': self.current_run_times,
+                     'current_formula_id': self.current_formula_id,
+                     'formula': formula_state_dic,
+                     'parent': parent_state_list}
+
+        return state_dic
+
+    def record_state(self, sync=False):
+        if self.job_journal:
+            try:
+                self.job_journal.record(self.get_state_dic(), sync=sync)
+            except Exception as error:
+                common.print_warning('*Warning*: Failed on recording job journal for task "' + str(self.task) + '": ' + str(error))
+
+    def restore_state(self, state_dic, job_manager):
+        """
+        Restore scheduling state from job journal record.
+        """
+        self.action = state_dic.get('action')
+        self.main_action = state_dic.get('main_action')
+        self.killed_action = state_dic.get('killed_action')
+        self.status = state_dic.get('status')
+        self.check_status = state_dic.get('check_status')
+        self.summarize_status = state_dic.get('summarize_status')
+        self.job_id = state_dic.get('job_id')
+        self.run_all_steps = state_dic.get('run_all_steps', False)
+        self.total_run_times = state_dic.get('total_run_times', 0)
+        self.current_run_times = state_dic.get('current_run_times', 0)
+
+        if self.formula_list:
+            for (run_time, (enable, finish)) in state_dic.get('formula', {}).items():
+                if int(run_time) in self.formula_list:
+                    self.formula_list[int(run_time)]['enable'] = enable
+                    self.formula_list[int(run_time)]['finish'] = finish
+
+        for (block, version, flow, task, state) in state_dic.get('parent', []):
+            task_obj = job_manager.get_task_obj(block, version, flow, task)
+
+            if task_obj and (task_obj in self.parent):
+                self.parent[task_obj] = state
+
+        current_formula_id = state_dic.get('current_formula_id')
+
+        if self.formula_list and (current_formula_id in self.formula_list):
+            self.current_formula_id = current_formula_id
+            self.current_formula = self.formula_list[current_formula_id]['formula']
+        else:
+            self.current_formula_id = None
+            self.current_formula = None
+
+        self.update_debug_info_signal.emit(self)
+
+    def get_running_action(self):
+        """
+        Get the action whose job is running (status is Building/Running/Checking/...).
+        """
+        for (action, status_ing) in common.status_ing.items():
+            if self.status == status_ing:
+                return action
+
+    def get_finished_action(self):
+        """
+        Get the action whose result is set (status is Build Pass/Run Fail/...) while manage_action is not finished (main_action is set).
+        """
+        if (not self.action) or (not self.main_action) or (self.action == common.action.kill):
+            return
+
+        for action in common.status_ing.keys():
+            if str(self.status).startswith(str(action) + ' '):
+                return action
+
+    def finish_reattached_action(self, job_status):
+        thread = threading.Thread(target=self.manage_reattached_action, args=(job_status,))
+        thread.start()
+
+    def manage_reattached_action(self, job_status):
+        """
+        Finish action for job which is re-attached from job journal, then continue the left steps of manage_action.
+        job_status is None if the job of running action was not submitted before crash, then the action is executed again.
+        If the action result was already recorded (get_finished_action), only the left steps are continued.
+        """
+        running_action = self.get_running_action()
+
+        if not running_action:
+            running_action = self.get_finished_action()
+
+            if not running_action:
+                return
+        elif job_status is None:
+            self.print_task_progress(self.task, '[ACTION] : Execute %s action again after ifp restarted' % running_action)
+
+            # The journaled current_run_times was increased by the interrupted execute_action already.
+            if running_action == common.action.run:
+                self.current_run_times -= 1
+
+            self.execute_action(running_action)
+        else:
+            if job_status == 'DONE':
+                return_code = 0
+            else:
+                return_code = 1
+
+                if not job_status:
+                    self.print_task_progress(self.task, '[RUN_RESULT] : Job %s is not found after ifp restarted' % self.job_id)
+
+            self.set_action_result(running_action, return_code, '', '', str(self.job_id))
+
+        if self.action == common.action.kill:
+            self.finish_action()
+        elif (running_action == common.action.build) and (self.action != common.action.build):
+            # Build step of run_all_steps
+            self.print_task_progress(self.task, '[ACTION] : Start execute %s action' % self.action)
+            self.execute_action(self.action)
+            self.finish_action()
+        elif (self.main_action == common.action.run) and (running_action == common.action.check) and (self.action == common.action.check):
+            # Auto CHECK after RUN
+            self.action = common.action.run
+            self.finish_action(auto_check=False)
+        elif (self.main_action == common.action.run) and (running_action == common.action.summarize) and self.run_all_steps:
+            # Summarize step of run_all_steps
+            self.action = None
+            self.run_all_steps = False
+            self.main_action = None
+            self.job_id = None
+            self.record_state()
+        else:
+            self.finish_action()
+
     def print_task_progress(self, task, message, prefix=''):
         if self.action:
             self.action_progress[self.action].progress_message.append('%s %s' % (prefix, message))
@@ -748,6 +1317,7 @@ class TaskObject(QThread):
             self.update_status_signal.emit(self, self.killed_action, self.status)
 
         self.update_debug_info_signal.emit(self)
+        self.record_state()
 
     def launch(self):
         if self.action == common.action.kill:
@@ -824,9 +1394,12 @@ class TaskObject(QThread):
 
                     self.update_debug_info_signal.emit(self)
 
+                    self.record_state()
+
                     for child_task in self.child:
                         child_task.parent[self] = 'Cancel'
                         self.update_debug_info_signal.emit(child_task)
+                        child_task.record_state()
 
             else:
                 result = True
@@ -958,9 +1531,10 @@ class TaskObject(QThread):
             return None
 
         new_action = {}
+        var_resolver = self.ifp_obj.config_obj.var_resolver
 
         for attr in action_dict.keys():
-            new_action[attr] = common.expand_var(action_dict[attr], ifp_var_dic=self.ifp_obj.config_obj.var_dic, **task_dict)
+            new_action[attr] = var_resolver.expand(action_dict[attr], **task_dict)
 
         return new_action
 
@@ -995,9 +1569,12 @@ class TaskObject(QThread):
         else:
             run_method = self.get_run_method(run_action)
             self.status = common.status_ing[action]
+            # job_id still belongs to the previous action (BUILD before RUN, RUN before auto CHECK), it is set again after the job is submitted.
+            self.job_id = None
             # self.update_status_signal.emit(self, common.action.check, None)
             self.update_status_signal.emit(self, self.action, self.status)
             self.update_debug_info_signal.emit(self)
+            self.record_state()
             self.msg_signal.emit({'message': '[%s/%s/%s/%s] %s : %s "%s"' % (self.block, self.version, self.flow, self.task, self.status, run_method, run_action['COMMAND']), 'color': 'black'})
 
             # Get command
@@ -1041,11 +1618,12 @@ class TaskObject(QThread):
 
             # Run command
             if re.search(r'^\s*bsub', run_method):
-                process = common.spawn_process(command)
-                stdout = process.stdout.readline().decode('utf-8')
+                process = common_scheduler.get_scheduler_backend().submit(command)
+                jobid = process.get_jobid()
 
-                if common.get_jobid(stdout):
-                    self.job_id = 'b:{}'.format(common.get_jobid(stdout))
+                if jobid:
+                    self.job_id = 'b:{}'.format(jobid)
+                    self.record_state(sync=True)
 
                     if action in [common.action.run]:
                         self.set_one_jobid_signal.emit(self.block, self.version, self.flow, self.task, 'Job', str(self.job_id))
@@ -1075,6 +1653,7 @@ class TaskObject(QThread):
             else:
                 process = common.spawn_process(command)
                 self.job_id = 'l:{}'.format(process.pid)
+                self.record_state(sync=True)
 
                 if action in [common.action.run]:
                     self.set_one_jobid_signal.emit(self.block, self.version, self.flow, self.task, 'Job', str(self.job_id))
@@ -1084,31 +1663,38 @@ class TaskObject(QThread):
             stdout, stderr = process.communicate()
             return_code = process.returncode
 
-            stdout = str(stdout, 'utf-8').strip()
-            stderr = str(stderr, 'utf-8').strip()
+            stdout = str(stdout, 'utf-8', errors='replace').strip()
+            stderr = str(stderr, 'utf-8', errors='replace').strip()
 
-            while self.status == common.status.killing:
-                time.sleep(3)
+            self.set_action_result(action, return_code, stdout, stderr, '%s "%s"' % (run_method, run_action['COMMAND']))
 
-            if self.status == common.status.killed:
-                pass
-            else:
+    def set_action_result(self, action, return_code, stdout, stderr, command_info):
+        """
+        Set action status with job return code.
+        """
+        while self.status == common.status.killing:
+            time.sleep(3)
 
-                if return_code == 0:
-                    self.status = '{} {}'.format(action, common.status.passed)
-                    self.msg_signal.emit({'message': '[%s/%s/%s/%s] %s done' % (self.block, self.version, self.flow, self.task, action), 'color': 'green'})
-                else:
-                    self.status = '{} {}'.format(action, common.status.failed)
-                    self.msg_signal.emit({'message': '[%s/%s/%s/%s] %s failed: %s "%s"' % (self.block, self.version, self.flow, self.task, action, run_method, run_action['COMMAND']), 'color': 'red'})
-                    self.print_task_progress(self.task, '[RUN_RESULT] : %s' % stderr)
-                    self.print_task_progress(self.task, '[RUN_RESULT] : %s' % stdout)
+        if self.status == common.status.killed:
+            pass
+        else:
 
-            if action in [common.action.check, common.action.check_view]:
-                self.check_status = self.status
-            elif action in [common.action.summarize, common.action.summarize_view]:
-                self.summarize_status = self.status
+            if return_code == 0:
+                self.status = '{} {}'.format(action, common.status.passed)
+                self.msg_signal.emit({'message': '[%s/%s/%s/%s] %s done' % (self.block, self.version, self.flow, self.task, action), 'color': 'green'})
+            else:
+                self.status = '{} {}'.format(action, common.status.failed)
+                self.msg_signal.emit({'message': '[%s/%s/%s/%s] %s failed: %s' % (self.block, self.version, self.flow, self.task, action, command_info), 'color': 'red'})
+                self.print_task_progress(self.task, '[RUN_RESULT] : %s' % stderr)
+                self.print_task_progress(self.task, '[RUN_RESULT] : %s' % stdout)
 
-            self.update_status_signal.emit(self, action, self.status)
+        if action in [common.action.check, common.action.check_view]:
+            self.check_status = self.status
+        elif action in [common.action.summarize, common.action.summarize_view]:
+            self.summarize_status = self.status
+
+        self.update_status_signal.emit(self, action, self.status)
+        self.record_state()
 
     def manage_action(self):
         """
@@ -1125,19 +1711,26 @@ class TaskObject(QThread):
         if not self.action:
             return
 
+        self.main_action = self.action
+
         if self.run_all_steps and not self.skipped:
             self.execute_action(common.action.build)
 
         # Execute action
         self.print_task_progress(self.task, '[ACTION] : Start execute %s action' % self.action)
         self.execute_action(self.action)
+        self.finish_action()
 
+    def finish_action(self, auto_check=True):
+        """
+        Update dependency state in child/parent tasks after action is executed.
+        """
         all_finished_flag = True
         # If action is RUN or KILL, flow will update dependency state in child based on current task's result
         if self.action == common.action.run or (self.action == common.action.kill and self.killed_action == common.action.run):
 
             # Force execute CHECK after RUN
-            if self.action == common.action.run and not self.skipped and self.ifp_obj.auto_check:
+            if self.action == common.action.run and not self.skipped and self.ifp_obj.auto_check and auto_check:
                 check_action = self.expand_var(self.config_dic['BLOCK'][self.block][self.version][self.flow][self.task]['ACTION'].get(common.action.check.upper(), None),
                                                {'BLOCK': self.block, 'VERSION': self.version, 'FLOW': self.flow, 'TASK': self.task})
 
@@ -1149,7 +1742,9 @@ class TaskObject(QThread):
 
             # Judge if all conditions are finished or not
             if self.formula_list:
-                self.formula_list[self.current_formula_id]['finish'] = True
+                # The condition may be removed by config reload while the task is running.
+                if self.current_formula_id in self.formula_list:
+                    self.formula_list[self.current_formula_id]['finish'] = True
 
                 for i in self.formula_list.keys():
                     if self.formula_list[i]['enable'] and not self.formula_list[i]['finish']:
@@ -1169,6 +1764,7 @@ class TaskObject(QThread):
                     for child_task in self.child:
                         child_task.parent[self] = 'True'
                         self.update_debug_info_signal.emit(child_task)
+                        child_task.record_state()
 
             # If state is FAILED or COMMAND UNDEFINED and all conditions are finished, set CANCEL for dependency state
             elif self.status in ['{} {}'.format(common.action.run, common.status.failed), '{} {}'.format(common.action.run, common.status.undefined), '{} {}'.format(common.action.check, common.status.failed), common.status.killed]:  # Cancel child tasks if failed or run undefined
@@ -1213,7 +1809,9 @@ class TaskObject(QThread):
 
             self.run_all_steps = False
 
+        self.main_action = None
         self.update_debug_info_signal.emit(self)
+        self.record_state()
 
     def kill_action(self):
         """
@@ -1229,7 +1827,7 @@ class TaskObject(QThread):
 
         if str(self.job_id).startswith('b'):
             jobid = str(self.job_id)[2:]
-            common.run_command('bkill ' + str(jobid))
+            common_scheduler.get_scheduler_backend().kill_many([jobid])
         elif str(self.job_id).startswith('l'):
             jobid = str(self.job_id)[2:]
 
@@ -1240,6 +1838,7 @@ class TaskObject(QThread):
 
         self.status = common.status.killed
         self.run_all_steps = False
+        self.record_state()
 
     def view(self):
         if self.rerun_command_before_view:
@@ -1285,6 +1884,7 @@ class TaskObject(QThread):
                 else:
                     child_task.parent[self] = 'True'
                 self.update_debug_info_signal.emit(child_task)
+                child_task.record_state()
 
     def print_output(self, block, version, flow, task, result, output):
         self.debug_print('')
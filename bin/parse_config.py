@@ -46,6 +46,11 @@ class Config:
     5
     >>> table_list[0]['Block']
     'block1'
+    >>> c.version
+    1
+
+    main_table_info_list and config_dic are materialized once per config version.
+    c.version is increased when the config is re-parsed or a task field is updated, consumers can compare it to decide if their cache is still valid.
     """
     def __new__(cls, *args, **kwargs):
         obj = getattr(cls, '__instance__', None)
@@ -89,6 +94,12 @@ class Config:
         return config_dic
 
     def get_config_obj(self, config_file):
+        # self.version is the config version, cached views are rebuilt when it changes.
+        self.version = getattr(self, 'version', 0)
+        self.__item_list = None
+        self.__item_list_version = None
+        self.__config_dic = None
+        self.__config_dic_version = None
         # self.PROJECT saves project information from user config file.
         self.PROJECT = ''
         self.GROUP = ''
@@ -255,14 +266,32 @@ class Config:
 
                         self.block_dic.update({block: block_obj})
 
+        # Resolve all variables once, instead of expanding them one by one.
+        var_resolver = common.VarResolver(self.var_dic, show_warning=False)
+
         for attr in self.var_dic.keys():
-            self.var_dic[attr] = common.expand_var(self.var_dic[attr], ifp_var_dic=self.var_dic, show_warning=False)
+            self.var_dic[attr] = var_resolver.expand(self.var_dic[attr], show_warning=False)
+
+        # Shared by all tasks for action expansion.
+        self.var_resolver = common.VarResolver(self.var_dic)
+
+        self.version += 1
+
+    def update_version(self):
+        """
+        Increase config version, cached views will be rebuilt on next access.
+        """
+        self.version += 1
 
     @property
     def main_table_info_list(self):
         # self.__item_list is a list, save some class 'IfpItem'.
         # One IfpItem means one line on IFP GUI.
+        if (self.__item_list is not None) and (self.__item_list_version == self.version):
+            return self.__item_list
+
         self.__item_list = []
+        self.__item_list_version = self.version
 
         if self.block_dic:
             for block in self.block_dic.values():
@@ -279,6 +308,9 @@ class Config:
 
     @property
     def config_dic(self):
+        if (self.__config_dic is not None) and (self.__config_dic_version == self.version):
+            return self.__config_dic
+
         config_dic = {'PROJECT': self.PROJECT,
                       'GROUP': self.GROUP,
                       'VAR': self.var_dic,
@@ -300,6 +332,9 @@ class Config:
                                     for task in flow.TASK.values():
                                         config_dic['BLOCK'][block.NAME][version.NAME][flow.NAME].update({task.NAME: task})
 
+        self.__config_dic = config_dic
+        self.__config_dic_version = self.version
+
         return config_dic
 
     def __repr__(self):
@@ -315,7 +350,8 @@ class Config:
         if not hasattr(task_obj, field):
             raise Exception('*Error*: Task has no attribute {}'.format(field))
 
-        task_obj.__dict__[field] = field_value
+        setattr(task_obj, field, field_value)
+        self.update_version()
 
     def get_task(self, block, version, flow, task_name):
         query = '{} {} {} {}'.format(block, version, flow, task_name)
@@ -345,14 +381,16 @@ class Config:
 
 
 class IfpItem:
+    __slots__ = ('Block', 'Version', 'Flow', 'Task', '__task')
+    item_list = ['Block', 'Version', 'Flow', 'Task']
+    property_list = ['Visible', 'Selected', 'PATH', 'Status', 'Check', 'Summary', 'Job', 'Runtime', 'Xterm', 'BuildStatus', 'RunStatus', 'CheckStatus', 'SummarizeStatus', 'ReleaseStatus', 'Task_obj']
+
     def __init__(self, block, version, flow, task):
         self.Block = block
         self.Version = version
         self.Flow = flow
         self.Task = task.NAME
         self.__task = task
-        self.item_list = ['Block', 'Version', 'Flow', 'Task']
-        self.property_list = ['Visible', 'Selected', 'PATH', 'Status', 'Check', 'Summary', 'Job', 'Runtime', 'Xterm', 'BuildStatus', 'RunStatus', 'CheckStatus', 'SummarizeStatus', 'ReleaseStatus', 'Task_obj']
 
     @property
     def Visible(self):
@@ -459,12 +497,15 @@ class IfpItem:
         self.__task.Xterm = val
 
     def __getitem__(self, key):
-        if key in self.item_list:
-            return self.__dict__[key]
-        elif key in self.property_list:
-            return self.__task.__dict__[key]
-        else:
-            raise KeyError(key)
+        try:
+            if key in self.item_list:
+                return getattr(self, key)
+            elif key in self.property_list:
+                return getattr(self.__task, key)
+        except AttributeError:
+            pass
+
+        raise KeyError(key)
 
     def get(self, key, default=None):
         try:
@@ -474,9 +515,9 @@ class IfpItem:
 
     def __setitem__(self, key, val):
         if key in self.item_list:
-            self.__dict__[key] = val
+            setattr(self, key, val)
         elif key in self.property_list:
-            self.__task.__dict__[key] = val
+            setattr(self.__task, key, val)
         else:
             raise KeyError(key)
 
@@ -484,10 +525,10 @@ class IfpItem:
         dic = {}
 
         for key in self.item_list:
-            dic.update({key: self.__dict__[key]})
+            dic.update({key: self[key]})
 
         for key in self.property_list:
-            dic.update({key: self.__task.__dict__[key]})
+            dic.update({key: self[key]})
 
         return dic
 
@@ -496,19 +537,42 @@ class IfpItem:
 
 
 class Common:
+    # 'SETTING' saves the parentheses settings of name, such as "task(key=value)", they are readable as attributes.
+    __slots__ = ('NAME', 'SETTING')
+
     def __init__(self, name, *args, **kwargs):
         # 'NAME' is the default attributes.
-        self.NAME, parentheses_setting = get_parentheses_setting(name)
-        self.__dict__.update({**parentheses_setting})
+        self.NAME, self.SETTING = get_parentheses_setting(name)
+
+    def __getattr__(self, name):
+        try:
+            setting = object.__getattribute__(self, 'SETTING')
+        except AttributeError:
+            raise AttributeError(name)
+
+        if name in setting:
+            return setting[name]
+
+        raise AttributeError(name)
+
+    def field_names(self):
+        field_name_list = []
+
+        for cls in reversed(type(self).__mro__):
+            for field_name in cls.__dict__.get('__slots__', ()):
+                if (field_name != 'SETTING') and (field_name not in field_name_list):
+                    field_name_list.append(field_name)
+
+        return field_name_list
 
     def __repr__(self):
         dic = {}
 
-        for k, v in self.__dict__.items():
-            if k.startswith('_'):
-                continue
+        for k in self.field_names():
+            if hasattr(self, k):
+                dic[k] = getattr(self, k)
 
-            dic[k] = v
+        dic.update(self.SETTING)
 
         return str(dic)
 
@@ -516,33 +580,42 @@ class Common:
         field_name = field_obj.__class__.__name__.upper()
 
         if not hasattr(self, field_name):
-            self.__dict__[field_name] = {}
+            setattr(self, field_name, {})
 
-        self.__dict__[field_name].update({field_obj.NAME: field_obj})
+        getattr(self, field_name).update({field_obj.NAME: field_obj})
 
         if self.__class__.__name__ == 'Task':
-            self.__dict__.update({field_obj.NAME: field_obj})
+            self.SETTING.update({field_obj.NAME: field_obj})
 
 
 class Block(Common):
+    __slots__ = ('VERSION',)
+
     def __init__(self, name):
         super().__init__(name)
         self.VERSION = {}
 
 
 class Version(Common):
+    __slots__ = ('FLOW',)
+
     def __init__(self, name):
         super().__init__(name)
         self.FLOW = {}
 
 
 class Flow(Common):
+    __slots__ = ('TASK',)
+
     def __init__(self, name):
         super().__init__(name)
         self.TASK = {}
 
 
 class Task(Common):
+    __slots__ = ('ACTION', 'RUN_AFTER', 'DEPENDENCY', 'Visible', 'Selected', 'PATH', 'Status', 'BuildStatus', 'RunStatus', 'CheckStatus', 'SummarizeStatus', 'ReleaseStatus', 'Check', 'Summary', 'Job', 'Runtime', 'Xterm', 'Task_obj')
+    property_list = ['Visible', 'Selected', 'PATH', 'Status', 'Check', 'Summary', 'Job', 'Runtime', 'Xterm', 'BuildStatus', 'RunStatus', 'CheckStatus', 'SummarizeStatus', 'ReleaseStatus']
+
     def __init__(self, name):
         super().__init__(name)
         self.ACTION = {}
@@ -562,7 +635,7 @@ class Task(Common):
         self.Job = None
         self.Runtime = None
         self.Xterm = None
-        self.property_list = ['Visible', 'Selected', 'PATH', 'Status', 'Check', 'Summary', 'Job', 'Runtime', 'Xterm', 'BuildStatus', 'RunStatus', 'CheckStatus', 'SummarizeStatus', 'ReleaseStatus']
+        self.Task_obj = None
 
     def get(self, key, default=None):
         try:
@@ -571,14 +644,17 @@ class Task(Common):
             return default
 
     def __getitem__(self, key):
-        try:
-            return self.__dict__[key]
-        except Exception:
-            raise KeyError(key)
+        if (key in self.__slots__) or (key in Common.__slots__) or (key in self.SETTING):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+
+        raise KeyError(key)
 
     def __setitem__(self, key, val):
         if key in self.property_list:
-            self.__task.__dict__[key] = val
+            setattr(self, key, val)
         else:
             raise KeyError(key)
 
@@ -5,32 +5,34 @@
 # Created On  : 2022-09-20 17:46:15
 # Description :
 ################################
+import bisect
+import csv
 import datetime
-import io
+import fcntl
 import json
 import os
 import re
+import sqlite3
 import sys
-from collections import deque
+import threading
 from dataclasses import dataclass, asdict
 
-import pandas as pd
 import psutil
 import yaml
 import time
 import copy
 import shutil
 import getpass
-import graphviz
 import functools
+import math
 from dateutil import parser
 from typing import Tuple, Dict
 from screeninfo import get_monitors
 
 from PyQt5.QtWidgets import QWidget, QMainWindow, QAction, QPushButton, QLabel, QHeaderView, QVBoxLayout, QHBoxLayout, QLineEdit, QTableView, QAbstractItemView, QMenu, QToolTip, QDesktopWidget, QMessageBox, QComboBox, QFileDialog, QApplication, QGridLayout, \
-    QTableWidget, QTableWidgetItem, QCompleter, QCheckBox, QStyledItemDelegate, QFormLayout, QScrollArea, QTabWidget, QTextEdit, QPlainTextEdit, QButtonGroup, QRadioButton, QFrame
-from PyQt5.QtGui import QBrush, QFont, QColor, QStandardItem, QStandardItemModel, QCursor, QPalette, QPixmap, QPen, QPainter, QTextFormat, QTextDocument, QTextCursor, QTextCharFormat, QIcon
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QThread, QSize, QRegularExpression, QTimer, QProcess
+    QTableWidget, QTableWidgetItem, QCompleter, QCheckBox, QStyledItemDelegate, QFormLayout, QScrollArea, QTabWidget, QTextEdit, QButtonGroup, QRadioButton, QFrame, QAbstractScrollArea, QGraphicsView, QGraphicsScene
+from PyQt5.QtGui import QBrush, QFont, QColor, QStandardItem, QStandardItemModel, QCursor, QPalette, QPen, QPainter, QIcon, QPolygonF
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QThread, QSize, QTimer, QProcess, QFileSystemWatcher, QPointF, QRectF
 
 os.environ['PYTHONUNBUFFERED'] = '1'
 sys.path.append(str(os.environ['IFP_INSTALL_PATH']) + '/config')
@@ -41,6 +43,8 @@ import config
 import common
 import common_pyqt5
 import common_lsf
+import common_log
+import common_graph
 
 EDIT_COLOR = QColor(100, 149, 237)
 
@@ -185,6 +189,240 @@ class TaskCache:
     log: TaskLogCache = TaskLogCache()
 
 
+class TaskHistoryStore:
+    """
+    Append-only job history of tasks, saved in sqlite table "history".
+    Records are cached in memory and inserted in batch, lookups are indexed queries.
+    """
+    def __init__(self, db_path, flush_count=100, flush_interval=5):
+        self.db_path = db_path
+        self.flush_count = flush_count
+        self.flush_interval = flush_interval
+        self.pending_list = []
+        self.last_flush_time = time.time()
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def connect(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            self.connection.execute('CREATE TABLE IF NOT EXISTS history (block TEXT, version TEXT, flow TEXT, task TEXT, action TEXT, job_id TEXT, timestamp INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS history_task_index ON history (block, version, flow, task, action, timestamp)')
+            self.import_csv(os.path.join(os.path.dirname(self.db_path), 'summary.csv'))
+            self.connection.commit()
+
+        return self.connection
+
+    def import_csv(self, csv_file):
+        """
+        Import old history file summary.csv (block,version,flow,task,job_id,timestamp) into empty database.
+        """
+        if (not os.path.exists(csv_file)) or self.connection.execute('SELECT 1 FROM history LIMIT 1').fetchone():
+            return
+
+        try:
+            with open(csv_file, 'r') as CF:
+                row_list = [(row['block'], row['version'], row['flow'], row['task'], '', row['job_id'], int(float(row['timestamp']))) for row in csv.DictReader(CF)]
+
+            self.connection.executemany('INSERT INTO history VALUES (?, ?, ?, ?, ?, ?, ?)', row_list)
+        except Exception as error:
+            common.print_warning('*Warning*: Failed on importing history file "' + str(csv_file) + '": ' + str(error))
+
+    def add(self, block, version, flow, task, action, job_id, timestamp=None):
+        if timestamp is None:
+            timestamp = int(datetime.datetime.now().timestamp())
+
+        with self.lock:
+            self.pending_list.append((block, version, flow, task, action or '', str(job_id), timestamp))
+            flush_flag = (len(self.pending_list) >= self.flush_count) or (time.time() - self.last_flush_time >= self.flush_interval)
+
+        if flush_flag:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending_list = self.pending_list
+            self.pending_list = []
+            self.last_flush_time = time.time()
+
+            if not pending_list:
+                return
+
+            try:
+                connection = self.connect()
+
+                with connection:
+                    connection.executemany('INSERT INTO history VALUES (?, ?, ?, ?, ?, ?, ?)', pending_list)
+            except Exception as error:
+                common.print_warning('*Warning*: Failed on saving job history into "' + str(self.db_path) + '": ' + str(error))
+
+    def get_last_job_id(self, block, version, flow, task, action=None):
+        """
+        Get the latest job id of task (and action), return '' if not found.
+        """
+        with self.lock:
+            for record in reversed(self.pending_list):
+                if (record[:4] == (block, version, flow, task)) and ((action is None) or (record[4] == action)):
+                    return record[5]
+
+            try:
+                if action is None:
+                    row = self.connect().execute('SELECT job_id FROM history WHERE block=? AND version=? AND flow=? AND task=? ORDER BY timestamp DESC LIMIT 1', (block, version, flow, task)).fetchone()
+                else:
+                    row = self.connect().execute('SELECT job_id FROM history WHERE block=? AND version=? AND flow=? AND task=? AND action=? ORDER BY timestamp DESC LIMIT 1', (block, version, flow, task, action)).fetchone()
+            except Exception as error:
+                common.print_warning('*Warning*: Failed on reading job history from "' + str(self.db_path) + '": ' + str(error))
+                row = None
+
+        return row[0] if row else ''
+
+    def get_task_statistics(self, block, version, flow, task):
+        """
+        Return {action: {'count': <int>, 'first_time': <timestamp>, 'last_time': <timestamp>}} of task.
+        """
+        self.flush()
+        statistics_dic = {}
+
+        with self.lock:
+            for (action, count, first_time, last_time) in self.connect().execute('SELECT action, COUNT(*), MIN(timestamp), MAX(timestamp) FROM history WHERE block=? AND version=? AND flow=? AND task=? GROUP BY action', (block, version, flow, task)):
+                statistics_dic[action] = {'count': count, 'first_time': first_time, 'last_time': last_time}
+
+        return statistics_dic
+
+    def close(self):
+        self.flush()
+
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+class TaskCacheStore:
+    """
+    Cache of TaskCache (dict) for all tasks, saved in one json file.
+    Updates are kept in memory and written by a writer thread once per interval (tmp file + rename).
+    The file is shared by all IFP sessions of the user, so only updated entries are merged into the file on disk (under flock of "<cache_file>.lock").
+    Old per-task json files (INFO/<BLOCK>/<VERSION>/<FLOW>/<TASK>/task.json) are loaded on first read.
+    """
+    def __init__(self, cache_file, legacy_cache_path='', flush_interval=2):
+        self.cache_file = cache_file
+        self.legacy_cache_path = legacy_cache_path
+        self.flush_interval = flush_interval
+        self.cache_dic = {}
+        self.dirty_key_set = set()
+        self.lock = threading.Lock()
+        self.flush_event = threading.Event()
+        self.stop_flag = False
+
+        self.load()
+
+        self.writer_thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer_thread.start()
+
+    @staticmethod
+    def get_key(block, version, flow, task):
+        return '%s/%s/%s/%s' % (block, version, flow, task)
+
+    def load(self):
+        self.cache_dic = self.read_cache_file()
+
+    def read_cache_file(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as cf:
+                    return json.load(cf)
+            except Exception as error:
+                common.print_warning('*Warning*: Failed on loading task cache "' + str(self.cache_file) + '": ' + str(error))
+
+        return {}
+
+    def get(self, block, version, flow, task):
+        """
+        Get cached task dict, return {} if not found.
+        """
+        key = self.get_key(block, version, flow, task)
+
+        with self.lock:
+            if key in self.cache_dic:
+                return self.cache_dic[key]
+
+        task_dic = {}
+
+        if self.legacy_cache_path:
+            legacy_cache_file = self.legacy_cache_path.format_map({'BLOCK': block, 'VERSION': version, 'FLOW': flow, 'TASK': task})
+
+            if os.path.exists(legacy_cache_file):
+                try:
+                    with open(legacy_cache_file, 'r') as cf:
+                        task_dic = json.load(cf)
+                except Exception:
+                    task_dic = {}
+
+        with self.lock:
+            self.cache_dic.setdefault(key, task_dic)
+
+        return task_dic
+
+    def update(self, block, version, flow, task, task_dic):
+        with self.lock:
+            key = self.get_key(block, version, flow, task)
+            self.cache_dic[key] = task_dic
+            self.dirty_key_set.add(key)
+
+    def write_loop(self):
+        while not self.stop_flag:
+            self.flush_event.wait(self.flush_interval)
+            self.flush_event.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Merge updated entries into the cache file, entries saved by other IFP sessions are kept (and loaded).
+        """
+        with self.lock:
+            if not self.dirty_key_set:
+                return
+
+            dirty_dic = {key: self.cache_dic.get(key) for key in self.dirty_key_set}
+            self.dirty_key_set = set()
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+
+            with open(str(self.cache_file) + '.lock', 'a') as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+
+                try:
+                    disk_dic = self.read_cache_file()
+                    disk_dic.update(dirty_dic)
+                    tmp_file = '%s.%s.tmp' % (self.cache_file, os.getpid())
+
+                    with open(tmp_file, 'w') as cf:
+                        cf.write(json.dumps({key: value for (key, value) in disk_dic.items() if value}))
+
+                    os.replace(tmp_file, self.cache_file)
+                finally:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+            with self.lock:
+                for (key, value) in disk_dic.items():
+                    if key not in self.dirty_key_set:
+                        self.cache_dic[key] = value
+        except Exception as error:
+            common.print_warning('*Warning*: Failed on saving task cache "' + str(self.cache_file) + '": ' + str(error))
+
+            with self.lock:
+                self.dirty_key_set.update(dirty_dic.keys())
+
+    def close(self):
+        self.stop_flag = True
+        self.flush_event.set()
+        self.writer_thread.join()
+        self.flush()
+
+
 class TaskJobInfo:
     def __init__(self, **kwargs):
         self.id = str(kwargs.get('job_id', ''))
@@ -196,6 +434,9 @@ class TaskJobInfo:
         self.cmd = str(kwargs.get('command', ''))
         self.cwd = str(kwargs.get('cwd', ''))
 
+    def update_run_time(self):
+        self.run_time = self._delta_format(self.submit_time)
+
     @staticmethod
     def _time_format(item: str):
         try:
@@ -230,16 +471,29 @@ class TaskJobCheckSignals(QObject):
 
 class TaskJobCheckWorker(QThread):
     job_dic = pyqtSignal(TaskJobInfo)
+    job_status_dic = pyqtSignal(dict)
 
-    def __init__(self, job_id: str, job_type: str = 'LSF'):
+    def __init__(self, job_id: str, job_type: str = 'LSF', job_status: str = None):
         super().__init__()
         self.job_id = job_id
         self.job_type = job_type.upper()
+        self.job_status = job_status
         self.signal = TaskJobCheckSignals()
 
+    @property
+    def job(self) -> str:
+        return '{}:{}'.format('b' if self.job_type == 'LSF' else 'l', self.job_id)
+
     def run(self):
-        job_info = self._get_job_info()
-        self.job_dic.emit(job_info)
+        """
+        Get job status with get_job_status_dic, detailed job info (bjobs -UF) is only got when the status is changed from job_status.
+        """
+        job_status_dic = self.get_job_status_dic([self.job])
+        self.job_status_dic.emit(job_status_dic)
+
+        if (self.job_status is None) or (job_status_dic.get(self.job, '') != self.job_status):
+            job_info = self._get_job_info()
+            self.job_dic.emit(job_info)
 
     def _get_job_info(self) -> TaskJobInfo:
         if self.job_type == 'LSF':
@@ -292,44 +546,109 @@ class TaskJobCheckWorker(QThread):
             return {"error": str(e)}
 
     @staticmethod
-    def get_lsf_job_status(job_id: str) -> str:
-        try:
-            status = os.popen(f'bjobs {job_id} | tail -n 1').read().split()[2]
-        except Exception:
-            status = ''
+    def get_job_status_dic(job_list) -> Dict[str, str]:
+        """
+        Get status of jobs ("b:<jobid>" / "l:<pid>") with one bjobs command and one /proc scan.
+        Return {job: status}, status is '' if unknown.
+        """
+        lsf_job_dic = {}
+        local_job_dic = {}
+
+        for job in job_list:
+            check, job_dic = TaskJobCheckWorker.check_job_id(job_id=str(job))
+
+            if check and (job_dic['job_type'] == 'LSF'):
+                lsf_job_dic[job] = str(job_dic['job_id'])
+            elif check and (job_dic['job_type'] == 'LOCAL'):
+                local_job_dic[job] = str(job_dic['job_id'])
+
+        job_status_dic = {job: '' for job in job_list}
+
+        if lsf_job_dic:
+            lsf_status_dic = TaskJobCheckWorker.get_lsf_job_status_dic(list(lsf_job_dic.values()))
+
+            for (job, job_id) in lsf_job_dic.items():
+                job_status_dic[job] = lsf_status_dic.get(job_id, '')
+
+        if local_job_dic:
+            local_status_dic = TaskJobCheckWorker.get_local_job_status_dic(list(local_job_dic.values()))
 
-        if status == 'RUN':
-            return common.status.running
-        elif status == 'DONE':
-            return '{} {}'.format(common.TaskAction.run, common.status.passed)
-        elif status == 'EXIT':
-            return '{} {}'.format(common.TaskAction.run, common.status.failed)
-        elif status == 'QUEUE':
-            return common.status.queued
+            for (job, pid) in local_job_dic.items():
+                job_status_dic[job] = local_status_dic.get(pid, '')
 
-        return status
+        return job_status_dic
 
     @staticmethod
-    def get_local_job_status(job_id: str) -> str:
+    def get_lsf_job_status_dic(job_id_list) -> Dict[str, str]:
+        """
+        Get LSF job status with one bjobs command.
+        """
+        job_status_dic = {}
+
+        for (job_id, status) in job_manager.JobManager.get_lsf_job_status_dic(sorted(set(job_id_list))).items():
+            if status == 'RUN':
+                job_status_dic[job_id] = common.status.running
+            elif status == 'DONE':
+                job_status_dic[job_id] = '{} {}'.format(common.TaskAction.run, common.status.passed)
+            elif status == 'EXIT':
+                job_status_dic[job_id] = '{} {}'.format(common.TaskAction.run, common.status.failed)
+            elif status == 'QUEUE':
+                job_status_dic[job_id] = common.status.queued
+            else:
+                job_status_dic[job_id] = status
+
+        return job_status_dic
+
+    @staticmethod
+    def get_local_job_status_dic(pid_list) -> Dict[str, str]:
+        """
+        Get local job status with one /proc scan, only zombie child process is waited for exit code.
+        """
+        job_status_dic = {}
+
         try:
-            os.kill(int(job_id), 0)
+            live_pid_set = {pid for pid in os.listdir('/proc') if pid.isdigit()}
         except OSError:
-            return common.status.passed
-        else:
+            return job_status_dic
+
+        for pid in pid_list:
+            if pid not in live_pid_set:
+                job_status_dic[pid] = common.status.passed
+                continue
+
             try:
-                pid, status = os.waitpid(int(job_id), os.WNOHANG)
-                if pid == 0:
-                    return common.status.running
-                else:
-                    if os.WIFEXITED(status):
-                        exit_code = os.WEXITSTATUS(status)
-                        return common.status.passed if exit_code == 0 else common.status.failed
-                    elif os.WIFSIGNALED(status):
-                        return common.status.failed
-                    else:
-                        return common.status.passed
+                with open('/proc/%s/stat' % pid, 'r') as SF:
+                    state = SF.read().rsplit(')', 1)[1].split()[0]
+            except (OSError, IndexError):
+                job_status_dic[pid] = common.status.passed
+                continue
+
+            if state != 'Z':
+                job_status_dic[pid] = common.status.running
+                continue
+
+            try:
+                (wait_pid, status) = os.waitpid(int(pid), os.WNOHANG)
             except OSError:
-                return ''
+                job_status_dic[pid] = ''
+                continue
+
+            if (wait_pid != 0) and os.WIFEXITED(status):
+                job_status_dic[pid] = common.status.passed if os.WEXITSTATUS(status) == 0 else common.status.failed
+            elif (wait_pid != 0) and os.WIFSIGNALED(status):
+                job_status_dic[pid] = common.status.failed
+            else:
+                job_status_dic[pid] = common.status.passed
+
+        return job_status_dic
+
+    @staticmethod
+    def get_lsf_job_status(job_id: str) -> str:
+        return TaskJobCheckWorker.get_lsf_job_status_dic([job_id]).get(job_id, '')
+
+    @staticmethod
+    def get_local_job_status(job_id: str) -> str:
+        return TaskJobCheckWorker.get_local_job_status_dic([job_id]).get(job_id, '')
 
 
 class UserConfig(QMainWindow):
@@ -374,8 +693,9 @@ class UserConfig(QMainWindow):
         self.view_status_dic = {}
         self.task_cache = AutoVivification()
         self.info_cache_path = os.path.join(common.get_user_cache_path(), 'INFO/{BLOCK}/{VERSION}/{FLOW}/{TASK}/task.json')
-        self.history_cache_path = os.path.join(common.get_user_cache_path(), 'SUMMARY/summary.csv')
-        self.history_cache_df = pd.DataFrame(columns=['block', 'version', 'flow', 'task', 'job_id', 'timestamp'])
+        self.task_cache_store = TaskCacheStore(os.path.join(common.get_user_cache_path(), 'INFO/task_cache.json'), legacy_cache_path=self.info_cache_path)
+        self.history_cache_path = os.path.join(common.get_user_cache_path(), 'SUMMARY/history.db')
+        self.history_store = TaskHistoryStore(self.history_cache_path)
 
         self.view_status_dic.setdefault('column', {})
 
@@ -427,12 +747,9 @@ class UserConfig(QMainWindow):
         self.cwd = os.getcwd()
         center(self)
 
-        self.thread = QThread()
-        self.ifp_monitor = IFPMonitor(self)
-        self.ifp_monitor.moveToThread(self.thread)
+        self.config_revision = ConfigRevision()
+        self.ifp_monitor = IFPMonitor(self, self.config_revision)
         self.ifp_monitor.message.connect(self.update_state)
-        self.thread.started.connect(self.ifp_monitor.run)
-        self.thread.start()
         self.tab_name = 'CONFIG'
 
     def init_ui(self):
@@ -849,7 +1166,7 @@ class UserConfig(QMainWindow):
         self.draw_table(self.raw_setting, stage='load')
         self.parsing_user_setting()
         self.update_setting_dependency()
-        self.ifp_monitor.wake_up = True
+        self.config_revision.touch()
         self._catch_task_status()
 
     def _catch_task_status(self):
@@ -1236,6 +1553,7 @@ class UserConfig(QMainWindow):
                                 self.detailed_setting[self.current_selected_block][self.current_selected_version][self.current_selected_flow][new_task][category][item] = default_setting_tmp[self.current_selected_task][category][item]
 
         self.update_setting_dependency()
+        self.config_revision.touch()
 
     def update_table_after_add(self, info):
         self.user_input = copy.deepcopy(info[0])
@@ -1251,6 +1569,7 @@ class UserConfig(QMainWindow):
 
         self.draw_table(self.user_input)
         self.update_setting_dependency()
+        self.config_revision.touch()
 
     def edit_detailed_config(self,
                              read_only=False,
@@ -1300,6 +1619,7 @@ class UserConfig(QMainWindow):
             self.draw_table(self.user_input)
             self.update_setting_dependency()
 
+        self.config_revision.touch()
         self.save()
 
     def update_extension_config_setting(self, tag=None, *args, **kwargs):
@@ -1384,57 +1704,88 @@ class UserConfig(QMainWindow):
         check, job_dic = TaskJobCheckWorker.check_job_id(job_id=job_id)
 
         if job_dic.get('job_type') == 'LSF':
-            self.history_cache_df.loc[len(self.history_cache_df)] = [block, version, flow, task, job_dic.get('job_id', ''), int(datetime.datetime.now().timestamp())]
+            task_obj = self.ifp_obj.job_manager.all_tasks[block][version][flow].get(task, None)
+            action = getattr(task_obj, 'action', '')
+            self.history_store.add(block, version, flow, task, action, job_dic.get('job_id', ''))
 
     def save_cache(self):
-        if not os.path.exists(self.history_cache_path):
-            os.makedirs(os.path.dirname(self.history_cache_path), exist_ok=True)
-            self.history_cache_df.to_csv(self.history_cache_path, index=False)
-        else:
-            self.history_cache_df.to_csv(self.history_cache_path, index=False, header=False, mode='a+')
+        self.history_store.flush()
+        self.task_cache_store.flush()
+
+
+class ConfigRevision(QObject):
+    """
+    Revision number of user config (user_input/detailed_setting/default_setting).
+    Config editors call touch() after modification, consumers compare revision instead of diffing config dicts.
+    """
+    changed = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.revision = 0
+
+    def touch(self):
+        self.revision += 1
+        self.changed.emit(self.revision)
 
 
 class IFPMonitor(QObject):
+    """
+    Get task setting state (user/default/blank) when config revision is changed.
+    Several changes in one event loop iteration are handled once.
+    """
     message = pyqtSignal(dict)
 
-    def __init__(self, mainwindow):
+    def __init__(self, mainwindow, config_revision):
         super(QObject, self).__init__()
         self.mainwindow = mainwindow
-        self.user_input = AutoVivification()
-        self.detailed_setting = AutoVivification()
-        self.default_setting = AutoVivification()
+        self.config_revision = config_revision
         self.state = AutoVivification()
-        self.wake_up = False
+        self.revision = 0
+        self.pending_flag = False
+
+        self.config_revision.changed.connect(self.schedule)
+
+    def schedule(self, revision):
+        if (revision > self.revision) and (not self.pending_flag):
+            self.pending_flag = True
+            QTimer.singleShot(0, self.run)
 
     def run(self):
-        while True:
-            if self.wake_up:
-                self.user_input = copy.deepcopy(self.mainwindow.user_input)
-                self.detailed_setting = copy.deepcopy(self.mainwindow.detailed_setting)
-                self.default_setting = copy.deepcopy(self.mainwindow.default_setting)
-
-                for block in self.user_input['BLOCK'].keys():
-                    for version in self.user_input['BLOCK'][block].keys():
-                        for flow in self.user_input['BLOCK'][block][version].keys():
-                            for task in self.user_input['BLOCK'][block][version][flow].keys():
-                                if self.detailed_setting[block][version][flow][task]:
-                                    self.state[block][version][flow][task] = 'user'
-
-                                    if len(check_task_items(self.detailed_setting[block][version][flow][task])):
-                                        self.state[block][version][flow][task] = 'blank'
+        self.pending_flag = False
 
-                                    continue
+        if self.config_revision.revision == self.revision:
+            return
 
-                                if task in self.default_setting.keys():
-                                    self.state[block][version][flow][task] = 'default'
+        self.revision = self.config_revision.revision
+        self.state = AutoVivification()
+        user_input = self.mainwindow.user_input
+        detailed_setting = self.mainwindow.detailed_setting
+        default_setting = self.mainwindow.default_setting
 
-                                    continue
+        # Read with get() only, AutoVivification creates missing keys on [] access.
+        for (block, block_dic) in user_input.get('BLOCK', {}).items():
+            for (version, version_dic) in block_dic.items():
+                for (flow, flow_dic) in version_dic.items():
+                    for task in flow_dic.keys():
+                        task_setting = detailed_setting.get(block, {}).get(version, {}).get(flow, {}).get(task)
 
+                        if task_setting:
+                            self.state[block][version][flow][task] = 'user'
+
+                            if len(check_task_items(task_setting)):
                                 self.state[block][version][flow][task] = 'blank'
 
-                self.message.emit(self.state)
-                self.wake_up = False
-            time.sleep(3)
+                            continue
+
+                        if task in default_setting.keys():
+                            self.state[block][version][flow][task] = 'default'
+
+                            continue
+
+                        self.state[block][version][flow][task] = 'blank'
+
+        self.message.emit(self.state)
 
 
 class WindowForAddItems(QMainWindow):
@@ -2722,6 +3073,99 @@ class WindowForEditTaskRequirement(QMainWindow):
         self.close()
 
 
+class DependencyChartView(QGraphicsView):
+    """
+    Draw dependency flow chart (with GraphLayout positions) on QGraphicsScene, zoom with mouse wheel.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scene = QGraphicsScene(self)
+        self.setScene(self.scene)
+        self.setRenderHint(QPainter.Antialiasing)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setStyleSheet("background-color: white ;border: 1px solid lightgray ;")
+        self.layer_height = 60
+        self.link_node_size = 16
+
+    def draw(self, flow_chart_dic, link_label_dic, position_dic, bend_dic=None):
+        self.scene.clear()
+
+        if not position_dic:
+            return
+
+        font = QFont('Calibri', 10)
+        text_item_dic = {}
+        column_width = 0
+
+        for node in flow_chart_dic.keys():
+            text_item = self.scene.addSimpleText(link_label_dic.get(node, node), font)
+            text_item_dic[node] = text_item
+
+            if node not in link_label_dic:
+                column_width = max(column_width, text_item.boundingRect().width())
+
+        column_width += 30
+        node_rect_dic = {}
+
+        # Nodes, task is box, "&"/"|" link node is circle.
+        for (node, text_item) in text_item_dic.items():
+            (x, y) = position_dic[node]
+            center = QPointF(x * column_width, y * self.layer_height)
+            text_rect = text_item.boundingRect()
+
+            if node in link_label_dic:
+                node_rect = QRectF(center.x() - self.link_node_size / 2, center.y() - self.link_node_size / 2, self.link_node_size, self.link_node_size)
+                self.scene.addEllipse(node_rect, QPen(Qt.black))
+            else:
+                node_rect = QRectF(center.x() - text_rect.width() / 2 - 8, center.y() - text_rect.height() / 2 - 4, text_rect.width() + 16, text_rect.height() + 8)
+                self.scene.addRect(node_rect, QPen(Qt.black))
+
+            text_item.setPos(center.x() - text_rect.width() / 2, center.y() - text_rect.height() / 2)
+            text_item.setZValue(1)
+            node_rect_dic[node] = node_rect
+
+        # Edges, from bottom of node to top of next node (through bend points of long edge).
+        pen = QPen(Qt.black)
+        brush = QBrush(Qt.black)
+        bend_dic = bend_dic or {}
+
+        for (node, next_node_list) in flow_chart_dic.items():
+            for next_node in next_node_list:
+                point_list = [QPointF(node_rect_dic[node].center().x(), node_rect_dic[node].bottom())]
+                point_list += [QPointF(x * column_width, y * self.layer_height) for (x, y) in bend_dic.get((node, next_node), [])]
+                point_list.append(QPointF(node_rect_dic[next_node].center().x(), node_rect_dic[next_node].top()))
+
+                for k in range(len(point_list) - 1):
+                    self.scene.addLine(point_list[k].x(), point_list[k].y(), point_list[k + 1].x(), point_list[k + 1].y(), pen)
+
+                self.scene.addPolygon(self.get_arrow(point_list[-2], point_list[-1]), pen, brush)
+
+        self.scene.setSceneRect(self.scene.itemsBoundingRect().adjusted(-10, -10, 10, 10))
+        self.fit_chart()
+
+    @staticmethod
+    def get_arrow(start_point, end_point, size=7):
+        angle = math.atan2(end_point.y() - start_point.y(), end_point.x() - start_point.x())
+        left_point = QPointF(end_point.x() - size * math.cos(angle - math.pi / 6), end_point.y() - size * math.sin(angle - math.pi / 6))
+        right_point = QPointF(end_point.x() - size * math.cos(angle + math.pi / 6), end_point.y() - size * math.sin(angle + math.pi / 6))
+
+        return QPolygonF([end_point, left_point, right_point])
+
+    def fit_chart(self):
+        """
+        Show full chart, but do not zoom in small chart.
+        """
+        self.resetTransform()
+        scene_rect = self.scene.sceneRect()
+
+        if (scene_rect.width() > self.viewport().width()) or (scene_rect.height() > self.viewport().height()):
+            self.fitInView(scene_rect, Qt.KeepAspectRatio)
+
+    def wheelEvent(self, event):
+        factor = 1.15 if event.angleDelta().y() > 0 else 1 / 1.15
+        self.scale(factor, factor)
+
+
 class WindowForDependency(QMainWindow):
     message = pyqtSignal(str, dict)
     update = pyqtSignal(bool, str)
@@ -2739,7 +3183,11 @@ class WindowForDependency(QMainWindow):
         self.dependency_clipboard = {}
         self.table_item_condition_dic = {}
 
-        self.gen_current_picture_dir()
+        self.chart_layout = common_graph.GraphLayout()
+        self.chart_timer = QTimer(self)
+        self.chart_timer.setSingleShot(True)
+        self.chart_timer.setInterval(200)
+        self.chart_timer.timeout.connect(self.draw_dependency_chart)
         self.mode = mode
         self.modify_item_set = set()
         self.gui_enable_flag = True
@@ -2748,15 +3196,6 @@ class WindowForDependency(QMainWindow):
 
         self.update_flag = 'dependency'
 
-    def gen_current_picture_dir(self):
-        """
-        mkdir CWD/.picture directory in order to save flow chart
-        """
-        self.picture_dir = os.path.join(os.getcwd(), '.ifp/pictures/%s/%s/' % (self.current_block, self.current_version))
-
-        if not os.path.exists(self.picture_dir):
-            os.makedirs(self.picture_dir)
-
     def init_ui(self):
         title = 'Dependency Setting'
 
@@ -2793,7 +3232,8 @@ class WindowForDependency(QMainWindow):
         self.top_layout.setStretch(2, 10)
 
         self.current_table = QTableWidget()
-        self.current_chart = QLabel()
+        self.current_chart = DependencyChartView()
+        self.current_chart.setFixedWidth(600 * self.width_scale_rate)
 
         self.gen_selection_button()
         self.gen_table()
@@ -2891,7 +3331,6 @@ class WindowForDependency(QMainWindow):
     def update_table_frame(self):
         self.current_block = self.block_combo.currentText().strip()
         self.current_version = self.version_combo.currentText().strip()
-        self.gen_current_picture_dir()
 
         if not set(self.default_dependency_dic.keys()).intersection(set(self.current_dependency_priority_dic.keys())):
             self.reset_to_default_button.setEnabled(False)
@@ -2924,33 +3363,18 @@ class WindowForDependency(QMainWindow):
 
         self.dependency_priority_dic[self.current_block][self.current_version] = self.current_dependency_priority_dic
 
-    def gen_chart_frame(self, image_path, full_image_path):
-        self.current_chart.clear()
-
-        pixmap = QPixmap(image_path)
-        self.current_chart.setPixmap(pixmap)
-        self.current_chart.setToolTip('<img src="%s">' % str(full_image_path))
-
-        self.current_chart.setAlignment(Qt.AlignCenter | Qt.AlignLeft)
-        self.current_chart.setStyleSheet("background-color: white ;border: 1px solid lightgray ;")
-        self.current_chart.setFixedWidth(600 * self.width_scale_rate)
-
-    def gen_dependency_chart(self, graph_size=None):
-        if graph_size is None:
-            graph_size = [4.8, 3.2]
-
-        dependency_dic = {**self.default_dependency_dic, **self.current_dependency_priority_dic}
-        node_list = list(dependency_dic.keys())
+    @staticmethod
+    def get_dependency_graph(dependency_dic):
+        """
+        Convert dependency setting into flow chart {node: [next_node, ...]}.
+        "&" and "|" conditions are link nodes (named by number), return (flow_chart_dic, {link_node: '&'|'|'}).
+        """
         flow_chart_dic = {}
-        dot = graphviz.Digraph('round-table', comment='The Round Table')
-
-        width = graph_size[0] * self.width_scale_rate
-        height = graph_size[1] * self.height_scale_rate
+        link_label_dic = {}
 
         # basic element
-        for node in node_list:
+        for node in dependency_dic.keys():
             if not re.match(r'^\s+$', node):
-                dot.node(node, node, shape='box')
                 flow_chart_dic.setdefault(node, [])
 
         # num
@@ -2964,39 +3388,27 @@ class WindowForDependency(QMainWindow):
                 continue
 
             # ^ the third priority
-            third_condition_list = condition.split(',')
-
-            if '' in third_condition_list:
-                third_condition_list.remove('')
-
+            third_condition_list = [third_condition for third_condition in condition.split(',') if third_condition]
             second_link_list = []
 
             for third_condition in third_condition_list:
                 # | the second priority
-                second_condition_list = third_condition.split('|')
-
-                if '' in second_condition_list:
-                    second_condition_list.remove('')
-
+                second_condition_list = [second_condition for second_condition in third_condition.split('|') if second_condition]
                 first_link_list = []
 
                 for second_condition in second_condition_list:
                     # & the first priority
-                    first_condition_list = second_condition.split('&')
-
-                    if '' in first_condition_list:
-                        first_condition_list.remove('')
+                    first_condition_list = [first_condition for first_condition in second_condition.split('&') if first_condition]
 
                     if len(first_condition_list) == 1:
                         first_link_node = first_condition_list[0]
                     elif len(first_condition_list) > 1:
-                        dot.node(str(link_node), '&', **{'width': '0.15', 'height': '0.15'})
-                        flow_chart_dic.setdefault(str(link_node), [])
                         first_link_node = str(link_node)
+                        link_label_dic[first_link_node] = '&'
+                        flow_chart_dic.setdefault(first_link_node, [])
 
                         for first_item in first_condition_list:
-                            dot.edge(first_item, str(link_node))
-                            flow_chart_dic[first_item].append(str(link_node))
+                            flow_chart_dic.setdefault(first_item, []).append(first_link_node)
                     else:
                         continue
 
@@ -3006,13 +3418,12 @@ class WindowForDependency(QMainWindow):
                 if len(first_link_list) == 1:
                     second_link_node = first_link_list[0]
                 elif len(first_link_list) > 1:
-                    dot.node(str(link_node), '|', **{'width': '0.15', 'height': '0.15'})
-                    flow_chart_dic.setdefault(str(link_node), [])
                     second_link_node = str(link_node)
+                    link_label_dic[second_link_node] = '|'
+                    flow_chart_dic.setdefault(second_link_node, [])
 
                     for second_item in first_link_list:
-                        dot.edge(second_item, str(link_node))
-                        flow_chart_dic[second_item].append(str(link_node))
+                        flow_chart_dic.setdefault(second_item, []).append(second_link_node)
                 else:
                     continue
 
@@ -3020,123 +3431,58 @@ class WindowForDependency(QMainWindow):
                 second_link_list.append(second_link_node)
 
             for third_link_node in second_link_list:
-                dot.edge(third_link_node, node)
-                flow_chart_dic.setdefault(third_link_node, [])
-                flow_chart_dic[third_link_node].append(node)
+                flow_chart_dic.setdefault(third_link_node, []).append(node)
+
+        return flow_chart_dic, link_label_dic
 
-        dot.graph_attr['size'] = '10, 10'
-        dot.render(os.path.join(self.picture_dir, 'full_dependency'), format='png')
-        dot.graph_attr['size'] = '%s, %s' % (str(width), str(height))
-        dot.render(os.path.join(self.picture_dir, 'dependency'), format='png')
+    def gen_dependency_chart(self):
+        """
+        Edits in a burst are drawn once (after chart_timer timeout).
+        """
+        self.chart_timer.start()
 
-        self.gen_chart_frame(image_path=os.path.join(self.picture_dir, r'dependency.png'), full_image_path=os.path.join(self.picture_dir, 'full_dependency.png'))
+    def draw_dependency_chart(self):
+        dependency_dic = {**self.default_dependency_dic, **self.current_dependency_priority_dic}
+        (flow_chart_dic, link_label_dic) = self.get_dependency_graph(dependency_dic)
+        (position_dic, bend_dic, width, height) = self.chart_layout.layout(flow_chart_dic)
+        self.current_chart.draw(flow_chart_dic, link_label_dic, position_dic, bend_dic)
 
-    def check_dependency_setting(self, dependency_dic: Dict[str, str] = None):
+    def check_dependency_setting(self, dependency_dic: Dict[str, str] = None, modify_item: str = None):
         """
         check dependency setting correctness
         including:
-        1. loop -> dfs chart check
+        1. loop -> strongly connected components (all loops), or only loop through modify_item if only its condition is changed
         2. the same condition (,, &, |)
         """
         if not dependency_dic:
             return True
 
-        check_status = True
-        node_list = list(dependency_dic.keys())
-        flow_chart_dic = {}
-
-        # basic element
-        for node in node_list:
-            if not re.match(r'^\s+$', node):
-                flow_chart_dic.setdefault(node, [])
-
-        # num
-        link_node = 0
-
-        # dependencies
-        for node in dependency_dic:
-            condition = dependency_dic[node]
-
-            if not condition:
-                continue
-
-            # ^ the third priority
-            third_condition_list = condition.split(',')
-            check_status = self.check_same_condition(third_condition_list)
-
-            if not check_status:
-                return check_status
-
-            if '' in third_condition_list:
-                third_condition_list.remove('')
-
-            second_link_list = []
-
-            for third_condition in third_condition_list:
-                # | the second priority
-                second_condition_list = third_condition.split('|')
-                check_status = self.check_same_condition(third_condition_list)
-
-                if not check_status:
-                    return check_status
-
-                if '' in second_condition_list:
-                    second_condition_list.remove('')
-
-                first_link_list = []
-
-                for second_condition in second_condition_list:
-                    # & the first priority
-                    first_condition_list = second_condition.split('&')
-                    check_status = self.check_same_condition(third_condition_list)
-
-                    if not check_status:
-                        return check_status
-
-                    if '' in first_condition_list:
-                        first_condition_list.remove('')
-
-                    if len(first_condition_list) == 1:
-                        first_link_node = first_condition_list[0]
-                    elif len(first_condition_list) > 1:
-                        flow_chart_dic.setdefault(str(link_node), [])
-                        first_link_node = str(link_node)
-
-                        for first_item in first_condition_list:
-                            flow_chart_dic[first_item].append(str(link_node))
-                    else:
-                        continue
-
-                    link_node += 1
-                    first_link_list.append(first_link_node)
-
-                if len(first_link_list) == 1:
-                    second_link_node = first_link_list[0]
-                elif len(first_link_list) > 1:
-                    flow_chart_dic.setdefault(str(link_node), [])
-                    second_link_node = str(link_node)
+        check_item_list = [modify_item] if modify_item else list(dependency_dic.keys())
 
-                    for second_item in first_link_list:
-                        flow_chart_dic[second_item].append(str(link_node))
-                else:
-                    continue
+        for node in check_item_list:
+            if dependency_dic.get(node) and (not self.check_same_condition(dependency_dic[node].split(','))):
+                return False
 
-                link_node += 1
-                second_link_list.append(second_link_node)
+        (flow_chart_dic, link_label_dic) = self.get_dependency_graph(dependency_dic)
 
-            for third_link_node in second_link_list:
-                flow_chart_dic[third_link_node].append(node)
+        # Other conditions are not changed, so a new loop must go through modify_item.
+        if modify_item:
+            loop = common_graph.find_path(flow_chart_dic, modify_item, modify_item)
+            loop_list = [loop] if loop else []
+        else:
+            loop_list = common_graph.find_loops(flow_chart_dic)
 
-        self.vis = []
-        self.trace = []
+        if loop_list:
+            title = 'Warning'
+            info = 'Dependencies contains a loop!'
 
-        for node in flow_chart_dic.keys():
-            check_status = self.dfs_check_loop(node, flow_chart_dic)
+            for loop in loop_list:
+                info += '\n' + ' -> '.join([node for node in loop if node not in link_label_dic])
 
-            if not check_status:
-                return check_status
+            common_pyqt5.Dialog(title, info)
+            return False
 
-        return check_status
+        return True
 
     @staticmethod
     def check_same_condition(check_list):
@@ -3386,7 +3732,7 @@ class WindowForDependency(QMainWindow):
         new_repeat_condition_list = [repeat_condition_list[i] if i != item_num else new_repeat_condition for i in range(len(repeat_condition_list))]
 
         new_dependency_dic = {**self.default_dependency_dic, **self.current_dependency_priority_dic, item_name: ','.join(new_repeat_condition_list)}
-        check_status = self.check_dependency_setting(new_dependency_dic)
+        check_status = self.check_dependency_setting(new_dependency_dic, modify_item=item_name)
 
         if check_status:
             self.current_dependency_priority_dic[item_name] = ','.join(new_repeat_condition_list)
@@ -3479,29 +3825,6 @@ class WindowForDependency(QMainWindow):
                 self.save_button.setEnabled(True)
                 self.update.emit(True, 'Order')
 
-    def dfs_check_loop(self, node, flow_chart_dic):
-        check_status = True
-
-        if node in self.vis:
-            if node in self.trace:
-                title = 'Warning'
-                info = 'Dependencies contains a loop!'
-                common_pyqt5.Dialog(title, info)
-                return False
-
-        self.vis.append(node)
-        self.trace.append(node)
-
-        for vs in flow_chart_dic[node]:
-            check_status = self.dfs_check_loop(vs, flow_chart_dic)
-
-            if not check_status:
-                return check_status
-
-        self.trace.pop()
-
-        return check_status
-
     def save(self):
         self.post_dependency_check()
         self.message.emit(self.update_flag, self.dependency_priority_dic)
@@ -3516,11 +3839,7 @@ class WindowForDependency(QMainWindow):
             self.update.emit(False, 'Order')
 
     def closeEvent(self, event):
-        if not hasattr(self, 'picture_dir'):
-            return
-
-        if os.path.exists(self.picture_dir):
-            shutil.rmtree(self.picture_dir)
+        self.chart_timer.stop()
 
     @staticmethod
     def get_screen_resolutions():
@@ -5277,12 +5596,7 @@ class WindowForGlobalTaskInfo(QMainWindow):
         self.title = '{}  (Read Only)'.format(self.title) if self.read_only else '{}'.format(self.title)
         self.setWindowTitle(self.title)
 
-        self.cache_path = self.user_config_obj.info_cache_path.format_map({'BLOCK': self.task_obj.block,
-                                                                           'VERSION': self.task_obj.version,
-                                                                           'FLOW': self.task_obj.flow,
-                                                                           'TASK': self.task_obj.task})
         self.cache = self._load_cache()
-        self._load_cache()
 
         self.top_widget = QTabWidget()
         self.setCentralWidget(self.top_widget)
@@ -5298,17 +5612,11 @@ class WindowForGlobalTaskInfo(QMainWindow):
         center(self)
 
     def _load_cache(self) -> TaskCache:
-        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        task_dic = self.user_config_obj.task_cache_store.get(self.task_obj.block, self.task_obj.version, self.task_obj.flow, self.task_obj.task)
 
-        if not os.path.exists(self.cache_path):
+        if not task_dic:
             cache = TaskCache()
         else:
-            try:
-                with open(self.cache_path, 'r') as cf:
-                    task_dic = json.load(cf)
-            except Exception:
-                task_dic = {}
-
             cache = TaskCache(run=TaskRunCache(**(task_dic.get('run', {}))),
                               log=TaskLogCache(**(task_dic.get('log', {}))),
                               block=task_dic.get('block'),
@@ -5328,8 +5636,8 @@ class WindowForGlobalTaskInfo(QMainWindow):
                                log=self.detailed_log_window.export_cache(),
                                )
 
-        with open(self.cache_path, 'w') as cf:
-            cf.write(json.dumps(asdict(task_cache)))
+        # Written by TaskCacheStore writer thread.
+        self.user_config_obj.task_cache_store.update(self.task_obj.block, self.task_obj.version, self.task_obj.flow, self.task_obj.task, asdict(task_cache))
 
     def init_ui(self):
         # Detailed Task Info
@@ -5462,6 +5770,8 @@ class WindowForTaskJobInfo(QMainWindow):
         self.refresh_thread = None
         self.job_id = None
         self.job_type = None
+        self.job_status = None
+        self.job_info = None
         self.job_check_thread = None
 
         # GUI
@@ -5672,37 +5982,9 @@ class WindowForTaskJobInfo(QMainWindow):
                 self.timer.stop()
 
     def _get_history_job_id(self) -> Tuple[bool, str]:
-        job_id = ''
-        find = False
+        job_id = self.user_obj.history_store.get_last_job_id(self.task_obj.block, self.task_obj.version, self.task_obj.flow, self.task_obj.task)
 
-        try:
-            if os.path.exists(self.user_obj.history_cache_path):
-                df = self.tail_csv_with_headers(filename=self.user_obj.history_cache_path)
-                filtered_df = df[(df['block'] == self.task_obj.block) &
-                                 (df['version'] == self.task_obj.version) &
-                                 (df['flow'] == self.task_obj.flow) &
-                                 (df['task'] == self.task_obj.task)]
-
-                if not filtered_df.empty:
-                    max_index = filtered_df['timestamp'].idxmax()
-                    job_id = filtered_df.loc[max_index, 'job_id']
-
-                    if job_id:
-                        find = True
-        except Exception:
-            return False, ''
-
-        return bool(find), str(job_id)
-
-    @staticmethod
-    def tail_csv_with_headers(filename: str, n: int = 1000) -> pd.DataFrame:
-        with open(filename, 'r') as file:
-            headers = next(file).strip().split(',')
-
-        with open(filename, 'r') as file:
-            last_lines = deque(file, n + 1)
-
-        return pd.read_csv(io.StringIO(''.join(last_lines)), header=None, skiprows=1, names=headers)
+        return bool(job_id), str(job_id)
 
     def _load_cache(self):
         find, job_id = self._get_history_job_id()
@@ -5711,9 +5993,7 @@ class WindowForTaskJobInfo(QMainWindow):
             check, job_dic = TaskJobCheckWorker.check_job_id(job_id=f'b:{job_id}')
 
             if check:
-                self.refresh_thread = TaskJobCheckWorker(**job_dic)
-                self.refresh_thread.job_dic.connect(self._update_gui)
-                self.refresh_thread.start()
+                self._start_refresh_thread(job_dic)
                 return
 
     def export_cache(self) -> TaskRunCache:
@@ -5738,6 +6018,10 @@ class WindowForTaskJobInfo(QMainWindow):
                             )
 
     def refresh(self):
+        # Last refresh is not finished yet.
+        if isinstance(self.refresh_thread, TaskJobCheckWorker) and self.refresh_thread.isRunning():
+            return
+
         job_id = str(self.task_obj.action_progress[common.action.run].job_id) if self.task_obj.action_progress[common.action.run].job_id else str(self.task_obj.job_id)
         check, job_dic = TaskJobCheckWorker.check_job_id(job_id=job_id)
         self.job_msg_line.setText(str('\n'.join(self.task_obj.action_progress[common.action.run].progress_message)))
@@ -5745,11 +6029,34 @@ class WindowForTaskJobInfo(QMainWindow):
         if not check:
             self._load_cache()
         else:
-            self.refresh_thread = TaskJobCheckWorker(**job_dic)
-            self.refresh_thread.job_dic.connect(self._update_gui)
-            self.refresh_thread.start()
+            self._start_refresh_thread(job_dic)
+
+    def _start_refresh_thread(self, job_dic: Dict[str, str]):
+        """
+        Check job status with TaskJobCheckWorker, detailed job info is only got for a new job or a changed status.
+        """
+        if (job_dic['job_id'] != self.job_id) or (job_dic['job_type'] != self.job_type):
+            self.job_id = job_dic['job_id']
+            self.job_type = job_dic['job_type']
+            self.job_status = None
+
+        self.refresh_thread = TaskJobCheckWorker(job_status=self.job_status, **job_dic)
+        self.refresh_thread.job_status_dic.connect(self._update_job_status)
+        self.refresh_thread.job_dic.connect(self._update_gui)
+        self.refresh_thread.start()
+
+    def _update_job_status(self, job_status_dic: Dict[str, str]):
+        job_status = list(job_status_dic.values())[0] if job_status_dic else ''
+
+        # Status is not changed (no detailed job info), only run time of unfinished job is updated.
+        if (job_status == self.job_status) and self.job_info and (not self.job_info.finish_time):
+            self.job_info.update_run_time()
+            self.job_run_time_line.setText(self.job_info.run_time)
+
+        self.job_status = job_status
 
     def _update_gui(self, job_info: TaskJobInfo):
+        self.job_info = job_info
         self.job_id_line.setText(job_info.id)
         # self.job_exit_code_line.setText(job_info.exit_code)
 
@@ -5827,7 +6134,7 @@ class WindowForTaskLogInfo(QMainWindow):
         self.jump_to_line_button = QPushButton('Go to Line')
         self.jump_to_line_button.clicked.connect(self._jump_to_line)
 
-        self.file_editor = CodeEditor()
+        self.file_editor = LogViewer()
 
         self.gvim_button = QPushButton('Gvim')
         self.gvim_button.setIcon(QIcon(str(os.environ['IFP_INSTALL_PATH']) + '/data/pictures/logo/gvim.png'))
@@ -5837,6 +6144,9 @@ class WindowForTaskLogInfo(QMainWindow):
         self.refresh_button = QPushButton('Refresh')
         self.refresh_button.clicked.connect(self._load_file)
 
+        self.follow_button = ToggleButton('Follow')
+        self.follow_button.clicked.connect(self._follow_file)
+
         self._load_cache()
         self.init_ui()
 
@@ -5924,6 +6234,7 @@ class WindowForTaskLogInfo(QMainWindow):
         self.main_layout.addWidget(self.jump_to_line_line, 3, 1)
         # self.main_layout.addWidget(self.jump_to_line_button, 3, 2, 1, 7)
         self.main_layout.addWidget(self.jump_to_line_button, 3, 2)
+        self.main_layout.addWidget(self.follow_button, 3, 7)
         self.main_layout.addWidget(self.refresh_button, 3, 8)
         self.main_layout.addWidget(self.file_editor, 4, 0, 50, 9)
 
@@ -5953,12 +6264,17 @@ class WindowForTaskLogInfo(QMainWindow):
     def _load_file(self):
         log_file = self.log_path_line.text().strip()
 
-        # For Test
         if os.path.exists(log_file):
+            # Keep view position when reloading the same file.
+            keep_position = (log_file == self.file_path) and (self.file_editor.log_file is not None)
             self.file_path = log_file
+            self.file_editor.load_file(self.file_path, keep_position=keep_position)
+
+    def _follow_file(self):
+        if not self._get_log_file():
+            return
 
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                self.file_editor.setPlainText(file.read())
+        self.file_editor.set_follow(self.follow_button.is_toggled)
 
     def _search_file(self):
         search_word = self.search_line.text().strip()
@@ -5966,20 +6282,26 @@ class WindowForTaskLogInfo(QMainWindow):
         if not search_word:
             return
 
+        log_file = self._get_log_file()
+
+        if not log_file:
+            return
+
         case_sensitive = self.search_case_button.is_toggled
         use_regex = self.search_regex_button.is_toggled
-        search_num = os.popen('grep {} {} | wc -l'.format(search_word, self.file_path)).read().strip()
         self.file_editor.set_search_term(search_word, case_sensitive=case_sensitive, use_regex=use_regex)
-        self.file_editor.searchText(search_word, case_sensitive=case_sensitive, use_regex=use_regex, backward=False)
-        self.search_num.setText(str(search_num))
 
-        self._load_file()
+        # Count matched lines and record match offsets, UP/DOWN jump with the offsets.
+        (count_dic, search_offset_list) = log_file.scan([('search', common_log.get_pattern_bytes(search_word, use_regex=use_regex), case_sensitive)], record_key='search')
+        self.file_editor.set_search_offsets(search_offset_list)
+        self.file_editor.search_text(search_word, case_sensitive=case_sensitive, use_regex=use_regex, backward=False)
+        self.search_num.setText(str(count_dic['search']))
 
     def _search_and_jump_file(self, backward: bool = False):
         search_word = self.search_line.text().strip()
         case_sensitive = self.search_case_button.is_toggled
         use_regex = self.search_regex_button.is_toggled
-        self.file_editor.searchText(search_word, case_sensitive=case_sensitive, use_regex=use_regex, backward=backward)
+        self.file_editor.search_text(search_word, case_sensitive=case_sensitive, use_regex=use_regex, backward=backward)
 
     def _jump_to_line(self):
         try:
@@ -5988,21 +6310,40 @@ class WindowForTaskLogInfo(QMainWindow):
             line_num = 0
             print(f'Please input a number. Error: {str(error)}')
 
-        self.file_editor.jumpToLogicLine(line_num)
+        self.file_editor.jump_to_line(line_num)
 
     def _check_error_and_warning(self):
-        if not os.path.exists(self.file_path):
+        log_file = self._get_log_file()
+
+        if not log_file:
             return
 
         error_name = self.error_type_line.text().strip()
         warn_name = self.warn_type_line.text().strip()
+        pattern_list = []
+
+        if error_name:
+            pattern_list.append(('error', common_log.get_pattern_bytes(error_name), True))
+
+        if warn_name:
+            pattern_list.append(('warning', common_log.get_pattern_bytes(warn_name), True))
 
-        error_result = os.popen('grep {} {} | wc -l'.format(error_name, self.file_path)).read().strip()
-        warn_result = os.popen('grep {} {} | wc -l'.format(warn_name, self.file_path)).read().strip()
-        self.error_num_line.setText(error_result)
-        self.warning_num_line.setText(warn_result)
+        # Count error/warning lines with one pass on log file.
+        (count_dic, search_offset_list) = log_file.scan(pattern_list)
+        self.error_num_line.setText(str(count_dic.get('error', 0)))
+        self.warning_num_line.setText(str(count_dic.get('warning', 0)))
 
-        self._load_file()
+    def _get_log_file(self):
+        """
+        Get common_log.LogFile of current log, load it if it is not shown.
+        """
+        if not os.path.exists(self.file_path):
+            return None
+
+        if (not self.file_editor.log_file) or (self.file_editor.log_file.file_path != self.file_path):
+            self.file_editor.load_file(self.file_path)
+
+        return self.file_editor.log_file
 
     def _gvim_file(self):
         if not os.path.exists(self.file_path):
@@ -6014,6 +6355,10 @@ class WindowForTaskLogInfo(QMainWindow):
         self.gvim_thread = TaskLogViewer(file_path=self.file_path)
         self.gvim_thread.run()
 
+    def closeEvent(self, event):
+        self.file_editor.close_file()
+        super().closeEvent(event)
+
 
 class QComboBox2(QComboBox):
     def wheelEvent(self, QWheelEvent):
@@ -6174,189 +6519,361 @@ class CustomDelegate2(QStyledItemDelegate):
             model.setData(index, default_value, Qt.EditRole)
 
 
-class LineNumberArea(QWidget):
-    def __init__(self, editor):
-        super().__init__(editor)
-        self.codeEditor = editor
-
-    def sizeHint(self):
-        return QSize(self.editor.lineNumberAreaWidth(), 0)
-
-    def paintEvent(self, event):
-        self.codeEditor.lineNumberAreaPaintEvent(event)
-
-
-class CodeEditor(QPlainTextEdit):
+class LogViewer(QAbstractScrollArea):
+    """
+    Paged log viewer backed by common_log.LogFile.
+    Only visible lines are read and painted, so big log files are opened in constant time.
+    """
     def __init__(self):
         super().__init__()
-        self.lineNumberArea = LineNumberArea(self)
-        self.document().contentsChanged.connect(self.updateLogicLineStarts)
-        self.logicLineStarts = []
+        self.log_file = None
+        self.current_line_num = -1
+        self.pending_line_num = None
+        self.max_line_length = 10000
+        self.max_text_width = 0
+
+        # Search settings, self.match_range is (line_num, start_column, end_column) of current match.
         self.search_term = ''
         self.case_sensitive = False
         self.use_regex = False
-        self.document().contentsChanged.connect(self.updateTextCache)
-        self.text_cache = self.toPlainText()
+        self.search_pattern = None
+        self.search_offset_list = None
+        self.match_range = None
+        self.match_offset = None
 
-        self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
-        self.updateRequest.connect(self.updateLineNumberArea)
-        self.cursorPositionChanged.connect(self.highlightCurrentLine)
-        self.cursorPositionChanged.connect(self.search)
-        self.updateLineNumberAreaWidth(0)
+        font = QFont('Monospace', 10)
+        font.setStyleHint(QFont.TypeWriter)
+        self.setFont(font)
+        self.viewport().setFont(font)
+        self.setFocusPolicy(Qt.StrongFocus)
 
-    def updateTextCache(self):
-        self.text_cache = self.toPlainText()
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
 
-    def lineNumberAreaWidth(self):
-        digits = len(str(self.blockCount()))
-        return 10 + self.fontMetrics().width('9') * digits
+        # Refresh scroll range when line index is growing on background.
+        self.index_timer = QTimer(self)
+        self.index_timer.timeout.connect(self.update_scroll_range)
 
-    def updateLineNumberAreaWidth(self, _):
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        # File change is notified by QFileSystemWatcher (inotify), stat polling is for NFS.
+        # Truncation/rotation is always checked while a log is open, appended data is only shown on follow mode.
+        self.follow_flag = False
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.check_file_change)
+        self.file_check_timer = QTimer(self)
+        self.file_check_timer.timeout.connect(self.check_file_change)
 
-    def updateLineNumberArea(self, rect, dy):
-        if dy:
-            self.lineNumberArea.scroll(0, dy)
+    def load_file(self, file_path, keep_position=False):
+        top_line_num = self.verticalScrollBar().value()
+        current_line_num = self.current_line_num
+        self.close_file()
+
+        try:
+            self.log_file = common_log.LogFile(file_path)
+        except Exception as error:
+            common.print_warning('*Warning*: Failed on opening log file "' + str(file_path) + '": ' + str(error))
+            self.log_file = None
+
+        self.search_offset_list = None
+        self.match_range = None
+        self.match_offset = None
+        self.max_text_width = 0
+
+        if keep_position:
+            self.current_line_num = current_line_num
+            self.pending_line_num = top_line_num
         else:
-            self.lineNumberArea.update(0, rect.y(), self.lineNumberArea.width(), rect.height())
+            self.current_line_num = -1
+            self.pending_line_num = None
+            self.verticalScrollBar().setValue(0)
+
+        self.update_scroll_range()
+        self.index_timer.start(200)
+
+        if self.log_file:
+            self.file_watcher.addPath(self.log_file.file_path)
+            self.file_check_timer.start(1000)
+
+        if self.follow_flag:
+            self.set_follow(True)
+
+    def close_file(self):
+        self.index_timer.stop()
+        self.file_check_timer.stop()
 
-        if rect.contains(self.viewport().rect()):
-            self.updateLineNumberAreaWidth(0)
+        if self.file_watcher.files():
+            self.file_watcher.removePaths(self.file_watcher.files())
+
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+    def line_count(self):
+        return self.log_file.line_count if self.log_file else 0
+
+    def line_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visible_line_count(self):
+        return max(1, self.viewport().height() // self.line_height())
+
+    def gutter_width(self):
+        return 10 + self.fontMetrics().width('9') * len(str(max(1, self.line_count())))
+
+    def update_scroll_range(self):
+        line_count = self.line_count()
+        visible_line_count = self.visible_line_count()
+        self.verticalScrollBar().setRange(0, max(0, line_count - visible_line_count + 1))
+        self.verticalScrollBar().setPageStep(visible_line_count)
+        self.horizontalScrollBar().setRange(0, max(0, self.max_text_width - self.viewport().width() + self.gutter_width() + 20))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+        if (self.pending_line_num is not None) and (self.pending_line_num < line_count):
+            self.verticalScrollBar().setValue(self.pending_line_num)
+            self.pending_line_num = None
+
+        if self.follow_flag:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+
+        if (not self.log_file) or (self.log_file.index_finished and (self.pending_line_num is None)):
+            self.index_timer.stop()
+
+        self.viewport().update()
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        cr = self.contentsRect()
-        self.lineNumberArea.setGeometry(cr.left(), cr.top(), self.lineNumberAreaWidth(), cr.height())
-
-    def lineNumberAreaPaintEvent(self, event):
-        painter = QPainter(self.lineNumberArea)
-        painter.fillRect(event.rect(), Qt.lightGray)
-
-        block = self.firstVisibleBlock()
-        block_number = block.blockNumber()
-        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
-        bottom = top + self.blockBoundingRect(block).height()
-
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                painter.setPen(Qt.black)
-                painter.drawText(0, top, self.lineNumberArea.width(), self.fontMetrics().height(),
-                                 Qt.AlignRight, number)
-
-            block = block.next()
-            top = bottom
-            bottom = top + self.blockBoundingRect(block).height()
-            block_number += 1
-
-    def highlightCurrentLine(self):
-        extra_selections = []
-
-        if not self.isReadOnly():
-            selection = QTextEdit.ExtraSelection()
-            line_color = QColor(Qt.yellow).lighter(160)
-            selection.format.setBackground(line_color)
-            selection.format.setProperty(QTextFormat.FullWidthSelection, True)
-            selection.cursor = self.textCursor()
-            selection.cursor.clearSelection()
-            extra_selections.append(selection)
-
-        self.setExtraSelections(extra_selections)
+        self.update_scroll_range()
 
-    def set_search_term(self, pattern, case_sensitive=False, use_regex=False):
-        self.search_term = pattern
-        self.case_sensitive = case_sensitive
-        self.use_regex = use_regex
+    def set_follow(self, follow_flag):
+        """
+        Follow mode, show appended data and keep the view at file end.
+        """
+        self.follow_flag = follow_flag
+
+        if not self.log_file:
+            return
+
+        if follow_flag:
+            self.check_file_change()
+            self.update_scroll_range()
 
-    def search(self):
-        if not self.search_term:
+    def check_file_change(self, *args):
+        if not self.log_file:
             return
 
-        cursor = self.textCursor()
-        current_position = cursor.position()
-        start = max(0, current_position - 1024)
-        end = min(len(self.toPlainText()), current_position + 1024)
+        state = self.log_file.refresh() if self.follow_flag else self.log_file.check_reset()
+
+        if state:
+            self.update_file_state(state)
+
+    def update_file_state(self, state):
+        """
+        Update view after file is appended ('append') or re-opened ('reset').
+        """
+        # Recorded match offsets do not cover new data, search on file instead.
+        self.search_offset_list = None
+
+        if state == 'reset':
+            self.match_range = None
+            self.match_offset = None
+            self.max_text_width = 0
+
+        # Watch is removed after file is rotated.
+        if self.log_file.file_path not in self.file_watcher.files():
+            self.file_watcher.addPath(self.log_file.file_path)
 
-        text = self.text_cache[start:end]
-        flags = 0 if self.case_sensitive else re.IGNORECASE
+        self.update_scroll_range()
 
-        if self.use_regex:
-            matches = re.finditer(self.search_term, text, flags)
+        if not self.log_file.index_finished:
+            self.index_timer.start(200)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), Qt.white)
+
+        if not self.log_file:
+            return
+
+        # Log may be truncated by task rerun, do not paint lines with stale index.
+        state = self.log_file.check_reset()
+
+        if state:
+            self.update_file_state(state)
+            return
+
+        font_metrics = self.fontMetrics()
+        line_height = self.line_height()
+        gutter_width = self.gutter_width()
+        text_x = gutter_width + 4 - self.horizontalScrollBar().value()
+        top_line_num = self.verticalScrollBar().value()
+        width = self.viewport().width()
+
+        for (i, line) in enumerate(self.log_file.get_lines(top_line_num, self.visible_line_count() + 1, max_length=self.max_line_length)):
+            line_num = top_line_num + i
+            line = line.expandtabs(8)
+            y = i * line_height
+            self.max_text_width = max(self.max_text_width, font_metrics.width(line))
+
+            if line_num == self.current_line_num:
+                painter.fillRect(0, y, width, line_height, QColor(Qt.yellow).lighter(160))
+
+            # Highlight search matches on visible lines only.
+            if self.search_pattern and line:
+                for my_match in self.search_pattern.finditer(line):
+                    if my_match.end() == my_match.start():
+                        continue
+
+                    if self.match_range == (line_num, my_match.start(), my_match.end()):
+                        color = QColor(255, 165, 0)
+                    else:
+                        color = QColor('yellow')
+
+                    x = text_x + font_metrics.width(line[:my_match.start()])
+                    painter.fillRect(x, y, font_metrics.width(line[my_match.start():my_match.end()]), line_height, color)
+
+            painter.setPen(Qt.black)
+            painter.drawText(text_x, y + font_metrics.ascent(), line)
+
+        # Line number area.
+        painter.fillRect(0, 0, gutter_width, self.viewport().height(), Qt.lightGray)
+        painter.setPen(Qt.black)
+
+        for i in range(min(self.visible_line_count() + 1, self.line_count() - top_line_num)):
+            painter.drawText(0, i * line_height, gutter_width - 4, line_height, Qt.AlignRight, str(top_line_num + i + 1))
+
+    def mousePressEvent(self, event):
+        line_num = self.verticalScrollBar().value() + event.pos().y() // self.line_height()
+
+        if line_num < self.line_count():
+            self.current_line_num = line_num
+            self.viewport().update()
+
+        super().mousePressEvent(event)
+
+    def keyPressEvent(self, event):
+        if (event.key() == Qt.Key_C) and (event.modifiers() & Qt.ControlModifier):
+            if self.log_file and (self.current_line_num >= 0):
+                QApplication.clipboard().setText(self.log_file.get_line(self.current_line_num))
+        elif event.key() == Qt.Key_Home and (event.modifiers() & Qt.ControlModifier):
+            self.verticalScrollBar().setValue(0)
+        elif event.key() == Qt.Key_End and (event.modifiers() & Qt.ControlModifier):
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        elif event.key() in [Qt.Key_Up, Qt.Key_Down] and self.line_count():
+            step = -1 if event.key() == Qt.Key_Up else 1
+            self.scroll_to_line(max(0, min(self.line_count() - 1, self.current_line_num + step)), center=False)
         else:
-            pattern = re.escape(self.search_term)
-            matches = re.finditer(pattern, text, flags)
+            super().keyPressEvent(event)
 
-        self.clearHighlights()
+    def scroll_to_line(self, line_num, center=True):
+        """
+        Set current line (start from 0) and make it visible.
+        """
+        self.current_line_num = line_num
+        top_line_num = self.verticalScrollBar().value()
+        visible_line_count = self.visible_line_count()
 
-        for match in matches:
-            self.highlightText(start + match.start(), start + match.end())
+        if center:
+            self.verticalScrollBar().setValue(max(0, line_num - visible_line_count // 3))
+        elif line_num < top_line_num:
+            self.verticalScrollBar().setValue(line_num)
+        elif line_num >= top_line_num + visible_line_count:
+            self.verticalScrollBar().setValue(line_num - visible_line_count + 1)
 
-    def searchText(self, text, case_sensitive=False, use_regex=False, backward=False):
-        search_flag = QTextDocument.FindFlags()
+        self.viewport().update()
 
-        if backward:
-            search_flag |= QTextDocument.FindBackward
+    def jump_to_line(self, line_num):
+        """
+        Jump to line, line_num starts from 1.
+        """
+        if (line_num < 1) or (line_num > self.line_count()):
+            return
 
-        if case_sensitive:
-            search_flag |= QTextDocument.FindCaseSensitively
+        self.scroll_to_line(line_num - 1)
 
-        cursor = self.textCursor()
-        document = self.document()
+    def set_search_term(self, pattern, case_sensitive=False, use_regex=False):
+        self.search_term = pattern
+        self.case_sensitive = case_sensitive
+        self.use_regex = use_regex
+        self.search_pattern = None
+        self.search_offset_list = None
+        self.match_range = None
+        self.match_offset = None
 
-        if use_regex:
-            regex = QRegularExpression(text)
+        if pattern:
+            flags = 0 if case_sensitive else re.IGNORECASE
 
-            if case_sensitive:
-                regex.setPatternOptions(QRegularExpression.NoPatternOption)
-            else:
-                regex.setPatternOptions(QRegularExpression.CaseInsensitiveOption)
+            try:
+                self.search_pattern = re.compile(pattern if use_regex else re.escape(pattern), flags)
+            except re.error:
+                self.search_pattern = re.compile(re.escape(pattern), flags)
+
+        self.viewport().update()
+
+    def set_search_offsets(self, search_offset_list):
+        """
+        search_offset_list is (start_array, end_array) of all matches, from LogFile.scan.
+        """
+        self.search_offset_list = search_offset_list
+
+    def search_text(self, text, case_sensitive=False, use_regex=False, backward=False):
+        """
+        Jump to next/previous match from current match (or current line), wrap around at file end.
+        """
+        if not self.log_file or not text:
+            return False
 
-            found = cursor = document.find(regex, cursor, search_flag)
+        if (text != self.search_term) or (case_sensitive != self.case_sensitive) or (use_regex != self.use_regex):
+            self.set_search_term(text, case_sensitive=case_sensitive, use_regex=use_regex)
+
+        if self.match_offset:
+            offset = self.match_offset[0] if backward else self.match_offset[1]
+        else:
+            offset = self.log_file.get_line_offset(max(0, self.current_line_num))
+
+        if self.search_offset_list is not None:
+            found = self.find_in_search_offsets(offset, backward=backward)
         else:
-            found = self.find(text, search_flag)
+            pattern = re.compile(common_log.get_pattern_bytes(text, use_regex=use_regex), 0 if case_sensitive else re.IGNORECASE)
+            found = self.log_file.find(pattern, offset, backward=backward)
+
+            if not found:
+                found = self.log_file.find(pattern, self.log_file.size if backward else 0, backward=backward)
 
         if not found:
-            self.moveCursor(QTextCursor.End if backward else QTextCursor.Start)
+            return False
 
-            if use_regex:
-                regex = QRegularExpression(text)
-                found = document.find(regex, cursor, search_flag)
-            else:
-                found = self.find(text, search_flag)
+        self.match_offset = found
+        (line_num, start_column) = self.log_file.get_column(found[0])
+        (end_line_num, end_column) = self.log_file.get_column(found[1])
+
+        if end_line_num != line_num:
+            end_column = start_column
 
-        return found
+        self.match_range = (line_num, start_column, end_column)
+        self.scroll_to_line(line_num)
 
-    def highlightText(self, start_pos, end_pos):
-        cursor = self.textCursor()
-        cursor.setPosition(start_pos)
-        cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, end_pos - start_pos)
+        return True
 
-        highlight_format = QTextCharFormat()
-        highlight_format.setBackground(QColor("yellow"))
-        cursor.mergeCharFormat(highlight_format)
+    def find_in_search_offsets(self, offset, backward=False):
+        """
+        Get next/previous match with the recorded match offsets, file is not read again.
+        """
+        (start_array, end_array) = self.search_offset_list
 
-    def clearHighlights(self):
-        cursor = self.textCursor()
-        cursor.select(QTextCursor.Document)
-        cursor.setCharFormat(QTextCharFormat())
-        cursor.clearSelection()
+        if not start_array:
+            return None
 
-    def updateLogicLineStarts(self):
-        text = self.toPlainText()
-        self.logicLineStarts = [0]
+        if backward:
+            index = bisect.bisect_left(start_array, offset) - 1
 
-        for i, char in enumerate(text):
-            if char == '\n':
-                self.logicLineStarts.append(i + 1)
+            if index < 0:
+                index = len(start_array) - 1
+        else:
+            index = bisect.bisect_left(start_array, offset)
 
-    def jumpToLogicLine(self, lineNum):
-        if lineNum < 1 or lineNum > len(self.logicLineStarts):
-            return
+            if index >= len(start_array):
+                index = 0
 
-        start_pos = self.logicLineStarts[lineNum - 1]
-        cursor = self.textCursor()
-        cursor.setPosition(start_pos)
-        self.setTextCursor(cursor)
+        return start_array[index], end_array[index]
 
 
 class ToggleButton(QPushButton):
@@ -1,13 +1,17 @@
-import copy
+import asyncio
+import collections
 import datetime
+import hashlib
+import json
 import os
 import re
-import traceback
+from shlex import quote as shlex_quote
 from string import Template
 
 import psutil
 import signal
 import subprocess
+import sys
 import threading
 
 import yaml
@@ -338,11 +342,11 @@ def timer(func):
 
 def run_command(command, shell=True):
     """
-    Run shell command with subprocess.Popen.
+    Run shell command with the shared ProcessSupervisor, return (return_code, stdout, stderr).
     """
-    SP = subprocess.Popen(command, shell=shell, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    (stdout, stderr) = SP.communicate()
-    return_code = SP.returncode
+    process = get_process_supervisor().submit(command, shell=shell)
+    (stdout, stderr) = process.communicate()
+    return_code = process.returncode
     return (return_code, stdout, stderr)
 
 
@@ -375,12 +379,188 @@ def run_command_for_api(command, msg_signal, path, gating_flag=False):
             print_error(stderr)
 
 
+class SupervisedProcess:
+    """
+    Handle of one command which is running on ProcessSupervisor.
+    It supplies Popen-like pid/returncode/communicate(), stdout/stderr are collected by the supervisor event loop.
+    """
+    def __init__(self, command):
+        self.command = command
+        self.pid = None
+        self.returncode = None
+        self.first_line = b''
+        self.stdout_list = []
+        self.stderr_list = []
+        self.start_time = None
+        self.finish_time = None
+        self.started_event = threading.Event()
+        self.first_line_event = threading.Event()
+        self.finished_event = threading.Event()
+
+    def get_first_line(self, timeout=None):
+        """
+        Wait for the first stdout line (or EOF), just like "process.stdout.readline()".
+        """
+        self.first_line_event.wait(timeout)
+        return self.first_line
+
+    def get_jobid(self, timeout=None):
+        """
+        Get LSF jobid from the first stdout line, bsub prints "Job <29920> is submitted to ***" first.
+        """
+        return get_jobid(self.get_first_line(timeout).decode('utf-8', errors='replace'))
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        self.finished_event.wait(timeout)
+        return self.returncode
+
+    def communicate(self):
+        self.wait()
+        return (b''.join(self.stdout_list), b''.join(self.stderr_list))
+
+    def get_run_time(self):
+        """
+        Return process run time (seconds), it is used to measure per-action overhead.
+        """
+        if self.start_time is None:
+            return None
+
+        finish_time = self.finish_time if self.finish_time is not None else time.time()
+        return finish_time - self.start_time
+
+
+class ProcessSupervisor:
+    """
+    Start processes with asyncio.create_subprocess_exec on one event loop thread.
+    The stdout/stderr of all running processes are read by this loop with non-blocking reads, so callers do not need one reader thread per process.
+    """
+    def __init__(self, chunk_size=65536):
+        self.chunk_size = chunk_size
+        self.pid = os.getpid()
+        self.running_process_dic = {}
+        self.loop = asyncio.new_event_loop()
+        self.set_child_watcher()
+        self.thread = threading.Thread(target=self.run_loop, name='ProcessSupervisor', daemon=True)
+        self.thread.start()
+
+    def set_child_watcher(self):
+        """
+        Python < 3.12 waits every child with one ThreadedChildWatcher thread, use pidfd instead if the kernel supports it (Linux >= 5.3).
+        """
+        if sys.version_info >= (3, 12) or (not hasattr(asyncio, 'PidfdChildWatcher')):
+            return
+
+        try:
+            pidfd = os.pidfd_open(os.getpid())
+            os.close(pidfd)
+            watcher = asyncio.PidfdChildWatcher()
+            watcher.attach_loop(self.loop)
+            asyncio.get_event_loop_policy().set_child_watcher(watcher)
+        except Exception:
+            pass
+
+    def run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, command, shell=True):
+        """
+        Start command on the event loop, return a SupervisedProcess after the process is spawned.
+        """
+        process_obj = SupervisedProcess(command)
+        asyncio.run_coroutine_threadsafe(self.supervise(process_obj, shell), self.loop)
+        process_obj.started_event.wait()
+        return process_obj
+
+    async def supervise(self, process_obj, shell):
+        if shell:
+            if isinstance(process_obj.command, (list, tuple)):
+                args = ['/bin/sh', '-c', ' '.join([str(i) for i in process_obj.command])]
+            else:
+                args = ['/bin/sh', '-c', str(process_obj.command)]
+        elif isinstance(process_obj.command, (list, tuple)):
+            args = [str(i) for i in process_obj.command]
+        else:
+            args = [str(process_obj.command)]
+
+        try:
+            process = await asyncio.create_subprocess_exec(*args, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except Exception as error:
+            process_obj.returncode = 127
+            process_obj.stderr_list.append(str(error).encode('utf-8'))
+            process_obj.started_event.set()
+            process_obj.first_line_event.set()
+            process_obj.finished_event.set()
+            return
+
+        process_obj.pid = process.pid
+        process_obj.start_time = time.time()
+        self.running_process_dic[process.pid] = process_obj
+        process_obj.started_event.set()
+
+        try:
+            await asyncio.gather(self.read_stream(process.stdout, process_obj.stdout_list, process_obj),
+                                 self.read_stream(process.stderr, process_obj.stderr_list))
+            process_obj.returncode = await process.wait()
+        except Exception as error:
+            process_obj.stderr_list.append(str(error).encode('utf-8'))
+
+            if process_obj.returncode is None:
+                process_obj.returncode = process.returncode if process.returncode is not None else 1
+        finally:
+            process_obj.finish_time = time.time()
+            self.running_process_dic.pop(process.pid, None)
+            process_obj.first_line_event.set()
+            process_obj.finished_event.set()
+
+    async def read_stream(self, stream, chunk_list, process_obj=None):
+        while True:
+            chunk = await stream.read(self.chunk_size)
+
+            if not chunk:
+                break
+
+            chunk_list.append(chunk)
+
+            # Record the first stdout line, bsub prints jobid on it.
+            if process_obj and (not process_obj.first_line_event.is_set()) and (b'\n' in chunk):
+                data = b''.join(chunk_list)
+                process_obj.first_line = data[:data.index(b'\n') + 1]
+                process_obj.first_line_event.set()
+
+        if process_obj and (not process_obj.first_line_event.is_set()):
+            process_obj.first_line = b''.join(chunk_list)
+            process_obj.first_line_event.set()
+
+    def get_running_process_num(self):
+        return len(self.running_process_dic)
+
+
+PROCESS_SUPERVISOR = None
+PROCESS_SUPERVISOR_LOCK = threading.Lock()
+
+
+def get_process_supervisor():
+    """
+    Get the shared ProcessSupervisor, re-create it on forked child process (the event loop thread is not inherited).
+    """
+    global PROCESS_SUPERVISOR
+
+    with PROCESS_SUPERVISOR_LOCK:
+        if (PROCESS_SUPERVISOR is None) or (PROCESS_SUPERVISOR.pid != os.getpid()):
+            PROCESS_SUPERVISOR = ProcessSupervisor()
+
+    return PROCESS_SUPERVISOR
+
+
 def spawn_process(command, shell=True):
     """
-    Return the underlying Popen obj
+    Start command on the shared ProcessSupervisor and return the SupervisedProcess obj.
     """
-    SP = subprocess.Popen(command, shell=shell, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return SP
+    return get_process_supervisor().submit(command, shell=shell)
 
 
 def get_jobid(stdout):
@@ -647,57 +827,364 @@ class CreateAction(QThread):
         thread.start()
 
 
-def expand_var(setting_str, ifp_var_dic=None, show_warning=True, **kwargs):
+VAR_TEMPLATE_PATTERN = Template.pattern
+VAR_RESOLVER_DIC = {}
+VAR_RESOLVER_LOCK = threading.Lock()
+
+
+def compile_var_template(setting_str):
+    """
+    Compile 'setting_str' into literal/variable segments.
+    Return (segment_list, name_list, invalid_flag), segment is a literal string or a (name, raw_text) tuple.
+    """
+    segment_list = []
+    name_list = []
+    invalid_flag = False
+    position = 0
+
+    for my_match in VAR_TEMPLATE_PATTERN.finditer(setting_str):
+        if my_match.start() > position:
+            segment_list.append(setting_str[position:my_match.start()])
+
+        name = my_match.group('named') or my_match.group('braced')
+
+        if name is not None:
+            segment_list.append((name, my_match.group(0)))
+
+            if name not in name_list:
+                name_list.append(name)
+        elif my_match.group('escaped') is not None:
+            segment_list.append('$')
+        else:
+            segment_list.append(my_match.group(0))
+            invalid_flag = True
+
+        position = my_match.end()
+
+    if position < len(setting_str):
+        segment_list.append(setting_str[position:])
+
+    return (segment_list, name_list, invalid_flag)
+
+
+class VarScope:
     """
-    Expand variable settings on 'setting_str'.
-    """
-    common_var = {'CWD': CWD,
-                  'USER': USER}
-    settings = []
-    new_settings = []
-
-    if type(setting_str) is str:
-        settings = [setting_str]
-    elif type(setting_str) is list:
-        settings = setting_str
-
-    for setting_str2 in settings:
-        if type(setting_str2) is str:
-            # Merge IFP_INSTALL_PATH/CWD and **kwargs into var_dic.
-            var_dic = copy.deepcopy(ifp_var_dic)
-            var_dic.update(**kwargs)
-            var_dic.update(common_var)
-
-            if setting_str2.find('$') >= 0:
-                while setting_str2.find('$') >= 0:
-                    # Replace variables with var_dic on setting_str.
-                    try:
-                        tpl = Template(setting_str2)
-                        setting_str2 = tpl.substitute(var_dic)
-                    except Exception as warning:
-                        traceback.format_exc()
-                        if show_warning:
-                            print_warning('*Warning*: Failed on expanding variable for "' + str(setting_str2) + '" : ' + str(warning))
-                        new_settings.append(setting_str2)
-                        break
+    Resolved variable table of one scope (global -> block -> version -> flow -> task).
+    Only the variables which depend on the scope settings are resolved again, others are read from the parent scope.
+    """
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.value_dic = {}
+        self.result_dic = {}
+
+    def get(self, name, default=None):
+        scope = self
+
+        while scope is not None:
+            if name in scope.value_dic:
+                return scope.value_dic[name]
+
+            scope = scope.parent
+
+        return default
+
+
+class VarResolver:
+    """
+    Expand variable settings with pre-resolved variable scopes.
+    Variable values are resolved topologically once per scope (cycles are detected up front), template strings are compiled once, expanded results are memoized per scope.
+    """
+    MISSING = object()
+    # Scopes (LRU) and memoized results per scope are capped, a new VarResolver is built when var_dic is modified.
+    MAX_SCOPE_NUM = 4096
+    MAX_RESULT_NUM = 4096
+
+    def __init__(self, var_dic, show_warning=True):
+        self.var_dic = var_dic
+        self.var_snapshot = dict(var_dic)
+        self.show_warning = show_warning
+        self.common_var = {'CWD': CWD,
+                           'USER': USER}
+        self.raw_dic = {**self.var_snapshot, **self.common_var}
+        self.template_dic = {}
+        self.dependent_dic = {}
+        self.cycle_set = set()
+        self.scope_dic = collections.OrderedDict()
+        self.scope_lock = threading.Lock()
+        self.global_scope = VarScope()
+        self.resolve_names(list(self.raw_dic.keys()), self.raw_dic, self.global_scope, record_dependent=True)
+
+        if self.cycle_set and self.show_warning:
+            print_warning('*Warning*: Found cyclic variable settings, they will not be expanded: ' + ', '.join(sorted(self.cycle_set)))
+
+    def is_valid(self, var_dic):
+        return (var_dic is self.var_dic) and (len(var_dic) == len(self.var_snapshot)) and (var_dic == self.var_snapshot)
+
+    def get_template(self, setting_str):
+        template = self.template_dic.get(setting_str)
+
+        if template is None:
+            template = compile_var_template(setting_str)
+            self.template_dic[setting_str] = template
+
+        return template
+
+    def get_name_list(self, raw_dic, name):
+        value = raw_dic.get(name)
+
+        if isinstance(value, str) and ('$' in value):
+            return self.get_template(value)[1]
+
+        return []
+
+    def resolve_names(self, name_list, raw_dic, scope, record_dependent=False):
+        """
+        Resolve variable values with iterative DFS (topological order), variables on a cycle keep raw value.
+        """
+        state_dic = {}
+
+        for root_name in name_list:
+            if (root_name in scope.value_dic) or (root_name not in raw_dic):
+                continue
+
+            state_dic[root_name] = 1
+            stack = [(root_name, iter(self.get_name_list(raw_dic, root_name)))]
+
+            while stack:
+                (name, ref_iter) = stack[-1]
+                descend_flag = False
+
+                for ref_name in ref_iter:
+                    if (ref_name not in raw_dic) or (ref_name in scope.value_dic):
+                        continue
+
+                    if state_dic.get(ref_name) == 1:
+                        # Cycle found, mark all variables on the cycle.
+                        for (stack_name, stack_iter) in reversed(stack):
+                            self.cycle_set.add(stack_name)
+
+                            if stack_name == ref_name:
+                                break
+
+                        continue
+
+                    if state_dic.get(ref_name) == 2:
+                        continue
+
+                    state_dic[ref_name] = 1
+                    stack.append((ref_name, iter(self.get_name_list(raw_dic, ref_name))))
+                    descend_flag = True
+                    break
+
+                if descend_flag:
+                    continue
+
+                stack.pop()
+                state_dic[name] = 2
+                value = raw_dic[name]
+
+                if (name not in self.cycle_set) and isinstance(value, str) and ('$' in value):
+                    (value, complete_flag) = self.substitute(value, scope)
+
+                scope.value_dic[name] = value
+
+                if record_dependent:
+                    for ref_name in self.get_name_list(raw_dic, name):
+                        self.dependent_dic.setdefault(ref_name, set()).add(name)
+
+    def get_dependent_names(self, name_list):
+        """
+        Get all variables which depend on 'name_list' (transitively).
+        """
+        dependent_set = set()
+        stack = list(name_list)
+
+        while stack:
+            name = stack.pop()
+
+            for dependent_name in self.dependent_dic.get(name, ()):
+                if dependent_name not in dependent_set:
+                    dependent_set.add(dependent_name)
+                    stack.append(dependent_name)
+
+        return dependent_set
+
+    def get_scope(self, scope_key):
+        if not scope_key:
+            return self.global_scope
+
+        with self.scope_lock:
+            scope = self.scope_dic.get(scope_key)
+
+            if scope is not None:
+                self.scope_dic.move_to_end(scope_key)
+                return scope
+
+        # common_var always overrides scope settings.
+        override_dic = {name: value for (name, value) in scope_key if name not in self.common_var}
+        scope = VarScope(parent=self.global_scope)
+        scope.value_dic.update(override_dic)
+
+        dependent_set = self.get_dependent_names(override_dic.keys()) - set(override_dic.keys())
+
+        if dependent_set:
+            # Resolve scope related variables, other variables are shared with global scope.
+            local_raw_dic = {name: self.raw_dic[name] for name in dependent_set}
+            local_scope = VarScope(parent=scope)
+            self.resolve_names(list(local_raw_dic.keys()), local_raw_dic, local_scope)
+            scope.value_dic.update(local_scope.value_dic)
+
+        with self.scope_lock:
+            self.scope_dic[scope_key] = scope
+
+            while len(self.scope_dic) > self.MAX_SCOPE_NUM:
+                self.scope_dic.popitem(last=False)
+
+        return scope
+
+    def substitute(self, setting_str, scope):
+        """
+        Replace variables once, unknown variables keep raw text.
+        Return (new_string, complete_flag).
+        """
+        (segment_list, name_list, invalid_flag) = self.get_template(setting_str)
+        complete_flag = not invalid_flag
+        string_list = []
+
+        for segment in segment_list:
+            if segment.__class__ is str:
+                string_list.append(segment)
+            else:
+                value = scope.get(segment[0], self.MISSING)
+
+                if (value is self.MISSING) or (segment[0] in self.cycle_set):
+                    string_list.append(segment[1])
+                    complete_flag = False
+                else:
+                    string_list.append(str(value))
+
+        return (''.join(string_list), complete_flag)
+
+    def expand_string(self, setting_str, scope):
+        """
+        Return (expanded_string, warning_message), the result is memoized on scope.
+        """
+        result = scope.result_dic.get(setting_str)
+
+        if result is not None:
+            return result
+
+        current_str = setting_str
+        warning_message = ''
+
+        # Loop for "$$" and variable values which contain "$".
+        for i in range(10):
+            if '$' not in current_str:
+                break
+
+            (new_str, complete_flag) = self.substitute(current_str, scope)
+
+            if not complete_flag:
+                unknown_list = [name for name in self.get_template(current_str)[1] if (scope.get(name, self.MISSING) is self.MISSING) or (name in self.cycle_set)]
+
+                if unknown_list:
+                    warning_message = 'Failed on expanding variable for "' + str(setting_str) + '" : ' + ', '.join(unknown_list)
+                else:
+                    warning_message = 'Failed on expanding variable for "' + str(setting_str) + '" : Invalid placeholder'
+
+                current_str = new_str
+                break
+
+            if new_str == current_str:
+                break
+
+            current_str = new_str
+
+        result = (current_str, warning_message)
+
+        if len(scope.result_dic) >= self.MAX_RESULT_NUM:
+            scope.result_dic.clear()
+
+        scope.result_dic[setting_str] = result
+
+        return result
+
+    def expand(self, setting_str, show_warning=True, **kwargs):
+        """
+        Same input/output as expand_var.
+        """
+        scope = self.get_scope(tuple(sorted(kwargs.items())) if kwargs else ())
+
+        if type(setting_str) is str:
+            (new_setting_str, warning_message) = self.expand_string(setting_str, scope)
+
+            if warning_message and show_warning:
+                print_warning('*Warning*: ' + warning_message)
+
+            return new_setting_str
+        elif type(setting_str) is list:
+            new_settings = []
+
+            for setting_str2 in setting_str:
+                if type(setting_str2) is str:
+                    (new_setting_str, warning_message) = self.expand_string(setting_str2, scope)
+
+                    if warning_message and show_warning:
+                        print_warning('*Warning*: ' + warning_message)
+
+                    new_settings.append(new_setting_str)
                 else:
                     new_settings.append(setting_str2)
-            else:
-                new_settings.append(setting_str2)
 
-        else:
-            new_settings.append(setting_str2)
+            return new_settings
 
-    if type(setting_str) is str:
-        return new_settings[-1]
-    elif type(setting_str) is list:
-        return new_settings
+    def get_global_values(self):
+        return self.global_scope.value_dic
 
 
-def get_env_dic(project=None, group=None):
-    env_dic = {}
-    env_file = ''
+def get_var_resolver(ifp_var_dic):
+    """
+    Get VarResolver for 'ifp_var_dic', it is re-built if 'ifp_var_dic' is modified.
+    """
+    if ifp_var_dic is None:
+        ifp_var_dic = {}
+
+    resolver = VAR_RESOLVER_DIC.get(id(ifp_var_dic))
+
+    if (resolver is not None) and resolver.is_valid(ifp_var_dic):
+        return resolver
+
+    with VAR_RESOLVER_LOCK:
+        resolver = VAR_RESOLVER_DIC.get(id(ifp_var_dic))
+
+        if (resolver is None) or (not resolver.is_valid(ifp_var_dic)):
+            # Only keep resolvers for live var_dic.
+            if len(VAR_RESOLVER_DIC) > 16:
+                VAR_RESOLVER_DIC.clear()
+
+            resolver = VarResolver(ifp_var_dic)
+            VAR_RESOLVER_DIC[id(ifp_var_dic)] = resolver
+
+    return resolver
+
+
+def expand_var(setting_str, ifp_var_dic=None, show_warning=True, **kwargs):
+    """
+    Expand variable settings on 'setting_str' (string or list of strings).
+    Unknown variables keep raw text and a warning is printed.
+    """
+    return get_var_resolver(ifp_var_dic).expand(setting_str, show_warning=show_warning, **kwargs)
 
+
+ENV_CACHE_VERSION = 1
+# Parent environment variables which are changed by shell itself, ignore them on env cache key.
+ENV_CACHE_IGNORE_LIST = ['_', 'SHLVL', 'OLDPWD']
+
+
+def get_env_file(project=None, group=None):
+    """
+    Get the env file for project/group, return '' if not found.
+    """
     group_project_seq_list = gen_group_project_seq_list(project, group)
 
     env_path = str(os.environ['IFP_INSTALL_PATH']) + '/config'
@@ -713,25 +1200,156 @@ def get_env_dic(project=None, group=None):
 
     env_file_list.append('env.sh')
 
+    env_file = ''
+
     for file in env_file_list:
         env_file = os.path.join(env_path, file)
 
         if os.path.exists(env_file):
-            break
+            return env_file
 
-    if os.path.exists(env_file):
+    return env_file
+
+
+def parse_env_output(stdout):
+    env_dic = {}
+    env_compile = re.compile(r'^(\S+?)=(.+)$')
+
+    for line in stdout.decode('utf-8', errors='replace').split('\n'):
+        my_match = env_compile.match(line)
+
+        if my_match:
+            if my_match.group(1).startswith('BASH_FUNC_'):
+                continue
+
+            env_dic.setdefault(my_match.group(1), my_match.group(2))
+
+    return env_dic
+
+
+def source_env_file(env_file):
+    """
+    Source env_file and get the environment.
+    For bash env file, all sourced files are traced with BASH_XTRACEFD.
+    Return (return_code, env_dic, sourced_file_list), sourced_file_list is None if tracing is not available.
+    """
+    if not env_file.endswith('.sh'):
         command = 'source ' + str(env_file) + '; env'
         (return_code, stdout, stderr) = run_command(command)
-        env_compile = re.compile(r'^(\S+?)=(.+)$')
 
-        for line in stdout.decode('utf-8').split('\n'):
-            if env_compile.match(line):
-                my_match = env_compile.match(line)
+        return return_code, parse_env_output(stdout), None
+
+    trace_file = os.path.join(get_user_cache_path(), 'ENV', 'trace.' + str(os.getpid()) + '.' + str(threading.get_ident()))
+    os.makedirs(os.path.dirname(trace_file), exist_ok=True)
+    script = 'exec 3>' + shlex_quote(trace_file) + '; BASH_XTRACEFD=3; PS4=\'+${BASH_SOURCE[0]}|\'; set -x; source ' + shlex_quote(env_file) + '; set +x; exec 3>&-; env'
+    (return_code, stdout, stderr) = run_command('/bin/bash -c ' + shlex_quote(script))
+    sourced_file_list = [os.path.abspath(env_file)]
 
-                if my_match.group(1).startswith('BASH_FUNC_'):
+    try:
+        with open(trace_file, 'r', errors='replace') as TF:
+            for line in TF:
+                if not line.startswith('+') or ('|' not in line):
                     continue
 
-                env_dic.setdefault(my_match.group(1), my_match.group(2))
+                file = line.lstrip('+').split('|', 1)[0]
+
+                if file and (file not in sourced_file_list) and os.path.isfile(file):
+                    sourced_file_list.append(file)
+    except Exception:
+        sourced_file_list = None
+    finally:
+        if os.path.exists(trace_file):
+            os.remove(trace_file)
+
+    return return_code, parse_env_output(stdout), sourced_file_list
+
+
+def get_file_hash(file):
+    with open(file, 'rb') as FF:
+        return hashlib.sha1(FF.read()).hexdigest()
+
+
+def get_parent_env_hash():
+    env_hash = hashlib.sha1()
+
+    for (key, value) in sorted(os.environ.items()):
+        if key not in ENV_CACHE_IGNORE_LIST:
+            env_hash.update((key + '=' + value + '\0').encode('utf-8', errors='replace'))
+
+    return env_hash.hexdigest()
+
+
+def get_env_cache_file(env_file):
+    cache_name = hashlib.sha1((os.path.abspath(env_file) + '\0' + str(os.environ.get('SHELL', ''))).encode('utf-8')).hexdigest()
+
+    return os.path.join(get_user_cache_path(), 'ENV', cache_name + '.json')
+
+
+def load_env_cache(env_file):
+    """
+    Return cached env_dic, or None if env file, any sourced file or parent environment is changed.
+    """
+    cache_file = get_env_cache_file(env_file)
+
+    if not os.path.exists(cache_file):
+        return None
+
+    try:
+        with open(cache_file, 'r') as CF:
+            cache_dic = json.load(CF)
+
+        if (cache_dic.get('version') != ENV_CACHE_VERSION) or (cache_dic.get('parent_env_hash') != get_parent_env_hash()):
+            return None
+
+        for (file, file_hash) in cache_dic['file_dic'].items():
+            if (not os.path.isfile(file)) or (get_file_hash(file) != file_hash):
+                return None
+
+        return cache_dic['env_dic']
+    except Exception:
+        return None
+
+
+def save_env_cache(env_file, env_dic, sourced_file_list, parent_env_hash):
+    cache_file = get_env_cache_file(env_file)
+
+    try:
+        cache_dic = {'version': ENV_CACHE_VERSION,
+                     'env_file': os.path.abspath(env_file),
+                     'parent_env_hash': parent_env_hash,
+                     'file_dic': {file: get_file_hash(file) for file in sourced_file_list},
+                     'env_dic': env_dic}
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + '.' + str(os.getpid()) + '.tmp'
+
+        with open(tmp_file, 'w') as CF:
+            json.dump(cache_dic, CF)
+
+        os.replace(tmp_file, cache_file)
+    except Exception as error:
+        print_warning('*Warning*: Failed on saving env cache "' + str(cache_file) + '": ' + str(error))
+
+
+def get_env_dic(project=None, group=None, use_cache=True):
+    """
+    Get environment after sourcing env file.
+    The result is cached under ~/.ifp/cache/ENV, it is re-sourced if env file, any file it sources, or parent environment is changed.
+    """
+    env_dic = {}
+    env_file = get_env_file(project, group)
+
+    if os.path.exists(env_file):
+        if use_cache:
+            env_dic = load_env_cache(env_file)
+
+            if env_dic is not None:
+                return env_dic
+
+        parent_env_hash = get_parent_env_hash()
+        (return_code, env_dic, sourced_file_list) = source_env_file(env_file)
+
+        if use_cache and (return_code == 0) and sourced_file_list:
+            save_env_cache(env_file, env_dic, sourced_file_list, parent_env_hash)
     else:
         common_pyqt5.Dialog('Env configuration warning', 'Not find any environment configuration file "' + str(env_file) + '".', icon=QMessageBox.Warning)
 
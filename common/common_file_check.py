@@ -1,6 +1,175 @@
 import os
 import re
 import sys
+import json
+import sqlite3
+import hashlib
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+# Size of file head (and of the block before resume offset) used to detect a rewritten (not appended) file.
+HEAD_HASH_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=None)
+def get_pattern(message):
+    """
+    Compiled message pattern, shared by all check items (and tasks) in the same process.
+    """
+    return re.compile(message)
+
+
+def load_checklist_rule(rule_file):
+    """
+    Load checklist rule set (generated by gen_checklist_scripts), {'flow': ..., 'vendor': ..., 'task': {task: [item_dic, ...]}}.
+    """
+    with open(rule_file, 'r') as RF:
+        return json.load(RF)
+
+
+def get_checklist_item_list(rule_dic, task, block='', corner=''):
+    """
+    Get check items of task for FileCheck.run_checklist, "<BLOCK>"/"<CORNER>" on file name are replaced.
+    """
+    item_list = []
+
+    for item_dic in rule_dic['task'].get(task, []):
+        file_list = [file.replace('<BLOCK>', str(block)).replace('<CORNER>', str(corner)) for file in item_dic['file_list']]
+        item_list.append(dict(item_dic, file_list=file_list))
+
+    return item_list
+
+
+def get_head_hash(file, size):
+    with open(file, 'rb') as FILE:
+        return hashlib.md5(FILE.read(min(size, HEAD_HASH_SIZE))).hexdigest()
+
+
+def get_block_hash(FILE, offset):
+    """
+    Hash of the block just before offset, a file rewritten in place (same inode and head) gets different bytes here.
+    """
+    start = max(0, offset - HEAD_HASH_SIZE)
+    FILE.seek(start)
+
+    return hashlib.md5(FILE.read(offset - start)).hexdigest()
+
+
+def get_file_stat(file_stat):
+    """
+    File stat saved with scan state, birth_time is None if it is not supported.
+    """
+    return {'inode': file_stat.st_ino, 'size': file_stat.st_size, 'mtime': file_stat.st_mtime, 'ctime': file_stat.st_ctime, 'birth_time': getattr(file_stat, 'st_birthtime', None)}
+
+
+def scan_file(file, message_list, waive_message_list=[], resume_dic=None):
+    """
+    Search message(s) on every line of file (first matched message of the line is counted, waived line is ignored).
+    It is a module level function, so it can be run on ProcessPoolExecutor workers.
+    resume_dic : Continue a former scan from its last complete line, so only the appended part is read.
+    Return {'missing': bool, 'error': str, 'line_list': [(line_num, line), ...], 'match_dic': {message: count}, 'stat': {...}, 'resume_dic': {...}}.
+    """
+    scan_dic = {'missing': False, 'error': '', 'line_list': [], 'match_dic': {message: 0 for message in message_list}, 'stat': {}, 'resume_dic': {}}
+
+    if not os.path.exists(file):
+        scan_dic['missing'] = True
+        return scan_dic
+
+    message_pattern_list = [(message, get_pattern(message)) for message in message_list]
+    waive_pattern_list = [get_pattern(waive_message) for waive_message in waive_message_list]
+    offset = 0
+    line_num = 0
+
+    if resume_dic:
+        offset = resume_dic['offset']
+        line_num = resume_dic['line_num']
+        scan_dic['line_list'] = [tuple(line_info) for line_info in resume_dic['line_list']]
+        scan_dic['match_dic'].update(resume_dic['match_dic'])
+
+    try:
+        with open(file, 'rb') as FILE:
+            file_stat = os.fstat(FILE.fileno())
+            scan_dic['stat'] = dict(get_file_stat(file_stat), head_hash=get_head_hash(file, file_stat.st_size))
+            FILE.seek(offset)
+            raw_line = b''
+            (decode_flag, match_message) = (False, None)
+
+            for raw_line in FILE:
+                (decode_flag, match_message) = (False, None)
+
+                try:
+                    line = str(raw_line, 'utf-8')
+                    line = line.strip()
+                except Exception as warning:
+                    print('*Warning*: Failed on reading line ' + str(line_num) + ': ' + str(warning))
+                    continue
+
+                decode_flag = True
+                line_num += 1
+
+                for (message, message_pattern) in message_pattern_list:
+                    if message_pattern.search(line):
+                        if not any(waive_pattern.search(line) for waive_pattern in waive_pattern_list):
+                            scan_dic['match_dic'][message] += 1
+                            scan_dic['line_list'].append((line_num, line))
+                            match_message = message
+
+                        break
+
+            # Resume from the last complete line next time, the last line may be still being written.
+            resume_dic = {'offset': FILE.tell(), 'line_num': line_num, 'line_count': len(scan_dic['line_list']), 'match_dic': dict(scan_dic['match_dic'])}
+
+            if raw_line and (not raw_line.endswith(b'\n')):
+                resume_dic['offset'] -= len(raw_line)
+
+                if decode_flag:
+                    resume_dic['line_num'] -= 1
+
+                if match_message is not None:
+                    resume_dic['line_count'] -= 1
+                    resume_dic['match_dic'][match_message] -= 1
+
+            resume_dic['block_hash'] = get_block_hash(FILE, resume_dic['offset'])
+    except Exception as error:
+        scan_dic['error'] = str(error)
+
+    if not scan_dic['error']:
+        scan_dic['resume_dic'] = resume_dic
+
+    return scan_dic
+
+
+def scan_file_unit(unit):
+    return scan_file(*unit)
+
+
+def write_result_db(db_file, row_list):
+    """
+    Save check results [(task, status, item, log_file), ...] into sqlite table "checklist" (indexed on task/status/item) for the checklist viewer.
+    Database is written into a temporary file then replaced, so the viewer never reads a partial database.
+    """
+    tmp_file = str(db_file) + '.' + str(os.getpid()) + '.tmp'
+
+    try:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+        connection = sqlite3.connect(tmp_file)
+
+        with connection:
+            connection.execute('CREATE TABLE checklist (id INTEGER PRIMARY KEY, task TEXT, status TEXT, item TEXT, log_file TEXT)')
+            connection.executemany('INSERT INTO checklist (task, status, item, log_file) VALUES (?, ?, ?, ?)', row_list)
+
+            for column in ['task', 'status', 'item']:
+                connection.execute('CREATE INDEX checklist_' + str(column) + '_index ON checklist (' + str(column) + ')')
+
+        connection.close()
+        os.replace(tmp_file, db_file)
+    except Exception as warning:
+        print('*Warning*: Failed on saving check result database "' + str(db_file) + '": ' + str(warning))
+        return False
+
+    return True
 
 
 class FileCheck():
@@ -13,9 +182,11 @@ class FileCheck():
     * reiew_file             : Reivew file, result is FAILED/REVIEW.
     """
 
-    def __init__(self, report_dir='', log_head='file_check'):
+    def __init__(self, report_dir='', log_head='file_check', incremental=True, task=''):
         self.report_dir = report_dir
         self.log_head = log_head
+        self.incremental = incremental
+        self.task = task
 
         # Set default check report_dir.
         if self.report_dir == '':
@@ -35,10 +206,115 @@ class FileCheck():
         if os.path.exists(self.report):
             os.remove(self.report)
 
+        # Check results database (written by run_checklist), it is read by view_checklist_report.
+        self.db_file = str(self.report_dir) + '/' + str(self.log_head) + '.db'
+
+        if os.path.exists(self.db_file):
+            os.remove(self.db_file)
+
+        self.result_row_list = []
+
         self.counter = 0
         self.final_return_code = 0
         self.check_result_list = []
 
+        # Report lines are buffered (and written once) by run_checklist.
+        self.report_line_list = None
+
+        # Scan state of checked files, it is out of report_dir because report_dir is removed before re-check.
+        self.state_file = str(self.report_dir).rstrip('/') + '.' + str(self.log_head) + '.state.json'
+        self.state_dic = {}
+        self.new_state_dic = {}
+
+        if self.incremental:
+            self.load_state()
+
+    def load_state(self):
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as SF:
+                    self.state_dic = json.load(SF)
+            except Exception as warning:
+                print('*Warning*: Failed on loading check state file "' + str(self.state_file) + '": ' + str(warning))
+                self.state_dic = {}
+
+    def save_state(self):
+        if not self.incremental:
+            return
+
+        try:
+            tmp_file = str(self.state_file) + '.' + str(os.getpid()) + '.tmp'
+
+            with open(tmp_file, 'w') as SF:
+                SF.write(json.dumps(self.new_state_dic))
+
+            os.replace(tmp_file, self.state_file)
+        except Exception as warning:
+            print('*Warning*: Failed on saving check state file "' + str(self.state_file) + '": ' + str(warning))
+
+    @staticmethod
+    def check_resume(file, state):
+        """
+        Check file is appended (not rewritten) since state is saved, with head hash and the hash of block before resume offset.
+        """
+        try:
+            with open(file, 'rb') as FILE:
+                return (get_head_hash(file, state['stat']['size']) == state['stat']['head_hash']) and (get_block_hash(FILE, state['resume_dic']['offset']) == state['resume_dic']['block_hash'])
+        except Exception:
+            return False
+
+    def scan_file_list(self, unit_list, max_workers=1, executor=None):
+        """
+        Scan [(file, message_list, waive_message_list), ...], return scan_dic list.
+        With saved state, unchanged file is not read, growing file is scanned from the last scanned line only.
+        executor : Shared ProcessPoolExecutor (for checking several tasks in one process).
+        """
+        scan_dic_list = [None] * len(unit_list)
+        key_list = []
+        todo_list = []
+
+        for (i, (file, message_list, waive_message_list)) in enumerate(unit_list):
+            key = json.dumps([os.path.abspath(file), message_list, waive_message_list])
+            key_list.append(key)
+            state = self.state_dic.get(key) if self.incremental else None
+            resume_dic = None
+
+            if state:
+                try:
+                    file_stat = os.stat(file)
+                except OSError:
+                    file_stat = None
+
+                # Same inode is not enough (rerun may rewrite log with O_TRUNC), birth time/head/block before resume offset are compared, otherwise scan whole file.
+                if file_stat and (file_stat.st_ino == state['stat']['inode']) and (getattr(file_stat, 'st_birthtime', None) == state['stat'].get('birth_time')):
+                    if (file_stat.st_size == state['stat']['size']) and (file_stat.st_mtime == state['stat']['mtime']) and (file_stat.st_ctime == state['stat'].get('ctime')):
+                        scan_dic_list[i] = state
+                        continue
+                    elif (file_stat.st_size >= state['stat']['size']) and state['resume_dic'] and state['resume_dic'].get('block_hash') and self.check_resume(file, state):
+                        resume_dic = dict(state['resume_dic'])
+                        resume_dic['line_list'] = state['line_list'][:resume_dic['line_count']]
+
+            todo_list.append((i, (file, message_list, waive_message_list, resume_dic)))
+
+        max_workers = min(max_workers, len(todo_list))
+
+        if executor and todo_list:
+            result_list = list(executor.map(scan_file_unit, [unit for (i, unit) in todo_list], chunksize=max(1, len(todo_list) // (max_workers * 4))))
+        elif max_workers > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                result_list = list(executor.map(scan_file_unit, [unit for (i, unit) in todo_list], chunksize=max(1, len(todo_list) // (max_workers * 4))))
+        else:
+            result_list = [scan_file_unit(unit) for (i, unit) in todo_list]
+
+        for ((i, unit), scan_dic) in zip(todo_list, result_list):
+            scan_dic_list[i] = scan_dic
+
+        for (key, scan_dic) in zip(key_list, scan_dic_list):
+            if scan_dic['stat'] and (not scan_dic['error']):
+                self.new_state_dic[key] = scan_dic
+
+        return scan_dic_list
+
     def get_log_file(self):
         """
         Specify an unique log file for every check item.
@@ -68,9 +344,15 @@ class FileCheck():
                 self.final_return_code += 1
 
             result_string = str(result_string) + '    (details please see ' + str(log_file) + ')'
+            self.result_row_list.append((self.task, result, description, log_file))
+        else:
+            self.result_row_list.append((self.task, result, description, ''))
 
-        with open(self.report, 'a') as REPORT:
-            REPORT.write(str(result_string) + '\n')
+        if self.report_line_list is not None:
+            self.report_line_list.append(str(result_string) + '\n')
+        else:
+            with open(self.report, 'a') as REPORT:
+                REPORT.write(str(result_string) + '\n')
 
     def save_result(self, description, file_list, result, message_list=[], waive_message_list=[]):
         """
@@ -120,7 +402,7 @@ class FileCheck():
 
         return (False, '')
 
-    def check_message(self, check_type, description, file_list, message_list, waive_message_list=[]):
+    def check_message(self, check_type, description, file_list, message_list, waive_message_list=[], scan_dic_list=None):
         """
         Check error/warning/expected messages with specified files.
         Type "error":
@@ -133,57 +415,44 @@ class FileCheck():
         Type "expected":
         Return "PASSED" if find all expected messages.
         Return "FAILED" if not find all expected messages.
+        scan_dic_list is the scan_file result of file_list if files are scanned already (run_checklist).
         """
         log_file = self.get_log_file()
         result = 'PASSED'
 
+        if scan_dic_list is None:
+            scan_dic_list = self.scan_file_list([(file, message_list, waive_message_list) for file in file_list])
+            self.save_state()
+
         with open(log_file, 'w') as LOG:
-            for file in file_list:
+            for (i, file) in enumerate(file_list):
                 LOG.write('>>> File : ' + str(file) + ' (check ' + str(check_type) + 'message)\n')
 
-                if not os.path.exists(file):
+                scan_dic = scan_dic_list[i]
+
+                if scan_dic['missing']:
                     LOG.write('    File "' + str(file) + '" is missing\n')
                     result = 'FAILED'
-                else:
-                    match_dic = {}
-
-                    for message in message_list:
-                        match_dic[message] = 0
-
-                    try:
-                        with open(file, 'rb') as FILE:
-                            line_num = 0
-
-                            for line in FILE.readlines():
-                                try:
-                                    line = str(line, 'utf-8')
-                                    line = line.strip()
-                                except Exception as warning:
-                                    print('*Warning*: Failed on reading line ' + str(line_num) + ': ' + str(warning))
-                                    continue
-
-                                line_num += 1
-                                (match, match_message) = self.search_message(line, message_list, waive_message_list)
-
-                                if match:
-                                    match_dic[match_message] += 1
-
-                                    LOG.write('    Line ' + str(line_num) + ' : ' + str(line) + '\n')
-
-                                    if check_type == 'error':
-                                        result = 'FAILED'
-                                    elif check_type == 'warning':
-                                        if result == 'PASSED':
-                                            result = 'REVIEW'
-                    except Exception as error:
-                        print('*Error*: Failed on opening file "' + str(file) + '" for read: ' + str(error))
-                        LOG.write('    *Error*: Failed on opening file "' + str(file) + '" for read: ' + str(error) + '\n')
+                    continue
+
+                for (line_num, line) in scan_dic['line_list']:
+                    LOG.write('    Line ' + str(line_num) + ' : ' + str(line) + '\n')
+
+                    if check_type == 'error':
                         result = 'FAILED'
+                    elif check_type == 'warning':
+                        if result == 'PASSED':
+                            result = 'REVIEW'
 
-                    if check_type == 'expected':
-                        for (key, value) in match_dic.items():
-                            if value == 0:
-                                result = 'FAILED'
+                if scan_dic['error']:
+                    print('*Error*: Failed on opening file "' + str(file) + '" for read: ' + str(scan_dic['error']))
+                    LOG.write('    *Error*: Failed on opening file "' + str(file) + '" for read: ' + str(scan_dic['error']) + '\n')
+                    result = 'FAILED'
+
+                if check_type == 'expected':
+                    for (key, value) in scan_dic['match_dic'].items():
+                        if value == 0:
+                            result = 'FAILED'
 
         self.write_report(description, log_file, result)
         self.save_result(description, file_list, result, message_list, waive_message_list)
@@ -230,3 +499,51 @@ class FileCheck():
         self.save_result(description, file_list, result)
 
         return (result)
+
+    def run_checklist(self, item_list, max_workers=None, executor=None):
+        """
+        Run all check items of a checklist.
+        * item_list : [{'type': 'check_error_message', 'description': ..., 'file_list': [...], 'message_list': [...], 'waive_message_list': [...]}, ...]
+        Files of message check items are scanned on a ProcessPoolExecutor (one file one job), results are merged here in item order.
+        Unchanged files are not scanned again, growing files are scanned from the last scanned line (see scan_file_list).
+        Log file numbers and report content are the same as calling check functions one by one, report is written once.
+        Results are also saved into self.db_file for the checklist viewer.
+        Return self.final_return_code.
+        """
+        check_type_dic = {'check_error_message': 'error', 'check_warning_message': 'warning', 'check_expected_message': 'expected'}
+        unit_list = []
+
+        for item_dic in item_list:
+            if item_dic['type'] in check_type_dic:
+                for file in item_dic['file_list']:
+                    unit_list.append((file, item_dic.get('message_list', []), item_dic.get('waive_message_list', [])))
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        scan_dic_list = self.scan_file_list(unit_list, max_workers=max_workers, executor=executor)
+        self.save_state()
+
+        self.report_line_list = []
+        position = 0
+
+        try:
+            for item_dic in item_list:
+                if item_dic['type'] in check_type_dic:
+                    file_num = len(item_dic['file_list'])
+                    self.check_message(check_type_dic[item_dic['type']], item_dic['description'], item_dic['file_list'], item_dic.get('message_list', []), item_dic.get('waive_message_list', []), scan_dic_list=scan_dic_list[position:position + file_num])
+                    position += file_num
+                elif item_dic['type'] in ['check_file_exist', 'review_file']:
+                    getattr(self, item_dic['type'])(item_dic['description'], item_dic['file_list'])
+                else:
+                    print('*Error*: Unknown check type "' + str(item_dic['type']) + '".')
+                    self.final_return_code += 1
+        finally:
+            with open(self.report, 'a') as REPORT:
+                REPORT.write(''.join(self.report_line_list))
+
+            self.report_line_list = None
+            write_result_db(self.db_file, self.result_row_list)
+
+        return self.final_return_code
+
@@ -0,0 +1,333 @@
+import collections
+
+
+def get_components(graph_dic):
+    """
+    Split directed graph {node: [next_node, ...]} into weakly connected components.
+    Return [[node, ...], ...], nodes keep the order of graph_dic.
+    """
+    neighbor_dic = collections.defaultdict(list)
+
+    for (node, next_node_list) in graph_dic.items():
+        for next_node in next_node_list:
+            neighbor_dic[node].append(next_node)
+            neighbor_dic[next_node].append(node)
+
+    order_dic = {node: i for (i, node) in enumerate(graph_dic)}
+    component_list = []
+    visited_set = set()
+
+    for node in graph_dic:
+        if node in visited_set:
+            continue
+
+        component = []
+        visited_set.add(node)
+        stack = [node]
+
+        while stack:
+            current_node = stack.pop()
+            component.append(current_node)
+
+            for neighbor_node in neighbor_dic[current_node]:
+                if neighbor_node not in visited_set:
+                    visited_set.add(neighbor_node)
+                    stack.append(neighbor_node)
+
+        component.sort(key=lambda x: order_dic.get(x, len(order_dic)))
+        component_list.append(component)
+
+    return component_list
+
+
+def layout_component(node_list, edge_list, sweep_num=4):
+    """
+    Layered (top to bottom) layout for one component.
+    Layer is the longest path from source nodes, nodes in a loop are put on the next layers.
+    Edges across several layers go through dummy nodes (bend points), so they do not cross other nodes.
+    Node order in layer is adjusted with barycenter sweeps to reduce edge crossing.
+    Return ({node: (column, layer)}, {(node, next_node): [(column, layer), ...]}, column_num, layer_num).
+    """
+    id_dic = {node: i for (i, node) in enumerate(node_list)}
+    node_num = len(node_list)
+    next_list = [[] for _ in range(node_num)]
+    prev_list = [[] for _ in range(node_num)]
+    in_degree_list = [0] * node_num
+
+    for (node, next_node) in edge_list:
+        (i, j) = (id_dic[node], id_dic[next_node])
+        next_list[i].append(j)
+        prev_list[j].append(i)
+        in_degree_list[j] += 1
+
+    # Layering (Kahn).
+    layer_list = [0] * node_num
+    queue = collections.deque(i for i in range(node_num) if in_degree_list[i] == 0)
+    done_num = 0
+
+    while queue:
+        i = queue.popleft()
+        done_num += 1
+
+        for j in next_list[i]:
+            layer_list[j] = max(layer_list[j], layer_list[i] + 1)
+            in_degree_list[j] -= 1
+
+            if in_degree_list[j] == 0:
+                queue.append(j)
+
+    if done_num < node_num:
+        next_layer = max(layer_list) + 1
+
+        for i in range(node_num):
+            if in_degree_list[i] > 0:
+                layer_list[i] = next_layer
+                next_layer += 1
+
+    # Dummy nodes for long edges.
+    dummy_dic = {}
+
+    for (node, next_node) in edge_list:
+        (i, j) = (id_dic[node], id_dic[next_node])
+
+        if layer_list[j] - layer_list[i] > 1:
+            dummy_list = []
+            prev_id = i
+            next_list[i].remove(j)
+            prev_list[j].remove(i)
+
+            for layer in range(layer_list[i] + 1, layer_list[j]):
+                dummy_id = len(layer_list)
+                layer_list.append(layer)
+                next_list.append([])
+                prev_list.append([prev_id])
+                next_list[prev_id].append(dummy_id)
+                dummy_list.append(dummy_id)
+                prev_id = dummy_id
+
+            next_list[prev_id].append(j)
+            prev_list[j].append(prev_id)
+            dummy_dic[(node, next_node)] = dummy_list
+
+    layer_num = max(layer_list) + 1 if node_num else 0
+    layer_node_list = [[] for _ in range(layer_num)]
+
+    for i in range(len(layer_list)):
+        layer_node_list[layer_list[i]].append(i)
+
+    # Ordering (barycenter).
+    position_list = [0.0] * len(layer_list)
+
+    for node_ids in layer_node_list:
+        for (k, i) in enumerate(node_ids):
+            position_list[i] = k
+
+    for sweep in range(sweep_num):
+        if sweep % 2 == 0:
+            (layer_range, neighbor_list) = (range(1, layer_num), prev_list)
+        else:
+            (layer_range, neighbor_list) = (range(layer_num - 2, -1, -1), next_list)
+
+        for layer in layer_range:
+            node_ids = layer_node_list[layer]
+            barycenter_dic = {}
+
+            for i in node_ids:
+                if neighbor_list[i]:
+                    barycenter_dic[i] = sum(position_list[j] for j in neighbor_list[i]) / len(neighbor_list[i])
+                else:
+                    barycenter_dic[i] = position_list[i]
+
+            node_ids.sort(key=lambda x: barycenter_dic[x])
+
+            for (k, i) in enumerate(node_ids):
+                position_list[i] = k
+
+    # Center every layer on the widest layer.
+    column_num = max([len(node_ids) for node_ids in layer_node_list], default=0)
+    coordinate_list = [None] * len(layer_list)
+
+    for (layer, node_ids) in enumerate(layer_node_list):
+        offset = (column_num - len(node_ids)) / 2
+
+        for (k, i) in enumerate(node_ids):
+            coordinate_list[i] = (offset + k, layer)
+
+    position_dic = {node: coordinate_list[i] for (i, node) in enumerate(node_list)}
+    bend_dic = {edge: [coordinate_list[i] for i in dummy_list] for (edge, dummy_list) in dummy_dic.items()}
+
+    return position_dic, bend_dic, column_num, layer_num
+
+
+class GraphLayout():
+    """
+    Layout of directed graph {node: [next_node, ...]}, components are put from left to right.
+    Component layout is cached by its nodes and edges, so an edit only re-layouts the changed component.
+    """
+    def __init__(self):
+        self.cache_dic = {}
+
+    def layout(self, graph_dic):
+        """
+        Return ({node: (x, y)}, {(node, next_node): [(x, y), ...]}, width, height), x/y are column/layer numbers.
+        """
+        position_dic = {}
+        bend_dic = {}
+        cache_dic = {}
+        x_offset = 0
+        height = 0
+
+        for node_list in get_components(graph_dic):
+            node_set = set(node_list)
+            edge_list = [(node, next_node) for node in node_list for next_node in graph_dic.get(node, []) if next_node in node_set]
+            key = (tuple(node_list), tuple(edge_list))
+
+            if key in self.cache_dic:
+                component_layout = self.cache_dic[key]
+            else:
+                component_layout = layout_component(node_list, edge_list)
+
+            cache_dic[key] = component_layout
+            (component_position_dic, component_bend_dic, column_num, layer_num) = component_layout
+
+            for (node, (x, y)) in component_position_dic.items():
+                position_dic[node] = (x_offset + x, y)
+
+            for (edge, point_list) in component_bend_dic.items():
+                bend_dic[edge] = [(x_offset + x, y) for (x, y) in point_list]
+
+            x_offset += column_num + 1
+            height = max(height, layer_num)
+
+        # Drop layouts of removed/changed components.
+        self.cache_dic = cache_dic
+
+        return position_dic, bend_dic, max(0, x_offset - 1), height
+
+
+def find_path(graph_dic, source, target):
+    """
+    Shortest path from source to target (BFS), return [source, ..., target], or [] if target is not reachable.
+    If source is target, return the shortest loop [source, ..., source].
+    """
+    parent_dic = {}
+    queue = collections.deque([source])
+
+    while queue:
+        node = queue.popleft()
+
+        for next_node in graph_dic.get(node, []):
+            if next_node in parent_dic:
+                continue
+
+            parent_dic[next_node] = node
+
+            if next_node == target:
+                path = [target]
+
+                while (len(path) == 1) or (path[-1] != source):
+                    path.append(parent_dic[path[-1]])
+
+                return path[::-1]
+
+            queue.append(next_node)
+
+    return []
+
+
+def get_strong_components(graph_dic):
+    """
+    Strongly connected components (iterative Tarjan, nodes are mapped to integer ids).
+    Return [[node, ...], ...].
+    """
+    node_list = list(graph_dic.keys())
+    id_dic = {node: i for (i, node) in enumerate(node_list)}
+
+    for next_node_list in graph_dic.values():
+        for next_node in next_node_list:
+            if next_node not in id_dic:
+                id_dic[next_node] = len(node_list)
+                node_list.append(next_node)
+
+    node_num = len(node_list)
+    next_list = [[id_dic[next_node] for next_node in graph_dic.get(node, [])] for node in node_list]
+    index_list = [-1] * node_num
+    low_list = [0] * node_num
+    on_stack = bytearray(node_num)
+    stack = []
+    component_list = []
+    index = 0
+
+    for root in range(node_num):
+        if index_list[root] >= 0:
+            continue
+
+        # (node, next edge position) frames replace recursion.
+        work_stack = [(root, 0)]
+        index_list[root] = low_list[root] = index
+        index += 1
+        stack.append(root)
+        on_stack[root] = 1
+
+        while work_stack:
+            (i, k) = work_stack[-1]
+
+            if k < len(next_list[i]):
+                work_stack[-1] = (i, k + 1)
+                j = next_list[i][k]
+
+                if index_list[j] < 0:
+                    index_list[j] = low_list[j] = index
+                    index += 1
+                    stack.append(j)
+                    on_stack[j] = 1
+                    work_stack.append((j, 0))
+                elif on_stack[j]:
+                    low_list[i] = min(low_list[i], index_list[j])
+
+                continue
+
+            work_stack.pop()
+
+            if work_stack:
+                parent = work_stack[-1][0]
+                low_list[parent] = min(low_list[parent], low_list[i])
+
+            if low_list[i] == index_list[i]:
+                component = []
+
+                while True:
+                    j = stack.pop()
+                    on_stack[j] = 0
+                    component.append(node_list[j])
+
+                    if j == i:
+                        break
+
+                component_list.append(component)
+
+    return component_list
+
+
+def find_loops(graph_dic):
+    """
+    Find all loops, every strongly connected component with loop reports one witness loop.
+    The witness is the shortest loop through the first node (graph_dic order) of the component.
+    Return [[node, ..., node], ...].
+    """
+    order_dic = {node: i for (i, node) in enumerate(graph_dic)}
+    loop_list = []
+
+    for component in get_strong_components(graph_dic):
+        if (len(component) == 1) and (component[0] not in graph_dic.get(component[0], [])):
+            continue
+
+        # Search inside component only.
+        component_set = set(component)
+        component_graph_dic = {node: [next_node for next_node in graph_dic.get(node, []) if next_node in component_set] for node in component}
+        node = min(component, key=lambda x: order_dic.get(x, len(order_dic)))
+        loop_list.append(find_path(component_graph_dic, node, node))
+
+    loop_list.sort(key=lambda x: order_dic.get(x[0], len(order_dic)))
+
+    return loop_list
@@ -0,0 +1,424 @@
+import os
+import re
+import bisect
+import threading
+from array import array
+
+
+def get_pattern_bytes(term, use_regex=True):
+    """
+    Get bytes regex for search term, invalid regex is searched as plain text.
+    """
+    term_bytes = term.encode('utf-8')
+
+    if use_regex:
+        try:
+            re.compile(term_bytes)
+            return term_bytes
+        except re.error:
+            pass
+
+    return re.escape(term_bytes)
+
+
+def is_plain_pattern(pattern_bytes):
+    """
+    Check pattern_bytes is a plain text (escaped) pattern.
+    """
+    return re.escape(re.sub(rb'\\(.)', rb'\1', pattern_bytes)) == pattern_bytes
+
+
+def get_line_end(text, position):
+    line_end = text.find(b'\n', position)
+
+    return len(text) if line_end < 0 else line_end
+
+
+class LogFile():
+    """
+    Read-only log file, data is read with os.pread (not mmap), so a log truncated on rerun (or copytruncate) only gives short reads.
+    Line start offsets are indexed on a background thread, so opening is constant time for any file size.
+    * line_count    : Number of indexed lines.
+    * get_line      : Get one line (str) by line number (start from 0).
+    * get_lines     : Get lines [start, start + count).
+    * get_line_num  : Get line number by byte offset.
+    * refresh       : Index appended data for follow mode, re-open on truncation/rotation.
+    * check_reset   : Re-open on truncation/rotation only, it is cheap enough to be called before every repaint.
+    * scan          : Count matched lines for several patterns in one pass, record match offsets.
+    """
+    NEW_LINE_PATTERN = re.compile(b'\n')
+
+    def __init__(self, file_path, chunk_size=4 * 1024 * 1024, encoding='utf-8'):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.size = 0
+        self.fd = None
+        self.index_lock = threading.Lock()
+        self.index_thread = None
+
+        self.open()
+
+    def open(self):
+        # self.line_start_array saves start offset of every line (and file size if file ends with '\n').
+        self.line_start_array = array('q', [0])
+        self.indexed_size = 0
+        self.index_finished = False
+        self.stop_flag = False
+
+        self.fd = os.open(self.file_path, os.O_RDONLY)
+        self.size = os.fstat(self.fd).st_size
+
+        self.start_index()
+
+    def start_index(self):
+        if self.indexed_size >= self.size:
+            self.index_finished = True
+            return
+
+        self.index_finished = False
+        self.index_thread = threading.Thread(target=self.build_index, daemon=True)
+        self.index_thread.start()
+
+    def stop_index(self):
+        self.stop_flag = True
+
+        if self.index_thread and self.index_thread.is_alive():
+            self.index_thread.join()
+
+        self.stop_flag = False
+
+    def close(self):
+        self.stop_index()
+
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def reset(self):
+        self.close()
+        self.open()
+
+        return 'reset'
+
+    def check_reset(self):
+        """
+        Re-open file if it is truncated or rotated, return 'reset' if file is re-opened, otherwise ''.
+        """
+        try:
+            path_stat = os.stat(self.file_path)
+        except OSError:
+            # Rotated file is not re-created yet.
+            return ''
+
+        fd_stat = os.fstat(self.fd)
+
+        if (path_stat.st_ino != fd_stat.st_ino) or (path_stat.st_dev != fd_stat.st_dev) or (fd_stat.st_size < self.size):
+            return self.reset()
+
+        return ''
+
+    def refresh(self):
+        """
+        Check file change (follow mode), only appended bytes are indexed.
+        Return 'append' if data is appended, 'reset' if file is truncated or rotated (file is re-opened), '' if no change.
+        """
+        if self.check_reset():
+            return 'reset'
+
+        fd_size = os.fstat(self.fd).st_size
+
+        if fd_size == self.size:
+            return ''
+
+        # Finish indexing on old size, then index the appended part only.
+        self.stop_index()
+
+        with self.index_lock:
+            self.size = fd_size
+
+        self.start_index()
+
+        return 'append'
+
+    def read(self, offset, length):
+        """
+        Read bytes [offset, offset + length) inside the known file size, data is short if file is truncated after open.
+        """
+        length = min(length, self.size - offset)
+
+        if (self.fd is None) or (offset < 0) or (length <= 0):
+            return b''
+
+        return os.pread(self.fd, length, offset)
+
+    def read_chunk(self, position):
+        """
+        Read about chunk_size bytes from position, the chunk ends at line end (or file end).
+        """
+        chunk = self.read(position, self.chunk_size)
+
+        if (not chunk) or (position + len(chunk) >= self.size):
+            return chunk
+
+        line_end = chunk.rfind(b'\n')
+
+        if line_end >= 0:
+            return chunk[:line_end + 1]
+
+        # Very long line, read to its end.
+        chunk_list = [chunk]
+        position += len(chunk)
+
+        while True:
+            chunk = self.read(position, self.chunk_size)
+
+            if not chunk:
+                break
+
+            line_end = chunk.find(b'\n')
+
+            if line_end >= 0:
+                chunk_list.append(chunk[:line_end + 1])
+                break
+
+            chunk_list.append(chunk)
+            position += len(chunk)
+
+        return b''.join(chunk_list)
+
+    def build_index(self):
+        """
+        Index line start offsets chunk by chunk.
+        """
+        position = self.indexed_size
+
+        while (position < self.size) and (not self.stop_flag):
+            end_position = min(position + self.chunk_size, self.size)
+            chunk = self.read(position, end_position - position)
+
+            # File is truncated, check_reset/refresh re-opens it.
+            if len(chunk) < end_position - position:
+                return
+
+            line_start_list = [position + my_match.end() for my_match in self.NEW_LINE_PATTERN.finditer(chunk)]
+
+            with self.index_lock:
+                self.line_start_array.extend(line_start_list)
+                self.indexed_size = end_position
+
+            position = end_position
+
+        if position >= self.size:
+            self.index_finished = True
+
+    def wait_index(self, timeout=None):
+        if self.index_thread:
+            self.index_thread.join(timeout)
+
+        return self.index_finished
+
+    @property
+    def line_count(self):
+        if self.size == 0:
+            return 0
+
+        with self.index_lock:
+            line_count = len(self.line_start_array)
+
+            # No line after the last '\n'.
+            if self.line_start_array[-1] == self.size:
+                line_count -= 1
+
+        return line_count
+
+    def get_line_range(self, line_num):
+        """
+        Return (start_offset, end_offset) of line, end_offset excludes line break.
+        """
+        with self.index_lock:
+            start = self.line_start_array[line_num]
+            end = (self.line_start_array[line_num + 1] - 1) if (line_num + 1 < len(self.line_start_array)) else None
+
+        if end is None:
+            # Last line, it may be not indexed yet.
+            end = start
+
+            while True:
+                data = self.read(end, 65536)
+                line_end = data.find(b'\n')
+
+                if line_end >= 0:
+                    end += line_end
+                    break
+
+                end += len(data)
+
+                if not data:
+                    break
+
+        if (end > start) and (self.read(end - 1, 1) == b'\r'):
+            end -= 1
+
+        return start, end
+
+    def get_line(self, line_num, max_length=None):
+        if (line_num < 0) or (line_num >= self.line_count):
+            return ''
+
+        (start, end) = self.get_line_range(line_num)
+
+        if max_length and (end - start > max_length):
+            end = start + max_length
+
+        return self.read(start, end - start).decode(self.encoding, errors='replace')
+
+    def get_lines(self, start_line_num, count, max_length=None):
+        return [self.get_line(line_num, max_length=max_length) for line_num in range(max(0, start_line_num), min(start_line_num + count, self.line_count))]
+
+    def get_line_num(self, offset):
+        with self.index_lock:
+            return max(0, bisect.bisect_right(self.line_start_array, offset) - 1)
+
+    def get_line_offset(self, line_num):
+        with self.index_lock:
+            return self.line_start_array[max(0, min(line_num, len(self.line_start_array) - 1))]
+
+    def find(self, pattern, offset=0, backward=False):
+        """
+        Find compiled bytes pattern from offset, file is searched chunk by chunk (aligned to line end).
+        Return (start_offset, end_offset), or None if not found.
+        """
+        if not backward:
+            position = offset
+
+            while position < self.size:
+                chunk = self.read_chunk(position)
+
+                if not chunk:
+                    break
+
+                my_match = pattern.search(chunk)
+
+                if my_match:
+                    return position + my_match.start(), position + my_match.end()
+
+                position += len(chunk)
+
+            return None
+
+        # Search backward chunk by chunk, get the last match before offset.
+        end_position = min(offset, self.size)
+
+        while end_position > 0:
+            start_position = max(0, end_position - self.chunk_size)
+            chunk = self.read(start_position, end_position - start_position)
+
+            if len(chunk) < end_position - start_position:
+                return None
+
+            # Chunk starts at line start, the first part line is searched on the next chunk.
+            if start_position > 0:
+                line_start = chunk.find(b'\n') + 1
+
+                if 0 < line_start < len(chunk):
+                    chunk = chunk[line_start:]
+                    start_position += line_start
+
+            last_match = None
+
+            for my_match in pattern.finditer(chunk):
+                last_match = my_match
+
+            if last_match:
+                return start_position + last_match.start(), start_position + last_match.end()
+
+            end_position = start_position
+
+        return None
+
+    def get_column(self, offset):
+        """
+        Get (line_num, column) of byte offset, column is counted on decoded string.
+        """
+        # Line number is only known after the offset is indexed.
+        while (not self.index_finished) and (self.indexed_size <= offset) and self.index_thread and self.index_thread.is_alive():
+            self.index_thread.join(0.01)
+
+        line_num = self.get_line_num(offset)
+        line_start = self.get_line_offset(line_num)
+
+        return line_num, len(self.read(line_start, offset - line_start).decode(self.encoding, errors='replace'))
+
+    def scan(self, pattern_list, record_key=None):
+        """
+        Count matched lines (like "grep | wc -l") for all patterns with one pass on file.
+        File is read chunk by chunk (aligned to line end), all patterns are searched on the same chunk.
+        pattern_list : [(key, pattern_bytes, case_sensitive), ...]
+        record_key   : Record all match (start, end) offsets of this pattern.
+        Return ({key: matched_line_num}, (start_array, end_array)).
+        """
+        count_dic = {key: 0 for (key, pattern_bytes, case_sensitive) in pattern_list}
+        offset_list = (array('q'), array('q'))
+
+        if (self.size == 0) or (not pattern_list):
+            return count_dic, offset_list
+
+        # Case-insensitive plain text is searched on lower-case chunk, it is much faster than re.IGNORECASE.
+        compiled_list = []
+        lower_flag = False
+
+        for (key, pattern_bytes, case_sensitive) in pattern_list:
+            if (not case_sensitive) and is_plain_pattern(pattern_bytes):
+                compiled_list.append((key, re.compile(pattern_bytes.lower()), True))
+                lower_flag = True
+            else:
+                compiled_list.append((key, re.compile(pattern_bytes, re.MULTILINE if case_sensitive else (re.MULTILINE | re.IGNORECASE)), False))
+
+        position = 0
+
+        while position < self.size:
+            chunk = self.read_chunk(position)
+
+            # File is truncated.
+            if not chunk:
+                break
+
+            lower_chunk = chunk.lower() if lower_flag else None
+
+            for (key, pattern, lower_pattern_flag) in compiled_list:
+                text = lower_chunk if lower_pattern_flag else chunk
+
+                if key == record_key:
+                    last_line_end = -1
+
+                    for my_match in pattern.finditer(text):
+                        if my_match.end() == my_match.start():
+                            continue
+
+                        offset_list[0].append(position + my_match.start())
+                        offset_list[1].append(position + my_match.end())
+
+                        if my_match.start() > last_line_end:
+                            count_dic[key] += 1
+                            last_line_end = get_line_end(text, my_match.start())
+                else:
+                    # Only the first match of every line is needed.
+                    start = 0
+
+                    while True:
+                        my_match = pattern.search(text, start)
+
+                        if not my_match:
+                            break
+
+                        if my_match.end() == my_match.start():
+                            start = my_match.end() + 1
+                            continue
+
+                        count_dic[key] += 1
+                        start = get_line_end(text, my_match.start()) + 1
+
+            position += len(chunk)
+
+        return count_dic, offset_list
@@ -5,6 +5,7 @@ import collections
 
 sys.path.append(str(os.environ['IFP_INSTALL_PATH']) + '/common')
 import common
+import common_scheduler
 
 
 def get_command_dict(command):
@@ -14,7 +15,7 @@ def get_command_dict(command):
     """
     my_dic = collections.OrderedDict()
     key_list = []
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
     i = -1
 
     for line in str(stdout, 'utf-8').split('\n'):
@@ -107,7 +108,7 @@ def get_bhosts_load_info(command='bhosts -l'):
     hostname = ''
     head_list = []
 
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -189,7 +190,7 @@ def get_tool_name():
     Make sure it is lsf or openlava.
     """
     command = 'lsid'
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -276,7 +277,7 @@ def get_lsf_bjobs_uf_info(command):
     run_limit_mark = False
     pending_mark = False
 
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in stdout.decode('utf-8', 'ignore').split('\n'):
         line = line.strip()
@@ -536,7 +537,7 @@ def get_openlava_bjobs_uf_info(command):
     my_dic = collections.OrderedDict()
     job = ''
 
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -705,7 +706,7 @@ def get_host_group_members(host_group_name):
     """
     host_list = []
     command = 'bmgroup -w -r ' + str(host_group_name)
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -730,7 +731,7 @@ def get_user_group_members(user_group_name):
     """
     user_list = []
     command = 'bugroup -r ' + str(user_group_name)
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -752,7 +753,7 @@ def get_queue_host_info():
     queue = ''
 
     command = 'bqueues -l'
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -823,7 +824,7 @@ def get_lsf_unit_for_limits():
     lsf_unit_for_limits = 'MB'
     command = 'badmin showconf mbd all'
 
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
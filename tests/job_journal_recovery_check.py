@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+################################
+# File Name   : job_journal_recovery_check.py
+# Description : Kill JobManager at a random job journal write, restart it from the journal and check the recovery.
+#               LSF is replaced by stub bsub/bjobs/lsid, every stub job records its task/action and final status.
+#               Check : An action is reported as finished only if its own job finished, and a child task starts only after the RUN job of its parent task is DONE.
+# Usage       : python3 tests/job_journal_recovery_check.py [-n <times>] [-s <seed>]
+#               (IFP_INSTALL_PATH must be set, and <IFP_INSTALL_PATH>/config/config.py must exist, run install.py first.)
+################################
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+BSUB_STUB = r'''#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import fcntl
+import subprocess
+
+job_dir = os.environ['IFP_CHECK_JOB_DIR']
+
+with open(job_dir + '/jobid', 'a+') as JF:
+    fcntl.flock(JF, fcntl.LOCK_EX)
+    JF.seek(0)
+    job = int(JF.read() or 0) + 1
+    JF.seek(0)
+    JF.truncate()
+    JF.write(str(job))
+
+command = sys.argv[-1]
+
+with open(job_dir + '/' + str(job) + '.json', 'w') as JF:
+    json.dump({'command': command, 'submit_time': time.time()}, JF)
+
+print('Job <' + str(job) + '> is submitted to queue <normal>.', flush=True)
+return_code = subprocess.call(command, shell=True)
+
+with open(job_dir + '/' + str(job) + '.stat.tmp', 'w') as SF:
+    SF.write(('DONE' if return_code == 0 else 'EXIT') + ' ' + str(time.time()))
+
+os.replace(job_dir + '/' + str(job) + '.stat.tmp', job_dir + '/' + str(job) + '.stat')
+sys.exit(return_code)
+'''
+
+BJOBS_STUB = r'''#!/usr/bin/env python3
+import os
+import sys
+
+job_dir = os.environ['IFP_CHECK_JOB_DIR']
+job_list = [arg for arg in sys.argv[1:] if arg.isdigit()]
+
+
+def get_status(job):
+    if not os.path.exists(job_dir + '/' + job + '.json'):
+        return ''
+
+    if os.path.exists(job_dir + '/' + job + '.stat'):
+        with open(job_dir + '/' + job + '.stat') as SF:
+            return SF.read().split()[0]
+
+    return 'RUN'
+
+
+if '-UF' in sys.argv:
+    for job in job_list:
+        status = get_status(job)
+
+        if status:
+            print('Job <' + job + '>, Job Name <' + job + '>, User <ifp>, Project <default>, Status <' + status + '>, Queue <normal>, Command <ifp_check>')
+        else:
+            print('Job <' + job + '> is not found')
+else:
+    print('JOBID   USER    STAT  QUEUE      FROM_HOST   EXEC_HOST   JOB_NAME   SUBMIT_TIME')
+
+    for job in job_list:
+        status = get_status(job)
+
+        if status:
+            print(job + '  ifp  ' + status + '  normal  host01  host01  ' + job + '  Jan 1 00:00')
+'''
+
+LSID_STUB = r'''#!/bin/sh
+echo "IBM Spectrum LSF Standard 10.1.0.0"
+'''
+
+TASK_LIST = ['A', 'B']
+
+
+def read_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-n', '--times',
+                        type=int,
+                        default=5,
+                        help='Kill and recover times, default is 5.')
+    parser.add_argument('-s', '--seed',
+                        type=int,
+                        default=None,
+                        help='Random seed.')
+    parser.add_argument('--child',
+                        default='',
+                        choices=['', 'run', 'recover'],
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--kill_at',
+                        type=int,
+                        default=0,
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--kill_flush',
+                        action='store_true',
+                        default=False,
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--work_dir',
+                        default='',
+                        help=argparse.SUPPRESS)
+
+    return parser.parse_args()
+
+
+# Child process (ifp) #
+def get_config_dic(work_dir):
+    """
+    Block/Version/Flow with task A and task B (RUN_AFTER A), all actions are submitted with stub bsub.
+    """
+    config_dic = {'BLOCK': {'blk': {'ver': {'flow': {}}}}}
+
+    for task in TASK_LIST:
+        action_dic = {}
+
+        for action in ['BUILD', 'RUN', 'CHECK', 'SUMMARIZE']:
+            action_dic[action] = {'RUN_METHOD': 'bsub -q normal', 'COMMAND': ': ' + task + ' ' + action.lower() + '; sleep 0.5', 'PATH': work_dir}
+
+        config_dic['BLOCK']['blk']['ver']['flow'][task] = {'ACTION': action_dic,
+                                                           'DEPENDENCY': {'FILE': [], 'LICENSE': []},
+                                                           'RUN_AFTER': {'TASK': 'A' if task == 'B' else ''}}
+
+    return config_dic
+
+
+class FakeConfig:
+    def __init__(self, common):
+        self.var_dic = {}
+        self.var_resolver = common.VarResolver(self.var_dic)
+
+
+class FakeIFP:
+    """
+    The MainWindow methods/settings which are used by JobManager/TaskObject.
+    """
+    def __init__(self, common):
+        self.config_obj = FakeConfig(common)
+        self.auto_check = True
+        self.ignore_fail = False
+        self.rerun_check_or_summarize_before_view = False
+
+    def update_task_status(self, task_obj, action, status):
+        pass
+
+    def update_message_text(self, info_dic):
+        pass
+
+    def update_main_table_item(self, *args, **kwargs):
+        pass
+
+
+def run_child(args):
+    sys.path.insert(0, str(os.environ['IFP_INSTALL_PATH']) + '/bin')
+    sys.path.insert(0, str(os.environ['IFP_INSTALL_PATH']) + '/common')
+
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    import common
+    import job_manager
+
+    os.chdir(args.work_dir)
+    app = QApplication(sys.argv)
+    result_file = open(args.work_dir + '/result.' + args.child + '.log', 'a')
+
+    # Kill ifp (without any cleanup) just after the kill_at-th journal record.
+    record_count = [0]
+    original_record = job_manager.JobJournal.record
+
+    def record(journal, state_dic, sync=False):
+        original_record(journal, state_dic, sync=sync)
+        record_count[0] += 1
+
+        if record_count[0] == args.kill_at:
+            if args.kill_flush:
+                journal.flush()
+
+            os._exit(9)
+
+    job_manager.JobJournal.record = record
+
+    # Record every reported action result.
+    original_set_action_result = job_manager.TaskObject.set_action_result
+
+    def set_action_result(task_obj, action, return_code, stdout, stderr, command_info):
+        result_file.write(json.dumps({'task': task_obj.task, 'action': action, 'return_code': return_code, 'command_info': command_info}) + '\n')
+        result_file.flush()
+        original_set_action_result(task_obj, action, return_code, stdout, stderr, command_info)
+
+    job_manager.TaskObject.set_action_result = set_action_result
+
+    manager = job_manager.JobManager(FakeIFP(common))
+    manager.update(get_config_dic(args.work_dir))
+
+    if args.child == 'run':
+        manager.receive_action(common.action.run, [{'Block': 'blk', 'Version': 'ver', 'Flow': 'flow', 'Task': task} for task in TASK_LIST], run_all_steps=True)
+    else:
+        manager.recover_from_journal()
+
+    start_time = time.time()
+
+    def check_finish():
+        # Action threads are still alive while finish_action is running (action is cleared before summarize).
+        action_thread_list = [thread for thread in threading.enumerate() if (thread is not threading.main_thread()) and (not thread.daemon)]
+
+        if (not manager.monitor_flag) and (not manager.reattached_task_dic) and (not action_thread_list):
+            result_file.write(json.dumps({'record_count': record_count[0]}) + '\n')
+            result_file.close()
+            os._exit(0)
+        elif time.time() - start_time > 120:
+            os._exit(1)
+
+    timer = QTimer()
+    timer.timeout.connect(check_finish)
+    timer.start(500)
+    app.exec_()
+
+
+# Driver #
+def create_stub(stub_dir):
+    os.makedirs(stub_dir, exist_ok=True)
+
+    for (name, content) in [('bsub', BSUB_STUB), ('bjobs', BJOBS_STUB), ('lsid', LSID_STUB)]:
+        with open(stub_dir + '/' + name, 'w') as SF:
+            SF.write(content)
+
+        os.chmod(stub_dir + '/' + name, 0o755)
+
+
+def run_ifp(mode, work_dir, kill_at=0, kill_flush=False):
+    command = [sys.executable, os.path.abspath(__file__), '--child', mode, '--work_dir', work_dir, '--kill_at', str(kill_at)]
+
+    if kill_flush:
+        command.append('--kill_flush')
+
+    return subprocess.call(command)
+
+
+def wait_jobs(job_dir, timeout=30):
+    """
+    Jobs of the killed ifp are still running, wait them finished.
+    """
+    start_time = time.time()
+
+    while time.time() - start_time < timeout:
+        job_list = [file_name[:-5] for file_name in os.listdir(job_dir) if file_name.endswith('.json')]
+
+        if all(os.path.exists(job_dir + '/' + job + '.stat') for job in job_list):
+            return
+
+        time.sleep(0.5)
+
+
+def get_job_dic(job_dir):
+    """
+    {job: {'task', 'action', 'status', 'submit_time', 'finish_time'}} of all stub jobs.
+    """
+    job_dic = {}
+
+    for file_name in os.listdir(job_dir):
+        if not file_name.endswith('.json'):
+            continue
+
+        job = file_name[:-5]
+
+        with open(job_dir + '/' + file_name) as JF:
+            info_dic = json.load(JF)
+
+        my_match = re.match(r'^:\s+(\S+)\s+(\S+);', info_dic['command'])
+        job_dic[job] = {'task': my_match.group(1), 'action': my_match.group(2), 'status': 'RUN', 'submit_time': info_dic['submit_time'], 'finish_time': None}
+
+        if os.path.exists(job_dir + '/' + job + '.stat'):
+            with open(job_dir + '/' + job + '.stat') as SF:
+                (status, finish_time) = SF.read().split()
+                job_dic[job]['status'] = status
+                job_dic[job]['finish_time'] = float(finish_time)
+
+    return job_dic
+
+
+def read_result(result_file):
+    result_list = []
+
+    if os.path.exists(result_file):
+        with open(result_file) as RF:
+            for line in RF:
+                result_list.append(json.loads(line))
+
+    return result_list
+
+
+def check_recovery(work_dir, job_dir):
+    """
+    Return error message list.
+    """
+    error_list = []
+    job_dic = get_job_dic(job_dir)
+
+    # Re-attached action result must come from its own DONE job.
+    for result_dic in read_result(work_dir + '/result.recover.log'):
+        if ('return_code' not in result_dic) or (result_dic['return_code'] != 0):
+            continue
+
+        my_match = re.match(r'^b:(\d+)$', str(result_dic['command_info']))
+
+        if my_match:
+            job_info = job_dic.get(my_match.group(1))
+
+            if (not job_info) or (job_info['task'] != result_dic['task']) or (job_info['action'] != str(result_dic['action']).lower()) or (job_info['status'] != 'DONE'):
+                error_list.append('%s %s is reported as passed with job %s (%s)' % (result_dic['task'], result_dic['action'], my_match.group(1), job_info))
+
+    # Child task B starts only after a RUN job of parent task A is DONE.
+    a_run_done_time_list = [job_info['finish_time'] for job_info in job_dic.values() if (job_info['task'] == 'A') and (job_info['action'] == 'run') and (job_info['status'] == 'DONE')]
+
+    for (job, job_info) in job_dic.items():
+        if job_info['task'] == 'B':
+            if (not a_run_done_time_list) or (job_info['submit_time'] < min(a_run_done_time_list)):
+                error_list.append('B %s job %s is submitted before RUN job of A is DONE' % (job_info['action'], job))
+
+    return error_list
+
+
+def main():
+    args = read_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    if 'IFP_INSTALL_PATH' not in os.environ:
+        print('*Error*: Environment variable "IFP_INSTALL_PATH" is not set.')
+        sys.exit(1)
+
+    random_obj = random.Random(args.seed)
+    root_dir = tempfile.mkdtemp(prefix='ifp_journal_check.')
+    stub_dir = root_dir + '/stub'
+    create_stub(stub_dir)
+    os.environ['PATH'] = stub_dir + ':' + str(os.environ['PATH'])
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    fail_num = 0
+
+    # Full run without kill, get the total number of journal records.
+    work_dir = root_dir + '/full'
+    os.makedirs(work_dir + '/jobs')
+    os.environ['IFP_CHECK_JOB_DIR'] = work_dir + '/jobs'
+
+    if run_ifp('run', work_dir) != 0:
+        print('*Error*: Full run without kill is not finished.')
+        sys.exit(1)
+
+    record_num = read_result(work_dir + '/result.run.log')[-1]['record_count']
+    print('>>> Full run, ' + str(record_num) + ' job journal records.')
+
+    for i in range(args.times):
+        kill_at = random_obj.randint(1, record_num)
+        kill_flush = random_obj.choice([True, False])
+        work_dir = root_dir + '/' + str(i)
+        job_dir = work_dir + '/jobs'
+        os.makedirs(job_dir)
+        os.environ['IFP_CHECK_JOB_DIR'] = job_dir
+
+        run_ifp('run', work_dir, kill_at=kill_at, kill_flush=kill_flush)
+        wait_jobs(job_dir)
+        error_list = []
+
+        if run_ifp('recover', work_dir) != 0:
+            error_list.append('Recovery is not finished.')
+
+        wait_jobs(job_dir)
+        error_list.extend(check_recovery(work_dir, job_dir))
+
+        if error_list:
+            fail_num += 1
+            print('*Error*: Kill at journal record ' + str(kill_at) + (' (flushed)' if kill_flush else '') + ', work directory "' + str(work_dir) + '".')
+
+            for error in error_list:
+                print('    ' + str(error))
+        else:
+            print('    Kill at journal record ' + str(kill_at) + (' (flushed)' if kill_flush else '') + ', pass.')
+
+    if fail_num:
+        sys.exit(1)
+
+    shutil.rmtree(root_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -36,6 +36,11 @@ os.environ['PYTHONUNBUFFERED'] = '1'
 VERSION = 'V1.6'
 VERSION_DATE = '2024.11.07'
 
+# License sample (by "bsample -L") older than LICENSE_DB_EXPIRE_SECOND is ignored, lmstat is used instead.
+LICENSE_DB_EXPIRE_SECOND = 900
+# Days of license feature in-use history on LICENSE tab.
+LICENSE_HISTORY_DAYS = 30
+
 # Solve some unexpected warning message.
 if 'XDG_RUNTIME_DIR' not in os.environ:
     user = getpass.getuser()
@@ -158,6 +163,8 @@ class MainWindow(QMainWindow):
         # Get license information.
         self.license_dic = {}
         self.license_dic_second = 0
+        self.license_db_file = str(self.db_path) + '/license.db'
+        self.license_db_sample_second = 0
         self.get_license_dic()
 
         # Generate GUI.
@@ -206,9 +213,22 @@ class MainWindow(QMainWindow):
         if self.disable_license:
             return
 
-        # Not update license_dic repeatedly in 300 seconds.
         current_second = int(time.time())
 
+        # Get license_dic from license database (sampled by "bsample -L") if it is up to date, it is only re-loaded for a new sample.
+        license_db_sample_second = common_license.get_license_db_sample_second(self.license_db_file)
+
+        if license_db_sample_second and (current_second - license_db_sample_second <= LICENSE_DB_EXPIRE_SECOND):
+            if license_db_sample_second != self.license_db_sample_second:
+                common.bprint('Loading License information from "' + str(self.license_db_file) + '" (sampled at ' + str(datetime.datetime.fromtimestamp(license_db_sample_second).strftime('%Y-%m-%d %H:%M:%S')) + ') ...', date_format='%Y-%m-%d %H:%M:%S')
+                self.license_dic = common_license.load_license_dic(self.license_db_file, license_db_sample_second)
+                self.license_db_sample_second = license_db_sample_second
+
+            return
+
+        self.license_db_sample_second = 0
+
+        # Not update license_dic repeatedly in 300 seconds.
         if current_second - self.license_dic_second <= 300:
             common.bprint('Will not get license information repeatedly in 300 seconds.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             return
@@ -3701,23 +3721,30 @@ Please contact with liyanqing1987@163.com with any question."""
         self.license_tab_feature_table.itemClicked.connect(self.license_tab_check_click)
         self.license_tab_expires_table = QTableWidget(self.license_tab)
 
+        self.license_tab_frame1 = QFrame(self.license_tab)
+        self.license_tab_frame1.setFrameShadow(QFrame.Raised)
+        self.license_tab_frame1.setFrameShape(QFrame.Box)
+
         # self.license_tab - Grid
         license_tab_grid = QGridLayout()
 
         license_tab_grid.addWidget(self.license_tab_frame0, 0, 0, 1, 2)
         license_tab_grid.addWidget(self.license_tab_feature_label, 1, 0)
         license_tab_grid.addWidget(self.license_tab_expires_label, 1, 1)
-        license_tab_grid.addWidget(self.license_tab_feature_table, 2, 0)
+        license_tab_grid.addWidget(self.license_tab_feature_table, 2, 0, 2, 1)
         license_tab_grid.addWidget(self.license_tab_expires_table, 2, 1)
+        license_tab_grid.addWidget(self.license_tab_frame1, 3, 1)
 
         license_tab_grid.setRowStretch(0, 2)
         license_tab_grid.setRowStretch(1, 1)
-        license_tab_grid.setRowStretch(2, 20)
+        license_tab_grid.setRowStretch(2, 10)
+        license_tab_grid.setRowStretch(3, 10)
 
         self.license_tab.setLayout(license_tab_grid)
 
         # Generate sub-frame
         self.gen_license_tab_frame0()
+        self.gen_license_tab_frame1()
         self.gen_license_tab_feature_table(self.license_dic)
         self.gen_license_tab_expires_table(self.license_dic)
 
@@ -3810,6 +3837,72 @@ Please contact with liyanqing1987@163.com with any question."""
 
         self.license_tab_frame0.setLayout(license_tab_frame0_grid)
 
+    def gen_license_tab_frame1(self):
+        # self.license_tab_frame1
+        self.license_tab_history_canvas = common_pyqt5.FigureCanvasQTAgg()
+        self.license_tab_history_toolbar = common_pyqt5.NavigationToolbar2QT(self.license_tab_history_canvas, self)
+
+        if self.dark_mode:
+            fig = self.license_tab_history_canvas.figure
+            fig.set_facecolor('#19232d')
+
+        # self.license_tab_frame1 - Grid
+        license_tab_frame1_grid = QGridLayout()
+        license_tab_frame1_grid.addWidget(self.license_tab_history_toolbar, 0, 0)
+        license_tab_frame1_grid.addWidget(self.license_tab_history_canvas, 1, 0)
+        self.license_tab_frame1.setLayout(license_tab_frame1_grid)
+
+    def update_license_tab_frame1(self, license_server, vendor_daemon, feature):
+        """
+        Draw license feature in-use history (hourly, sampled by "bsample -L") on self.license_tab_frame1.
+        """
+        fig = self.license_tab_history_canvas.figure
+        fig.clear()
+        self.license_tab_history_canvas.draw()
+
+        end_second = int(time.time())
+        begin_second = end_second - LICENSE_HISTORY_DAYS * 86400
+        history_dic = common_license.get_license_feature_history(self.license_db_file, license_server, vendor_daemon, feature, begin_second, end_second)
+
+        if not history_dic['hour_second']:
+            common.bprint('License feature in-use history is missing for "' + str(feature) + '", please sample it with "bsample -L".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            return
+
+        date_list = [datetime.datetime.fromtimestamp(hour_second) for hour_second in history_dic['hour_second']]
+        issued_list = [int(issued) if re.match(r'^\d+$', str(issued)) else 0 for issued in history_dic['issued']]
+        self.draw_license_tab_history_curve(fig, feature, date_list, issued_list, history_dic['in_use_max'], history_dic['in_use_avg'])
+
+    def draw_license_tab_history_curve(self, fig, feature, date_list, issued_list, in_use_max_list, in_use_avg_list):
+        """
+        Draw issued/in_use (max and average of every hour) curve for specified license feature.
+        """
+        fig.subplots_adjust(bottom=0.25)
+        axes = fig.add_subplot(111)
+
+        if self.dark_mode:
+            axes.set_facecolor('#19232d')
+
+            for spine in axes.spines.values():
+                spine.set_color('white')
+
+            axes.tick_params(axis='both', colors='white')
+            axes.set_title('Trends of in-use number for feature "' + str(feature) + '"', color='white')
+            axes.set_xlabel('Sample Time', color='white')
+            axes.set_ylabel('Num', color='white')
+        else:
+            axes.set_title('Trends of in-use number for feature "' + str(feature) + '"')
+            axes.set_xlabel('Sample Time')
+            axes.set_ylabel('Num')
+
+        axes.plot(date_list, issued_list, 'bo-', label='ISSUED', linewidth=1, markersize=1)
+        axes.plot(date_list, in_use_max_list, 'ro-', label='IN_USE (max)', linewidth=1, markersize=1)
+        axes.fill_between(date_list, in_use_max_list, color='red', alpha=0.3)
+        axes.plot(date_list, in_use_avg_list, 'go-', label='IN_USE (avg)', linewidth=1, markersize=1)
+        axes.legend(loc='upper right')
+        axes.tick_params(axis='x', rotation=15)
+        axes.grid()
+        self.license_tab_history_canvas.draw()
+
     def get_license_feature_list(self):
         """
         Get all features from self.license_dic.
@@ -3975,9 +4068,17 @@ Please contact with liyanqing1987@163.com with any question."""
         """
         If click the Job id, jump to the JOB tab and show the job information.
         If click the "PEND" Status, show the job pend reasons on a QMessageBox.information().
+        If click the Feature, show feature in-use history with license database.
         """
         if item is not None:
-            if item.column() == 4:
+            if item.column() == 2:
+                current_row = self.license_tab_feature_table.currentRow()
+                license_server = self.license_tab_feature_table.item(current_row, 0).text().strip()
+                vendor_daemon = self.license_tab_feature_table.item(current_row, 1).text().strip()
+                license_feature = self.license_tab_feature_table.item(current_row, 2).text().strip()
+
+                self.update_license_tab_frame1(license_server, vendor_daemon, license_feature)
+            elif item.column() == 4:
                 current_row = self.license_tab_feature_table.currentRow()
                 in_use_num = int(self.license_tab_feature_table.item(current_row, 4).text().strip())
 
@@ -3988,7 +4089,9 @@ Please contact with liyanqing1987@163.com with any question."""
 
                     common.bprint('Getting license feature "' + str(license_feature) + '" usage on license server ' + str(license_server) + ' ...', date_format='%Y-%m-%d %H:%M:%S')
 
-                    self.my_show_license_feature_usage = ShowLicenseFeatureUsage(server=license_server, vendor=vendor_daemon, feature=license_feature)
+                    # Read feature usage from license database if license_dic is loaded from it.
+                    license_db_file = self.license_db_file if self.license_db_sample_second else ''
+                    self.my_show_license_feature_usage = ShowLicenseFeatureUsage(server=license_server, vendor=vendor_daemon, feature=license_feature, license_db=license_db_file)
                     self.my_show_license_feature_usage.start()
 
     def gen_license_tab_expires_table(self, license_dic):
@@ -4149,14 +4252,19 @@ class ShowLicenseFeatureUsage(QThread):
     """
     Start tool show_license_feature_usage to show license feature usage information.
     """
-    def __init__(self, server, vendor, feature):
+    def __init__(self, server, vendor, feature, license_db=''):
         super(ShowLicenseFeatureUsage, self).__init__()
         self.server = server
         self.vendor = vendor
         self.feature = feature
+        self.license_db = license_db
 
     def run(self):
         command = str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor/tools/show_license_feature_usage -s ' + str(self.server) + ' -v ' + str(self.vendor) + ' -f ' + str(self.feature)
+
+        if self.license_db:
+            command = str(command) + ' -d ' + str(self.license_db)
+
         os.system(command)
 
 
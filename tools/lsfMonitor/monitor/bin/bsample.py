@@ -12,6 +12,7 @@ from multiprocessing import Process
 sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
 from common import common_lsf
+from common import common_license
 from common import common_sqlite3
 
 # Import local config file if exists.
@@ -65,22 +66,27 @@ def read_args():
                         action="store_true",
                         default=False,
                         help='Count and save utilization-day info with utilization data.')
+    parser.add_argument("-L", "--license",
+                        action="store_true",
+                        default=False,
+                        help='Sample license feature usage info with command "lmstat".')
 
     args = parser.parse_args()
 
-    if (not args.job) and (not args.job_mem) and (not args.queue) and (not args.host) and (not args.load) and (not args.user) and (not args.utilization) and (not args.utilization_day):
-        common.bprint('At least one argument of "job/job_mem/queue/host/load/user/utilization/utilization_day" must be selected.', level='Error')
+    if (not args.job) and (not args.job_mem) and (not args.queue) and (not args.host) and (not args.load) and (not args.user) and (not args.utilization) and (not args.utilization_day) and (not args.license):
+        common.bprint('At least one argument of "job/job_mem/queue/host/load/user/utilization/utilization_day/license" must be selected.', level='Error')
         sys.exit(1)
 
-    return args.job, args.job_mem, args.queue, args.host, args.load, args.user, args.utilization, args.utilization_day
+    return args.job, args.job_mem, args.queue, args.host, args.load, args.user, args.utilization, args.utilization_day, args.license
 
 
 class Sampling:
     """
     Sample LSF basic information with LSF bjobs/bqueues/bhosts/lshosts/lsload/busers commands.
+    Sample license usage information with lmstat command.
     Save the infomation into sqlite3 DB.
     """
-    def __init__(self, job_sampling, job_mem_sampling, queue_sampling, host_sampling, load_sampling, user_sampling, utilization_sampling, utilization_day_counting):
+    def __init__(self, job_sampling, job_mem_sampling, queue_sampling, host_sampling, load_sampling, user_sampling, utilization_sampling, utilization_day_counting, license_sampling=False):
         self.job_sampling = job_sampling
         self.job_mem_sampling = job_mem_sampling
         self.queue_sampling = queue_sampling
@@ -89,6 +95,7 @@ class Sampling:
         self.user_sampling = user_sampling
         self.utilization_sampling = utilization_sampling
         self.utilization_day_counting = utilization_day_counting
+        self.license_sampling = license_sampling
 
         # Get sample time.
         self.sample_second = int(time.time())
@@ -664,6 +671,33 @@ class Sampling:
             utilization_day_db_conn.commit()
             utilization_day_db_conn.close()
 
+    def sample_license_info(self):
+        """
+        Sample license feature usage info and save it into sqlite db, bmonitor LICENSE tab reads it instead of running lmstat.
+        """
+        print('>>> Sampling license info ...')
+
+        if ('LM_LICENSE_FILE' not in os.environ) or (not os.environ['LM_LICENSE_FILE']):
+            common.bprint('Environment variable "LM_LICENSE_FILE" is not set, will not sample license info.', level='Warning', indent=4)
+            return
+
+        if config.lmstat_path:
+            my_get_license_info = common_license.GetLicenseInfo(lmstat_path=config.lmstat_path, bsub_command=config.lmstat_bsub_command)
+        else:
+            my_get_license_info = common_license.GetLicenseInfo(bsub_command=config.lmstat_bsub_command)
+
+        license_dic = my_get_license_info.get_license_info()
+
+        if not license_dic:
+            common.bprint('Not find any valid license information.', level='Warning', indent=4)
+            return
+
+        license_db_file = str(self.db_path) + '/license.db'
+
+        if common_license.save_license_dic(license_db_file, license_dic, self.sample_second):
+            usage_table = common_license.get_license_usage_table(license_dic)
+            print('    Done (' + str(len(usage_table.location_list)) + ' features, ' + str(len(usage_table.usage_dic_list)) + ' usage records).')
+
     def sampling(self):
         if self.job_sampling:
             p = Process(target=self.sample_job_info)
@@ -697,6 +731,10 @@ class Sampling:
             p = Process(target=self.count_utilization_day_info)
             p.start()
 
+        if self.license_sampling:
+            p = Process(target=self.sample_license_info)
+            p.start()
+
         p.join()
 
 
@@ -704,8 +742,8 @@ class Sampling:
 # Main Function #
 #################
 def main():
-    (job, job_mem, queue, host, load, user, utilization, utilization_day) = read_args()
-    my_sampling = Sampling(job, job_mem, queue, host, load, user, utilization, utilization_day)
+    (job, job_mem, queue, host, load, user, utilization, utilization_day, license) = read_args()
+    my_sampling = Sampling(job, job_mem, queue, host, load, user, utilization, utilization_day, license)
     my_sampling.sampling()
 
 
@@ -1,26 +1,630 @@
 import os
 import re
+import pwd
 import sys
+import stat
 import time
+import fcntl
+import sqlite3
+import hashlib
 import datetime
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import tempfile
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
+from common import common_sqlite3
 
 os.environ['PYTHONUNBUFFERED'] = '1'
 
+# lmstat output snapshots are shared by all processes on the same host, the shared directory is sticky (1777).
+LMSTAT_CACHE_DIR = str(os.environ.get('LMSTAT_CACHE_DIR', str(tempfile.gettempdir()) + '/lmstat_cache'))
+# Every user writes its own snapshot (<name>.<uid>.lmstat), only snapshots of current user and LMSTAT_CACHE_TRUSTED_USER are read.
+# So different users share lmstat output only if LMSTAT_CACHE_TRUSTED_USER (for example, a service account) is set for all of them.
+LMSTAT_CACHE_TRUSTED_USER = str(os.environ.get('LMSTAT_CACHE_TRUSTED_USER', ''))
+# Max seconds to wait for the lmstat of another process, run lmstat directly after that.
+LMSTAT_LOCK_TIMEOUT = 30
+# lmstat worker threads are kept alive and shared by all GetLicenseInfo objects of the process.
+LMSTAT_EXECUTOR = None
+LMSTAT_EXECUTOR_SIZE = 0
+LMSTAT_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_lmstat_executor(max_workers):
+    """
+    Get the shared lmstat worker pool, it is re-created only if more workers are needed.
+    """
+    global LMSTAT_EXECUTOR, LMSTAT_EXECUTOR_SIZE
+
+    with LMSTAT_EXECUTOR_LOCK:
+        if (LMSTAT_EXECUTOR is None) or (LMSTAT_EXECUTOR_SIZE < max_workers):
+            if LMSTAT_EXECUTOR is not None:
+                LMSTAT_EXECUTOR.shutdown(wait=False)
+
+            LMSTAT_EXECUTOR_SIZE = max(8, max_workers)
+            LMSTAT_EXECUTOR = ThreadPoolExecutor(max_workers=LMSTAT_EXECUTOR_SIZE, thread_name_prefix='lmstat')
+
+    return LMSTAT_EXECUTOR
+
+
+def get_lmstat_trusted_uid_list():
+    """
+    Snapshot (and cache directory) owners which can be trusted, current user and LMSTAT_CACHE_TRUSTED_USER.
+    """
+    trusted_uid_list = [os.getuid()]
+
+    if LMSTAT_CACHE_TRUSTED_USER:
+        try:
+            trusted_uid_list.append(pwd.getpwnam(LMSTAT_CACHE_TRUSTED_USER).pw_uid)
+        except KeyError:
+            pass
+
+    return trusted_uid_list
+
+
+def check_lmstat_cache_dir(cache_dir, shared=False):
+    """
+    Cache directory must be a real directory owned by root or trusted user.
+    A shared directory must have sticky bit if it is writable by others, so other users cannot replace the snapshots.
+    A private directory must not be writable by others.
+    """
+    try:
+        dir_stat = os.lstat(cache_dir)
+    except OSError:
+        return False
+
+    if not stat.S_ISDIR(dir_stat.st_mode):
+        return False
+
+    if (dir_stat.st_uid != 0) and (dir_stat.st_uid not in get_lmstat_trusted_uid_list()):
+        return False
+
+    if dir_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        if (not shared) or (not dir_stat.st_mode & stat.S_ISVTX):
+            return False
+
+    return True
+
+
+def create_lmstat_cache_dir(cache_dir=LMSTAT_CACHE_DIR, shared=True):
+    """
+    Return the directory for lmstat snapshots.
+    Shared cache_dir (1777) is used if it is safe (and shared is True), otherwise use per-user directory <cache_dir>.<user>.
+    Return '' if there is no safe directory, then lmstat snapshot is disabled.
+    """
+    if shared:
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir, exist_ok=True)
+                # Shared by all users on the host, sticky bit so only the owner can replace/remove a snapshot.
+                os.chmod(cache_dir, 0o1777)
+        except OSError:
+            pass
+
+        if check_lmstat_cache_dir(cache_dir, shared=True):
+            return cache_dir
+
+    user_cache_dir = str(cache_dir) + '.' + str(pwd.getpwuid(os.getuid()).pw_name)
+
+    try:
+        os.makedirs(user_cache_dir, mode=0o700, exist_ok=True)
+    except OSError:
+        pass
+
+    if check_lmstat_cache_dir(user_cache_dir):
+        return user_cache_dir
+
+    return ''
+
+
+def get_lmstat_snapshot_prefix(license_server, snapshot_key, cache_dir=LMSTAT_CACHE_DIR):
+    """
+    Get snapshot path prefix of license server, snapshot_key is the lmstat setting (lmstat path/feature) which changes the output.
+    Snapshot of user <uid> is <prefix>.<uid>.lmstat, its lock file is <prefix>.<uid>.lock.
+    Return '' if there is no safe cache directory.
+    """
+    snapshot_name = re.sub(r'[^\w.@-]', '_', str(license_server))[:64] + '.' + hashlib.md5(str(snapshot_key).encode('utf-8')).hexdigest()[:12]
+    snapshot_dir = create_lmstat_cache_dir(cache_dir)
+
+    if not snapshot_dir:
+        return ''
+
+    # Snapshot/lock file name of current user is taken by another user on shared directory, use per-user directory instead.
+    for suffix in ['.lmstat', '.lock']:
+        try:
+            if os.lstat(str(snapshot_dir) + '/' + str(snapshot_name) + '.' + str(os.getuid()) + suffix).st_uid != os.getuid():
+                snapshot_dir = create_lmstat_cache_dir(cache_dir, shared=False)
+                break
+        except OSError:
+            pass
+
+    if not snapshot_dir:
+        return ''
+
+    return str(snapshot_dir) + '/' + str(snapshot_name)
+
+
+def read_lmstat_snapshot(snapshot_prefix, cache_ttl):
+    """
+    Return the snapshot of current user or trusted user if it is younger than cache_ttl seconds, else return None.
+    The snapshot owner must be the uid on snapshot name.
+    """
+    for uid in get_lmstat_trusted_uid_list():
+        snapshot_file = str(snapshot_prefix) + '.' + str(uid) + '.lmstat'
+
+        try:
+            snapshot_fd = os.open(snapshot_file, os.O_RDONLY | os.O_NOFOLLOW | os.O_NONBLOCK)
+        except OSError:
+            continue
+
+        try:
+            with os.fdopen(snapshot_fd, 'r') as SF:
+                snapshot_stat = os.fstat(SF.fileno())
+
+                if stat.S_ISREG(snapshot_stat.st_mode) and (snapshot_stat.st_uid == uid) and (time.time() - snapshot_stat.st_mtime < cache_ttl):
+                    return SF.read()
+        except (OSError, ValueError):
+            pass
+
+    return None
+
+
+def write_lmstat_snapshot(snapshot_file, stdout):
+    """
+    Write snapshot into a temporary file then replace, so readers never get a partial snapshot.
+    """
+    tmp_file = ''
+
+    try:
+        (tmp_fd, tmp_file) = tempfile.mkstemp(dir=os.path.dirname(snapshot_file), prefix='.' + os.path.basename(snapshot_file) + '.')
+
+        with os.fdopen(tmp_fd, 'w') as SF:
+            SF.write(stdout)
+
+        os.chmod(tmp_file, 0o644)
+        os.replace(tmp_file, snapshot_file)
+    except OSError as error:
+        if tmp_file and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+        common.bprint('Failed on writing lmstat snapshot "' + str(snapshot_file) + '": ' + str(error), level='Warning')
+
+
+def lock_lmstat_snapshot(lock_fd, timeout=LMSTAT_LOCK_TIMEOUT):
+    """
+    Try to lock lock_fd (LOCK_NB) until timeout seconds, return True if it is locked.
+    """
+    deadline = time.time() + timeout
+
+    while True:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.time() >= deadline:
+                return False
+
+            time.sleep(0.1)
+
+
+def run_lmstat_command(lmstat_command, snapshot_prefix='', cache_ttl=0):
+    """
+    Run lmstat command and return its stdout (string).
+    With snapshot_prefix, the stdout is saved on disk for cache_ttl seconds, and reused by the processes of current user (and users which trust current user).
+    Only one process (lock file) of current user runs lmstat for an expired snapshot, others wait (at most LMSTAT_LOCK_TIMEOUT seconds) and read its new snapshot.
+    """
+    if (not snapshot_prefix) or (cache_ttl <= 0):
+        (return_code, stdout, stderr) = common.run_command(lmstat_command)
+        return str(stdout, 'unicode_escape')
+
+    stdout = read_lmstat_snapshot(snapshot_prefix, cache_ttl)
+
+    if stdout is not None:
+        return stdout
+
+    snapshot_file = str(snapshot_prefix) + '.' + str(os.getuid()) + '.lmstat'
+    lock_fd = None
+    locked = False
+
+    try:
+        try:
+            lock_fd = os.open(str(snapshot_prefix) + '.' + str(os.getuid()) + '.lock', os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+
+            if os.fstat(lock_fd).st_uid == os.getuid():
+                locked = lock_lmstat_snapshot(lock_fd)
+
+                # Snapshot may be refreshed by another process while waiting for the lock.
+                stdout = read_lmstat_snapshot(snapshot_prefix, cache_ttl)
+
+                if stdout is not None:
+                    return stdout
+            else:
+                # Lock file is created by another user, it cannot serialize the processes of current user, just run lmstat.
+                locked = True
+        except OSError:
+            pass
+
+        # Run lmstat directly if the lock is held by another (hung) lmstat too long, and do not overwrite its snapshot.
+        (return_code, stdout, stderr) = common.run_command(lmstat_command)
+        stdout = str(stdout, 'unicode_escape')
+
+        if locked and stdout.strip():
+            write_lmstat_snapshot(snapshot_file, stdout)
+
+        return stdout
+    finally:
+        if lock_fd is not None:
+            # Close the file descriptor to release the lock.
+            os.close(lock_fd)
+
+
+class LicenseDic(dict):
+    """
+    license_dic with its LicenseUsageTable (usage_table), so FilterLicenseDic can use indexes instead of walking license_dic.
+    """
+    usage_table = None
+
+
+class LicenseUsageTable():
+    """
+    Flat license usage records of license_dic, one row for one in-use (or reservation) line.
+    * usage_dic_list  : The usage_dic of every row on license_dic.
+    * line_list       : The in_use_info_string of every row.
+    * order_list      : Feature order of every row, (order, row) is the record order on license_dic.
+    * location_list   : (license_server, vendor_daemon, feature) of every feature order.
+    * feature_dic     : {feature: [(order, license_server, vendor_daemon), ...]}, all features (in use or not).
+    * index_dic       : Hash index {column: {value: [row, ...]}}, it is built on the first lookup of the column.
+    """
+    LOCATION_COLUMN_LIST = ['server', 'vendor_daemon', 'feature']
+
+    def __init__(self):
+        self.usage_dic_list = []
+        self.line_list = []
+        self.order_list = []
+        self.location_list = []
+        self.order_dic = {}
+        self.feature_dic = {}
+        self.index_dic = {}
+
+    @classmethod
+    def from_license_dic(cls, license_dic):
+        """
+        Build table by walking license_dic (for license_dic which is not got from LmstatParser).
+        """
+        usage_table = cls()
+
+        for license_server in license_dic.keys():
+            for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
+                for (feature, feature_dic) in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].items():
+                    usage_table.add_feature(license_server, vendor_daemon, feature)
+
+                    for (i, usage_dic) in enumerate(feature_dic['in_use_info']):
+                        usage_table.add_row(license_server, vendor_daemon, feature, usage_dic, feature_dic['in_use_info_string'][i])
+
+        return usage_table
+
+    def add_feature(self, license_server, vendor_daemon, feature):
+        order = len(self.location_list)
+        self.location_list.append((license_server, vendor_daemon, feature))
+        self.order_dic[(license_server, vendor_daemon, feature)] = order
+        self.feature_dic.setdefault(feature, []).append((order, license_server, vendor_daemon))
+
+    def add_row(self, license_server, vendor_daemon, feature, usage_dic, line):
+        self.usage_dic_list.append(usage_dic)
+        self.line_list.append(line)
+        self.order_list.append(self.order_dic[(license_server, vendor_daemon, feature)])
+
+        # Drop indexes, they are re-built on the next lookup.
+        if self.index_dic:
+            self.index_dic = {}
+
+    def get_location(self, row):
+        """
+        Get (license_server, vendor_daemon, feature) of row.
+        """
+        return self.location_list[self.order_list[row]]
+
+    def get_index(self, column):
+        """
+        Get hash index {value: [row, ...]} of column, column is server/vendor_daemon/feature or any key of usage_dic (user/execute_host/submit_host/version/...).
+        """
+        if column not in self.index_dic:
+            index = {}
+
+            if column in self.LOCATION_COLUMN_LIST:
+                location_index = self.LOCATION_COLUMN_LIST.index(column)
+                value_list = [self.location_list[order][location_index] for order in self.order_list]
+            else:
+                value_list = [usage_dic[column] for usage_dic in self.usage_dic_list]
+
+            for (row, value) in enumerate(value_list):
+                index.setdefault(value, []).append(row)
+
+            self.index_dic[column] = index
+
+        return self.index_dic[column]
+
+    def sort_row_list(self, row_list):
+        """
+        Sort rows with the record order on license_dic.
+        """
+        return sorted(row_list, key=lambda row: (self.order_list[row], row))
+
+
+def match_key_list(key_dic, specified_list, fuzzy_mode=True):
+    """
+    Get keys of key_dic which are on specified_list ("ALL" means all keys).
+    If no key is matched exactly, get keys which contain any specified string (case-insensitive) with fuzzy_mode.
+    Only the (distinct) keys are checked, not the records.
+    """
+    if 'ALL' in specified_list:
+        return list(key_dic.keys())
+
+    exact_key_list = [key for key in dict.fromkeys(specified_list) if key in key_dic]
+
+    if exact_key_list or (not fuzzy_mode):
+        return exact_key_list
+
+    lower_specified_list = [specified.lower() for specified in specified_list]
+
+    return [key for key in key_dic.keys() if any((specified in key.lower()) for specified in lower_specified_list)]
+
+
+def get_license_usage_table(license_dic):
+    """
+    Get LicenseUsageTable of license_dic, it is built (and saved on LicenseDic) if it is missing.
+    """
+    usage_table = getattr(license_dic, 'usage_table', None)
+
+    if usage_table is None:
+        usage_table = LicenseUsageTable.from_license_dic(license_dic)
+
+        if isinstance(license_dic, LicenseDic):
+            license_dic.usage_table = usage_table
+
+    return usage_table
+
+
+class LmstatParser():
+    """
+    Incremental lmstat output parser, output can be fed chunk by chunk (such as license server by license server) with feed().
+    Cheap string checks select the regex for every line, so one line is matched once by one (or two) regexes.
+    Get result on self.license_dic (LicenseDic), usage records are also saved on self.license_dic.usage_table.
+    """
+    compile_dic = {'license_server_status': re.compile(r'^\s*License server status: (\S+)\s*$'),
+                   'license_files': re.compile(r'^\s*License file\(s\) on (\S+): (\S+):\s*$'),
+                   'license_server': re.compile(r'^\s*(\S+): license server (\S+?) .* (\S+?)\s*$'),
+                   'vendor_daemon_status': re.compile(r'^\s*Vendor daemon status \(on (.+)\):\s*$'),
+                   'vendor_daemon_up': re.compile(r'^\s*(\S+): UP (\S+)\s*$'),
+                   'vendor_daemon_down': re.compile(r'^\s*(\S+): (The desired vendor daemon is down|Cannot read data from license server system)\..*$'),
+                   'users_of_feature': re.compile(r'^Users of (\S+):  \(Total of ([0-9]+) license(s?) issued;  Total of ([0-9]+) license(s?) in use\)\s*$'),
+                   'users_of_feature_uncounted': re.compile(r'^Users of (\S+):  \(Uncounted,.*\)\s*$'),
+                   'in_use_info': re.compile(r'^\s*(?P<user>\S+)\s+(?P<execute_host>\S+)\s+(?P<display>\S+)?\s*(.+)?\s*\((?P<version>\S+)\)\s+\((?P<license_server>\S+)\s+(\d+)\), start (?P<start_time>.+?)(,\s+(?P<license_num>\d+)\s+licenses)?(\s*\(linger:.+\))?\s*$'),
+                   'in_use_info_simple': re.compile(r'^(?P<user>\S+)\s+(?P<execute_host>\S+)\s+(?P<display>\S+)\s+\((?P<version>\S+)\)\s+\((?P<license_server>\S+)\s+\d+\), start (?P<start_time>[^(),]+)(,\s+(?P<license_num>\d+)\s+licenses)?$'),
+                   'display': re.compile(r'^(.+):.+$'),
+                   'start_time': re.compile(r'^(.+?)\s*\(.*\)\s*$'),
+                   'reservation': re.compile(r'^\s*(\d+)\s+RESERVATION(s)? for (\S+)\s+(\S+)\s+\((\S+)(\s+(\d+))?\)\s*$'),
+                   'feature_expires': re.compile(r'^Feature .* Expires\s*$'),
+                   'expire_info': re.compile(r'^(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(permanent\(no expiration date\)|[0-9]{1,2}-[a-zA-Z]{3}-[0-9]{4})\s*$')}
+
+    def __init__(self):
+        self.license_dic = LicenseDic()
+        self.license_dic.usage_table = LicenseUsageTable()
+        self.license_server = ''
+        self.vendor_daemon = ''
+        self.feature = ''
+        self.expires_mark = False
+        self.vendor_daemon_status_mark = False
+
+    def feed(self, line_list):
+        """
+        Parse lines of lmstat output, parser state is kept between feed() calls.
+        """
+        license_dic = self.license_dic
+        usage_table = license_dic.usage_table
+        compile_dic = self.compile_dic
+        (license_server, vendor_daemon, feature) = (self.license_server, self.vendor_daemon, self.feature)
+        (expires_mark, vendor_daemon_status_mark) = (self.expires_mark, self.vendor_daemon_status_mark)
+
+        for line in line_list:
+            line = line.strip()
+
+            if not line:
+                continue
+
+            if expires_mark:
+                my_match = compile_dic['expire_info'].match(line)
+
+                if my_match:
+                    feature = my_match.group(1)
+                    expire_dic = {'version': my_match.group(2),
+                                  'license': my_match.group(3),
+                                  'vendor': my_match.group(4),
+                                  'expires': my_match.group(5)}
+
+                    for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
+                        if feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature']:
+                            license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'].setdefault(feature, [])
+                            license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'][feature].append(expire_dic)
+
+                    continue
+
+            if line.startswith('Users of '):
+                my_match = compile_dic['users_of_feature'].match(line)
+
+                if my_match:
+                    (feature, issued_num, in_use_num) = (my_match.group(1), my_match.group(2), my_match.group(4))
+                else:
+                    my_match = compile_dic['users_of_feature_uncounted'].match(line)
+
+                    if my_match:
+                        (feature, issued_num, in_use_num) = (my_match.group(1), 'Uncounted', '0')
+
+                if my_match:
+                    feature_dic = license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature']
+
+                    if feature not in feature_dic:
+                        feature_dic[feature] = {'issued': issued_num,
+                                                'in_use': in_use_num,
+                                                'in_use_info_string': [],
+                                                'in_use_info': []}
+                        usage_table.add_feature(license_server, vendor_daemon, feature)
+
+                    continue
+
+            if '), start ' in line:
+                # Most lines are "user host display (version) (server handle), start time[, num licenses]", they are matched without backtracking.
+                my_match = compile_dic['in_use_info_simple'].match(line) or compile_dic['in_use_info'].match(line)
+
+                if my_match:
+                    usage_dic = {'user': my_match.group('user'),
+                                 'execute_host': my_match.group('execute_host'),
+                                 'submit_host': 'N/A',
+                                 'version': my_match.group('version'),
+                                 'license_server': my_match.group('license_server'),
+                                 'start_time': my_match.group('start_time'),
+                                 'license_num': '1'}
+
+                    # Update submit_host.
+                    display_setting = my_match.group('display')
+
+                    if display_setting:
+                        display_match = compile_dic['display'].match(display_setting)
+
+                        if display_match:
+                            usage_dic['submit_host'] = display_match.group(1)
+
+                    # Update start_time.
+                    start_time_match = compile_dic['start_time'].match(usage_dic['start_time'])
+
+                    if start_time_match:
+                        usage_dic['start_time'] = start_time_match.group(1)
+
+                    # Update license_num.
+                    if my_match.group('license_num'):
+                        usage_dic['license_num'] = my_match.group('license_num')
+
+                    feature_dic = license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]
+                    feature_dic['in_use_info_string'].append(line)
+                    feature_dic['in_use_info'].append(usage_dic)
+                    usage_table.add_row(license_server, vendor_daemon, feature, usage_dic, line)
+
+                    # Update in_use num with "Uncounted" issued num.
+                    if feature_dic['issued'] == 'Uncounted':
+                        feature_dic['in_use'] = str(int(feature_dic['in_use']) + int(usage_dic['license_num']))
+
+                    continue
+
+            if 'RESERVATION' in line:
+                my_match = compile_dic['reservation'].match(line)
+
+                if my_match:
+                    reservation_type = my_match.group(3)
+                    user = 'N/A'
+                    execute_host = 'N/A'
+
+                    if (reservation_type == 'USER') or (reservation_type == 'GROUP'):
+                        user = my_match.group(4)
+                    elif (reservation_type == 'HOST') or (reservation_type == 'HOST_GROUP'):
+                        execute_host = my_match.group(4)
+
+                    usage_dic = {'user': user,
+                                 'execute_host': execute_host,
+                                 'submit_host': 'N/A',
+                                 'version': 'N/A',
+                                 'license_server': my_match.group(5),
+                                 'start_time': 'RESERVATION',
+                                 'license_num': my_match.group(1)}
+
+                    feature_dic = license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]
+                    feature_dic['in_use_info_string'].append(line)
+                    feature_dic['in_use_info'].append(usage_dic)
+                    usage_table.add_row(license_server, vendor_daemon, feature, usage_dic, line)
+                    continue
+
+            if 'License server status: ' in line:
+                my_match = compile_dic['license_server_status'].match(line)
+
+                if my_match:
+                    license_server = my_match.group(1)
+                    license_dic.setdefault(license_server, {'license_files': '',
+                                                            'license_server_status': 'UNKNOWN',
+                                                            'license_server_version': '',
+                                                            'vendor_daemon': {}})
+                    expires_mark = False
+                    vendor_daemon_status_mark = False
+                    vendor_daemon = ''
+                    continue
+
+            if 'License file(s) on ' in line:
+                my_match = compile_dic['license_files'].match(line)
+
+                if my_match:
+                    license_dic[license_server]['license_files'] = my_match.group(2)
+                    continue
+
+            if ': license server ' in line:
+                my_match = compile_dic['license_server'].match(line)
+
+                if my_match:
+                    license_dic[license_server]['license_server_status'] = my_match.group(2)
+                    license_dic[license_server]['license_server_version'] = my_match.group(3)
+                    continue
+
+            if 'Vendor daemon status (on ' in line:
+                if compile_dic['vendor_daemon_status'].match(line):
+                    vendor_daemon_status_mark = True
+                    continue
+
+            if vendor_daemon_status_mark and (': UP ' in line):
+                my_match = compile_dic['vendor_daemon_up'].match(line)
+
+                if my_match:
+                    vendor_daemon = my_match.group(1)
+                    license_dic[license_server]['vendor_daemon'].setdefault(vendor_daemon, {'vendor_daemon_status': 'UP',
+                                                                                            'vendor_daemon_version': my_match.group(2),
+                                                                                            'feature': {},
+                                                                                            'expires': {}})
+                    continue
+
+            if line.startswith('Feature ') and compile_dic['feature_expires'].match(line):
+                expires_mark = True
+
+                if vendor_daemon:
+                    license_dic[license_server]['vendor_daemon'][vendor_daemon].setdefault('expires', {})
+
+                continue
+
+            if vendor_daemon_status_mark and (('The desired vendor daemon is down' in line) or ('Cannot read data from license server system' in line)):
+                my_match = compile_dic['vendor_daemon_down'].match(line)
+
+                if my_match:
+                    down_vendor_daemon = my_match.group(1)
+                    license_dic[license_server]['vendor_daemon'].setdefault(down_vendor_daemon, {'vendor_daemon_status': 'DOWN',
+                                                                                                 'vendor_daemon_version': '',
+                                                                                                 'feature': {},
+                                                                                                 'expires': {}})
+
+        (self.license_server, self.vendor_daemon, self.feature) = (license_server, vendor_daemon, feature)
+        (self.expires_mark, self.vendor_daemon_status_mark) = (expires_mark, vendor_daemon_status_mark)
+
+        return license_dic
+
 
 class GetLicenseInfo():
     """
     Get license information with tool "lmstat".
     Save it into a dictory and return.
+    lmstat output of every license server is shared (on LMSTAT_CACHE_DIR) for cache_ttl seconds, cache_ttl=0 disables it.
     """
-    def __init__(self, specified_server='', specified_feature='', lmstat_path='lmstat', bsub_command='bsub -q normal -Is'):
+    def __init__(self, specified_server='', specified_feature='', lmstat_path='lmstat', bsub_command='bsub -q normal -Is', cache_ttl=60):
         self.specified_server = specified_server
         self.specified_feature = specified_feature
         self.lmstat_path = lmstat_path
         self.bsub_command = bsub_command
+        self.cache_ttl = cache_ttl
 
         if self.specified_server:
             os.environ['LM_LICENSE_FILE'] = self.specified_server
@@ -72,272 +676,106 @@ class GetLicenseInfo():
                                                          },
                                        },
                       }
+        license_dic is a LicenseDic, license_dic.usage_table saves the usage records on a flat table with indexes.
         """
-        # Get lmstat output message.
-        if 'LM_LICENSE_FILE' in os.environ:
-            stdout_list = []
-            lm_license_file_list = os.environ['LM_LICENSE_FILE'].split(':')
+        # Get lmstat output message, output of every license server is parsed once it is ready.
+        lmstat_parser = LmstatParser()
 
-            with ProcessPoolExecutor(max_workers=len(lm_license_file_list)) as executor:
-                job_list = []
+        if 'LM_LICENSE_FILE' in os.environ:
+            lm_license_file_list = [lm_license_file for lm_license_file in os.environ['LM_LICENSE_FILE'].split(':') if lm_license_file]
+            executor = get_lmstat_executor(len(lm_license_file_list))
+            job_list = []
 
-                for lm_license_file in lm_license_file_list:
-                    if lm_license_file:
-                        lmstat_command = self.get_lmstat_command(specified_server=lm_license_file)
-                        job_list.append(executor.submit(common.run_command, lmstat_command))
+            for lm_license_file in lm_license_file_list:
+                lmstat_command = self.get_lmstat_command(specified_server=lm_license_file)
+                snapshot_prefix = get_lmstat_snapshot_prefix(lm_license_file, [self.lmstat_path, self.specified_feature])
+                job_list.append(executor.submit(run_lmstat_command, lmstat_command, snapshot_prefix, self.cache_ttl))
 
-                for job in as_completed(job_list):
-                    for tuple_line in job.result():
-                        if isinstance(tuple_line, bytes):
-                            stdout_list.extend(str(tuple_line, 'unicode_escape').split('\n'))
+            for job in as_completed(job_list):
+                lmstat_parser.feed(job.result().split('\n'))
         else:
+            # lmstat without license server depends on user settings, so it is not shared.
             lmstat_command = self.get_lmstat_command()
-            (return_code, stdout, stderr) = common.run_command(lmstat_command)
-            stdout_list = str(stdout, 'unicode_escape').split('\n')
-
-        # Parse lmstat output message.
-        license_dic = {}
-        license_server = ''
-        vendor_daemon = ''
-        feature = ''
-        expires_mark = False
-        vendor_daemon_status_mark = False
-
-        license_compile_dic = {'empty_line': re.compile(r'^\s*$'),
-                               'license_server_status': re.compile(r'^\s*License server status: (\S+)\s*$'),
-                               'license_files': re.compile(r'^\s*License file\(s\) on (\S+): (\S+):\s*$'),
-                               'license_server': re.compile(r'^\s*(\S+): license server (\S+?) .* (\S+?)\s*$'),
-                               'vendor_daemon_status': re.compile(r'^\s*Vendor daemon status \(on (.+)\):\s*$'),
-                               'vendor_daemon_up': re.compile(r'^\s*(\S+): UP (\S+)\s*$'),
-                               'vendor_daemon_down': re.compile(r'^\s*(\S+): (The desired vendor daemon is down|Cannot read data from license server system)\..*$'),
-                               'users_of_feature': re.compile(r'^Users of (\S+):  \(Total of ([0-9]+) license(s?) issued;  Total of ([0-9]+) license(s?) in use\)\s*$'),
-                               'users_of_feature_uncounted': re.compile(r'^Users of (\S+):  \(Uncounted,.*\)\s*$'),
-                               'in_use_info': re.compile(r'^\s*(\S+)\s+(\S+)\s+(\S+)?\s*(.+)?\s*\((\S+)\)\s+\((\S+)\s+(\d+)\), start (.+?)(,\s+(\d+)\s+licenses)?(\s*\(linger:.+\))?\s*$'),
-                               'reservation': re.compile(r'^\s*(\d+)\s+RESERVATION(s)? for (\S+)\s+(\S+)\s+\((\S+)(\s+(\d+))?\)\s*$'),
-                               'feature_expires': re.compile(r'^Feature .* Expires\s*$'),
-                               'expire_info': re.compile(r'^(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(permanent\(no expiration date\)|[0-9]{1,2}-[a-zA-Z]{3}-[0-9]{4})\s*$')}
-
-        for line in stdout_list:
-            line = line.strip()
+            lmstat_parser.feed(run_lmstat_command(lmstat_command).split('\n'))
 
-            if license_compile_dic['empty_line'].match(line):
-                continue
-            elif expires_mark and license_compile_dic['expire_info'].match(line):
-                my_match = license_compile_dic['expire_info'].match(line)
-                feature = my_match.group(1)
-                expire_dic = {'version': my_match.group(2),
-                              'license': my_match.group(3),
-                              'vendor': my_match.group(4),
-                              'expires': my_match.group(5)}
-
-                for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
-                    if feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature']:
-                        license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'].setdefault(feature, [])
-                        license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'][feature].append(expire_dic)
-            elif license_compile_dic['users_of_feature'].match(line):
-                my_match = license_compile_dic['users_of_feature'].match(line)
-                feature = my_match.group(1)
-                issued_num = my_match.group(2)
-                in_use_num = my_match.group(4)
-
-                license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].setdefault(feature, {'issued': issued_num,
-                                                                                                            'in_use': in_use_num,
-                                                                                                            'in_use_info_string': [],
-                                                                                                            'in_use_info': []})
-            elif license_compile_dic['users_of_feature_uncounted'].match(line):
-                my_match = license_compile_dic['users_of_feature_uncounted'].match(line)
-                feature = my_match.group(1)
-                issued_num = 'Uncounted'
-                in_use_num = '0'
-
-                license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].setdefault(feature, {'issued': issued_num,
-                                                                                                            'in_use': in_use_num,
-                                                                                                            'in_use_info_string': [],
-                                                                                                            'in_use_info': []})
-            elif license_compile_dic['in_use_info'].match(line):
-                my_match = license_compile_dic['in_use_info'].match(line)
-                usage_dic = {'user': my_match.group(1),
-                             'execute_host': my_match.group(2),
-                             'submit_host': 'N/A',
-                             'version': my_match.group(5),
-                             'license_server': my_match.group(6),
-                             'start_time': my_match.group(8),
-                             'license_num': '1'}
-
-                # Update submit_host.
-                display_setting = my_match.group(3)
-
-                if display_setting:
-                    if re.match(r'^(.+):.+$', display_setting):
-                        display_match = re.match(r'^(.+):.+$', display_setting)
-                        usage_dic['submit_host'] = display_match.group(1)
-
-                # Update start_time.
-                if re.match(r'^(.+?)\s*\(.*\)\s*$', usage_dic['start_time']):
-                    start_time_match = re.match(r'^(.+?)\s*\(.*\)\s*$', usage_dic['start_time'])
-                    usage_dic['start_time'] = start_time_match.group(1)
-
-                # Update license_num.
-                if my_match.group(9):
-                    usage_dic['license_num'] = my_match.group(10)
-
-                license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info_string'].append(line.strip())
-                license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info'].append(usage_dic)
-
-                # Update in_use num with "Uncounted" issued num.
-                if license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['issued'] == 'Uncounted':
-                    license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use'] = str(int(license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use']) + int(usage_dic['license_num']))
-            elif license_compile_dic['reservation'].match(line):
-                my_match = license_compile_dic['reservation'].match(line)
-                reservation_type = my_match.group(3)
-                user = 'N/A'
-                execute_host = 'N/A'
-
-                if (reservation_type == 'USER') or (reservation_type == 'GROUP'):
-                    user = my_match.group(4)
-                elif (reservation_type == 'HOST') or (reservation_type == 'HOST_GROUP'):
-                    execute_host = my_match.group(4)
-
-                usage_dic = {'user': user,
-                             'execute_host': execute_host,
-                             'submit_host': 'N/A',
-                             'version': 'N/A',
-                             'license_server': my_match.group(5),
-                             'start_time': 'RESERVATION',
-                             'license_num': my_match.group(1)}
-
-                license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info_string'].append(line.strip())
-                license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info'].append(usage_dic)
-            elif license_compile_dic['license_server_status'].match(line):
-                my_match = license_compile_dic['license_server_status'].match(line)
-                license_server = my_match.group(1)
-                license_dic.setdefault(license_server, {'license_files': '',
-                                                        'license_server_status': 'UNKNOWN',
-                                                        'license_server_version': '',
-                                                        'vendor_daemon': {}})
-                expires_mark = False
-                vendor_daemon_status_mark = False
-                vendor_daemon = ''
-            elif license_compile_dic['license_files'].match(line):
-                my_match = license_compile_dic['license_files'].match(line)
-                license_dic[license_server]['license_files'] = my_match.group(2)
-            elif license_compile_dic['license_server'].match(line):
-                # License Manager Status—Status of each license server manager. Click the Update Status button to immediately refresh the status display for the license server.
-                # • Up—License server is currently running.
-                # • Down—License server is currently not running.
-                # • Unknown—License server status is not known.
-                # • Lost quorum—For license-server triads, this means that the quorum has been lost. A quorum requires that at least two of the three license servers are running and communicating with each other.
-                my_match = license_compile_dic['license_server'].match(line)
-                license_dic[license_server]['license_server_status'] = my_match.group(2)
-                license_dic[license_server]['license_server_version'] = my_match.group(3)
-            elif license_compile_dic['vendor_daemon_status'].match(line):
-                vendor_daemon_status_mark = True
-            elif vendor_daemon_status_mark and license_compile_dic['vendor_daemon_up'].match(line):
-                my_match = license_compile_dic['vendor_daemon_up'].match(line)
-                vendor_daemon = my_match.group(1)
-                license_dic[license_server]['vendor_daemon'].setdefault(vendor_daemon, {'vendor_daemon_status': 'UP',
-                                                                                        'vendor_daemon_version': my_match.group(2),
-                                                                                        'feature': {},
-                                                                                        'expires': {}})
-            elif license_compile_dic['feature_expires'].match(line):
-                expires_mark = True
-
-                if vendor_daemon:
-                    license_dic[license_server]['vendor_daemon'][vendor_daemon].setdefault('expires', {})
-            elif vendor_daemon_status_mark and license_compile_dic['vendor_daemon_down'].match(line):
-                my_match = license_compile_dic['vendor_daemon_down'].match(line)
-                down_vendor_daemon = my_match.group(1)
-                license_dic[license_server]['vendor_daemon'].setdefault(down_vendor_daemon, {'vendor_daemon_status': 'DOWN',
-                                                                                             'vendor_daemon_version': '',
-                                                                                             'feature': {},
-                                                                                             'expires': {}})
-
-        return license_dic
+        return lmstat_parser.license_dic
 
 
 class FilterLicenseDic():
     """
     Filter license_dic with server/vendor/feature/submit_host/execute_host/user/show_mode specification.
     Get a new license_dic.
+    Feature and usage attribute filters are index lookups on the LicenseUsageTable of license_dic.
     """
     def __init__(self, fuzzy_mode=True):
         self.fuzzy_mode = fuzzy_mode
 
+    @staticmethod
+    def add_license_server(new_license_dic, license_dic, license_server):
+        return new_license_dic.setdefault(license_server, {'license_files': license_dic[license_server]['license_files'],
+                                                           'license_server_status': license_dic[license_server]['license_server_status'],
+                                                           'license_server_version': license_dic[license_server]['license_server_version'],
+                                                           'vendor_daemon': {}})
+
     def filter_by_server(self, license_dic, server_list):
         """
         Filter license_dic with specified license_server(s).
         """
-        new_license_dic = {}
+        new_license_dic = LicenseDic()
 
         for license_server in license_dic.keys():
             if (license_server in server_list) or ('ALL' in server_list):
                 new_license_dic.setdefault(license_server, license_dic[license_server])
 
+        # Nothing is filtered out, share the usage table.
+        if len(new_license_dic) == len(license_dic):
+            new_license_dic.usage_table = getattr(license_dic, 'usage_table', None)
+
         return new_license_dic
 
     def filter_by_vendor(self, license_dic, vendor_list):
         """
         Filter license_dic with specified vendor_daemon(s).
         """
-        new_license_dic = {}
+        new_license_dic = LicenseDic()
+        (vendor_daemon_num, new_vendor_daemon_num) = (0, 0)
 
         for license_server in license_dic.keys():
             for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
+                vendor_daemon_num += 1
+
                 if (vendor_daemon in vendor_list) or ('ALL' in vendor_list):
-                    new_license_dic.setdefault(license_server, {'license_files': license_dic[license_server]['license_files'],
-                                                                'license_server_status': license_dic[license_server]['license_server_status'],
-                                                                'license_server_version': license_dic[license_server]['license_server_version'],
-                                                                'vendor_daemon': {}})
+                    new_vendor_daemon_num += 1
+                    self.add_license_server(new_license_dic, license_dic, license_server)
                     new_license_dic[license_server]['vendor_daemon'].setdefault(vendor_daemon, license_dic[license_server]['vendor_daemon'][vendor_daemon])
 
+        # Nothing is filtered out, share the usage table.
+        if (new_vendor_daemon_num == vendor_daemon_num) and (len(new_license_dic) == len(license_dic)):
+            new_license_dic.usage_table = getattr(license_dic, 'usage_table', None)
+
         return new_license_dic
 
     def filter_by_feature(self, license_dic, feature_list):
         """
         Filter license_dic with specified feature(s).
         """
-        exact_feature_list = []
-        fuzzy_feature_list = []
-        filtered_feature_list = []
+        usage_table = get_license_usage_table(license_dic)
+        filtered_feature_list = match_key_list(usage_table.feature_dic, feature_list, self.fuzzy_mode)
+        location_list = sorted((order, license_server, vendor_daemon, feature) for feature in filtered_feature_list for (order, license_server, vendor_daemon) in usage_table.feature_dic[feature])
 
-        for license_server in license_dic.keys():
-            for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
-                for feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].keys():
-                    if (feature in feature_list) or ('ALL' in feature_list):
-                        if feature not in exact_feature_list:
-                            exact_feature_list.append(feature)
-
-                    if self.fuzzy_mode:
-                        for specified_feature in feature_list:
-                            if re.search(re.escape(specified_feature.lower()), feature.lower()):
-                                if feature not in fuzzy_feature_list:
-                                    fuzzy_feature_list.append(feature)
+        # Filter by feature.
+        new_license_dic = LicenseDic()
 
-        if exact_feature_list:
-            filtered_feature_list = exact_feature_list
-        elif fuzzy_feature_list:
-            filtered_feature_list = fuzzy_feature_list
+        for (order, license_server, vendor_daemon, feature) in location_list:
+            self.add_license_server(new_license_dic, license_dic, license_server)
+            new_license_dic[license_server]['vendor_daemon'].setdefault(vendor_daemon, {'vendor_daemon_status': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_status'],
+                                                                                        'vendor_daemon_version': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_version'],
+                                                                                        'feature': {},
+                                                                                        'expires': {}})
+            new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].setdefault(feature, license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature])
 
-        # Filter by feature.
-        new_license_dic = {}
-
-        if filtered_feature_list:
-            for license_server in license_dic.keys():
-                for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
-                    for feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].keys():
-                        if feature in filtered_feature_list:
-                            new_license_dic.setdefault(license_server, {'license_files': license_dic[license_server]['license_files'],
-                                                                        'license_server_status': license_dic[license_server]['license_server_status'],
-                                                                        'license_server_version': license_dic[license_server]['license_server_version'],
-                                                                        'vendor_daemon': {}})
-                            new_license_dic[license_server]['vendor_daemon'].setdefault(vendor_daemon, {'vendor_daemon_status': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_status'],
-                                                                                                        'vendor_daemon_version': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_version'],
-                                                                                                        'feature': {},
-                                                                                                        'expires': {}})
-                            new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].setdefault(feature, license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature])
-
-                            if feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires']:
-                                new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'].setdefault(feature, license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'][feature])
+            if feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires']:
+                new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'].setdefault(feature, license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'][feature])
 
         return new_license_dic
 
@@ -345,52 +783,35 @@ class FilterLicenseDic():
         """
         Filter license_dic with specified feature_usage_attribute (user/execute_host/submit_host/version/license_server/start_time/license_num).
         """
-        exact_feature_usage_attribute_value_list = []
-        fuzzy_feature_usage_attribute_value_list = []
-        filtered_feature_usage_attribute_value_list = []
+        usage_table = get_license_usage_table(license_dic)
+        index = usage_table.get_index(feature_usage_attribute)
+        filtered_value_list = match_key_list(index, feature_usage_attribute_value_list, self.fuzzy_mode)
+        row_list = usage_table.sort_row_list([row for value in filtered_value_list for row in index[value]])
+
+        # Filter by usage attribute, the usage table of new license_dic is built at the same time.
+        new_license_dic = LicenseDic()
+        new_license_dic.usage_table = LicenseUsageTable()
+
+        for row in row_list:
+            (license_server, vendor_daemon, feature) = usage_table.get_location(row)
+            usage_dic = usage_table.usage_dic_list[row]
+
+            self.add_license_server(new_license_dic, license_dic, license_server)
+            new_license_dic[license_server]['vendor_daemon'].setdefault(vendor_daemon, {'vendor_daemon_status': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_status'],
+                                                                                        'vendor_daemon_version': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_version'],
+                                                                                        'feature': {},
+                                                                                        'expires': license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires']})
 
-        for license_server in license_dic.keys():
-            for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
-                for feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].keys():
-                    for (i, usage_dic) in enumerate(license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info']):
-                        if (usage_dic[feature_usage_attribute] in feature_usage_attribute_value_list) or ('ALL' in feature_usage_attribute_value_list):
-                            if usage_dic[feature_usage_attribute] not in exact_feature_usage_attribute_value_list:
-                                exact_feature_usage_attribute_value_list.append(usage_dic[feature_usage_attribute])
-
-                        if self.fuzzy_mode:
-                            for feature_usage_attribute_value in feature_usage_attribute_value_list:
-                                if re.search(re.escape(feature_usage_attribute_value.lower()), usage_dic[feature_usage_attribute].lower()):
-                                    if usage_dic[feature_usage_attribute] not in exact_feature_usage_attribute_value_list:
-                                        fuzzy_feature_usage_attribute_value_list.append(usage_dic[feature_usage_attribute])
-
-        if exact_feature_usage_attribute_value_list:
-            filtered_feature_usage_attribute_value_list = exact_feature_usage_attribute_value_list
-        elif fuzzy_feature_usage_attribute_value_list:
-            filtered_feature_usage_attribute_value_list = fuzzy_feature_usage_attribute_value_list
-
-        # Filter by usage attribute.
-        new_license_dic = {}
-
-        if filtered_feature_usage_attribute_value_list:
-            for license_server in license_dic.keys():
-                for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
-                    for feature in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].keys():
-                        for (i, usage_dic) in enumerate(license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info']):
-                            if (usage_dic[feature_usage_attribute] in filtered_feature_usage_attribute_value_list) or ('ALL' in filtered_feature_usage_attribute_value_list):
-                                new_license_dic.setdefault(license_server, {'license_files': license_dic[license_server]['license_files'],
-                                                                            'license_server_status': license_dic[license_server]['license_server_status'],
-                                                                            'license_server_version': license_dic[license_server]['license_server_version'],
-                                                                            'vendor_daemon': {}})
-                                new_license_dic[license_server]['vendor_daemon'].setdefault(vendor_daemon, {'vendor_daemon_status': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_status'],
-                                                                                                            'vendor_daemon_version': license_dic[license_server]['vendor_daemon'][vendor_daemon]['vendor_daemon_version'],
-                                                                                                            'feature': {},
-                                                                                                            'expires': license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires']})
-                                new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].setdefault(feature, {'issued': license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['issued'],
-                                                                                                                                'in_use': license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use'],
-                                                                                                                                'in_use_info_string': [],
-                                                                                                                                'in_use_info': []})
-                                new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info_string'].append(license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info_string'][i])
-                                new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info'].append(usage_dic)
+            if feature not in new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature']:
+                new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature] = {'issued': license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['issued'],
+                                                                                                       'in_use': license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use'],
+                                                                                                       'in_use_info_string': [],
+                                                                                                       'in_use_info': []}
+                new_license_dic.usage_table.add_feature(license_server, vendor_daemon, feature)
+
+            new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info_string'].append(usage_table.line_list[row])
+            new_license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]['in_use_info'].append(usage_dic)
+            new_license_dic.usage_table.add_row(license_server, vendor_daemon, feature, usage_dic, usage_table.line_list[row])
 
         return new_license_dic
 
@@ -420,7 +841,7 @@ class FilterLicenseDic():
         Filter license_dic with show_mode.
         show_mode could be "IN_USE/NOT_USED" or "Expired/Nearly_Expired/Unexpired".
         """
-        new_license_dic = {}
+        new_license_dic = LicenseDic()
 
         for license_server in license_dic.keys():
             for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
@@ -494,6 +915,309 @@ class FilterLicenseDic():
         return filtered_license_dic
 
 
+# License usage database, it is written by "bsample -L" and read by bmonitor.
+# Feature samples are kept for LICENSE_DB_KEEP_DAYS days, usage records (big) are kept for LICENSE_DB_USAGE_KEEP_DAYS days.
+# Hourly rollups (feature in-use and user checkout number) are kept for LICENSE_DB_HOUR_KEEP_DAYS days.
+LICENSE_DB_KEEP_DAYS = 7
+LICENSE_DB_USAGE_KEEP_DAYS = 1
+LICENSE_DB_HOUR_KEEP_DAYS = 3650
+LICENSE_DB_TABLE_DIC = {'license_sample': '(sample_second INTEGER PRIMARY KEY, sample_time TEXT)',
+                        'license_server': '(sample_second INTEGER, server TEXT, license_files TEXT, server_status TEXT, server_version TEXT, vendor_daemon TEXT, vendor_daemon_status TEXT, vendor_daemon_version TEXT)',
+                        'license_feature': '(sample_second INTEGER, server TEXT, vendor_daemon TEXT, feature TEXT, issued TEXT, in_use TEXT)',
+                        'license_usage': '(sample_second INTEGER, server TEXT, vendor_daemon TEXT, feature TEXT, user TEXT, execute_host TEXT, submit_host TEXT, version TEXT, license_server TEXT, start_time TEXT, start_second INTEGER, license_num TEXT, line TEXT)',
+                        'license_expires': '(sample_second INTEGER, server TEXT, vendor_daemon TEXT, feature TEXT, version TEXT, license TEXT, vendor TEXT, expires TEXT)',
+                        'license_feature_hour': '(hour_second INTEGER, server TEXT, vendor_daemon TEXT, feature TEXT, issued TEXT, in_use_sum INTEGER, in_use_max INTEGER, sample_num INTEGER, PRIMARY KEY (server, vendor_daemon, feature, hour_second))',
+                        'license_user_hour': '(hour_second INTEGER, server TEXT, vendor_daemon TEXT, feature TEXT, user TEXT, license_num_max INTEGER, PRIMARY KEY (server, vendor_daemon, feature, user, hour_second))'}
+LICENSE_DB_INDEX_DIC = {'license_server_sample_second': 'license_server (sample_second)',
+                        'license_feature_sample_second': 'license_feature (sample_second)',
+                        'license_usage_sample_second': 'license_usage (sample_second)',
+                        'license_expires_sample_second': 'license_expires (sample_second)',
+                        'license_feature_hour_hour_second': 'license_feature_hour (hour_second)',
+                        'license_user_hour_hour_second': 'license_user_hour (hour_second)'}
+
+
+def get_license_db_row_dic(license_dic, sample_second):
+    """
+    Switch license_dic into {table_name: [row, ...]} for the sample tables of license database.
+    """
+    row_dic = {'license_server': [], 'license_feature': [], 'license_usage': [], 'license_expires': []}
+    start_second_dic = {}
+
+    for (license_server, license_server_dic) in license_dic.items():
+        if not license_server_dic['vendor_daemon']:
+            row_dic['license_server'].append((sample_second, license_server, license_server_dic['license_files'], license_server_dic['license_server_status'], license_server_dic['license_server_version'], None, None, None))
+
+        for (vendor_daemon, vendor_daemon_dic) in license_server_dic['vendor_daemon'].items():
+            row_dic['license_server'].append((sample_second, license_server, license_server_dic['license_files'], license_server_dic['license_server_status'], license_server_dic['license_server_version'], vendor_daemon, vendor_daemon_dic['vendor_daemon_status'], vendor_daemon_dic['vendor_daemon_version']))
+
+            for (feature, feature_dic) in vendor_daemon_dic['feature'].items():
+                row_dic['license_feature'].append((sample_second, license_server, vendor_daemon, feature, feature_dic['issued'], feature_dic['in_use']))
+
+                for (usage_dic, line) in zip(feature_dic['in_use_info'], feature_dic['in_use_info_string']):
+                    start_time = usage_dic['start_time']
+
+                    # start_second is saved for long runtime check, it is switched once for the same start_time.
+                    if start_time not in start_second_dic:
+                        try:
+                            start_second_dic[start_time] = switch_start_time_to_seconds(start_time)
+                        except ValueError:
+                            start_second_dic[start_time] = 0
+
+                    row_dic['license_usage'].append((sample_second, license_server, vendor_daemon, feature, usage_dic['user'], usage_dic['execute_host'], usage_dic['submit_host'], usage_dic['version'], usage_dic['license_server'], start_time, start_second_dic[start_time], usage_dic['license_num'], line))
+
+            for (feature, expire_dic_list) in vendor_daemon_dic['expires'].items():
+                for expire_dic in expire_dic_list:
+                    row_dic['license_expires'].append((sample_second, license_server, vendor_daemon, feature, expire_dic['version'], expire_dic['license'], expire_dic['vendor'], expire_dic['expires']))
+
+    return row_dic
+
+
+def update_license_db_rollup(curs, row_dic, sample_second):
+    """
+    Merge sample rows into hourly rollups (sum/max of feature in-use number, max of user checkout number) of current hour.
+    """
+    hour_second = sample_second - sample_second % 3600
+
+    # Feature in-use number.
+    feature_hour_dic = {}
+
+    for (license_server, vendor_daemon, feature, issued, in_use_sum, in_use_max, sample_num) in curs.execute('SELECT server, vendor_daemon, feature, issued, in_use_sum, in_use_max, sample_num FROM license_feature_hour WHERE hour_second=?', (hour_second,)).fetchall():
+        feature_hour_dic[(license_server, vendor_daemon, feature)] = [issued, in_use_sum, in_use_max, sample_num]
+
+    for row in row_dic['license_feature']:
+        in_use = int(row[5])
+        feature_hour_list = feature_hour_dic.setdefault((row[1], row[2], row[3]), [row[4], 0, 0, 0])
+        feature_hour_list[0] = row[4]
+        feature_hour_list[1] += in_use
+        feature_hour_list[2] = max(feature_hour_list[2], in_use)
+        feature_hour_list[3] += 1
+
+    curs.executemany('INSERT OR REPLACE INTO license_feature_hour VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [(hour_second,) + key + tuple(value) for (key, value) in feature_hour_dic.items()])
+
+    # User checkout number (reservations are not counted).
+    user_num_dic = {}
+
+    for row in row_dic['license_usage']:
+        if row[9] != 'RESERVATION':
+            key = (row[1], row[2], row[3], row[4])
+            user_num_dic[key] = user_num_dic.get(key, 0) + int(row[11])
+
+    user_hour_list = []
+
+    for (license_server, vendor_daemon, feature, user, license_num_max) in curs.execute('SELECT server, vendor_daemon, feature, user, license_num_max FROM license_user_hour WHERE hour_second=?', (hour_second,)).fetchall():
+        key = (license_server, vendor_daemon, feature, user)
+
+        if (key in user_num_dic) and (license_num_max > user_num_dic[key]):
+            user_num_dic[key] = license_num_max
+
+    for (key, license_num) in user_num_dic.items():
+        user_hour_list.append((hour_second,) + key + (license_num,))
+
+    curs.executemany('INSERT OR REPLACE INTO license_user_hour VALUES (?, ?, ?, ?, ?, ?)', user_hour_list)
+
+
+def save_license_dic(db_file, license_dic, sample_second):
+    """
+    Save license_dic into license database as a new sample (with sample_second), then update hourly rollups of feature in-use and user checkout numbers.
+    Return True if license database is updated.
+    """
+    (result, conn) = common_sqlite3.connect_db_file(db_file, mode='write')
+
+    if result != 'passed':
+        return False
+
+    try:
+        curs = conn.cursor()
+
+        for (table_name, init_string) in LICENSE_DB_TABLE_DIC.items():
+            curs.execute('CREATE TABLE IF NOT EXISTS ' + str(table_name) + ' ' + str(init_string))
+
+        for (index_name, index_string) in LICENSE_DB_INDEX_DIC.items():
+            curs.execute('CREATE INDEX IF NOT EXISTS ' + str(index_name) + ' ON ' + str(index_string))
+
+        # The same sample is not counted into rollups again.
+        row_dic = get_license_db_row_dic(license_dic, sample_second)
+
+        if not curs.execute('SELECT 1 FROM license_sample WHERE sample_second=?', (sample_second,)).fetchone():
+            update_license_db_rollup(curs, row_dic, sample_second)
+
+        # Insert sample rows, sample with the same sample_second is replaced.
+        curs.execute('INSERT OR REPLACE INTO license_sample VALUES (?, ?)', (sample_second, time.strftime('%Y%m%d_%H%M%S', time.localtime(sample_second))))
+
+        for (table_name, row_list) in row_dic.items():
+            curs.execute('DELETE FROM ' + str(table_name) + ' WHERE sample_second=?', (sample_second,))
+
+            if row_list:
+                curs.executemany('INSERT INTO ' + str(table_name) + ' VALUES (' + ', '.join(['?'] * len(row_list[0])) + ')', row_list)
+
+        # Clean up expired samples and rollups.
+        for table_name in ['license_sample', 'license_server', 'license_feature', 'license_expires']:
+            curs.execute('DELETE FROM ' + str(table_name) + ' WHERE sample_second<?', (sample_second - LICENSE_DB_KEEP_DAYS * 86400,))
+
+        curs.execute('DELETE FROM license_usage WHERE sample_second<?', (sample_second - LICENSE_DB_USAGE_KEEP_DAYS * 86400,))
+
+        for table_name in ['license_feature_hour', 'license_user_hour']:
+            curs.execute('DELETE FROM ' + str(table_name) + ' WHERE hour_second<?', (sample_second - LICENSE_DB_HOUR_KEEP_DAYS * 86400,))
+
+        curs.close()
+        conn.commit()
+    except sqlite3.Error as error:
+        common.bprint('Failed on saving license information into database file "' + str(db_file) + '".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+    return True
+
+
+def get_license_db_sample_second(db_file):
+    """
+    Get the latest sample_second on license database, return 0 if there is no sample.
+    """
+    sample_second = 0
+
+    if os.path.exists(db_file):
+        (result, conn) = common_sqlite3.connect_db_file(db_file, mode='read')
+
+        if result == 'passed':
+            try:
+                (sample_second,) = conn.execute('SELECT MAX(sample_second) FROM license_sample').fetchone()
+            except sqlite3.Error:
+                pass
+            finally:
+                conn.close()
+
+    return sample_second or 0
+
+
+def load_license_dic(db_file, sample_second=0):
+    """
+    Load license_dic (LicenseDic with usage_table) of sample_second (the latest sample by default) from license database.
+    """
+    license_dic = LicenseDic()
+    license_dic.usage_table = LicenseUsageTable()
+
+    if not sample_second:
+        sample_second = get_license_db_sample_second(db_file)
+
+        if not sample_second:
+            return license_dic
+
+    (result, conn) = common_sqlite3.connect_db_file(db_file, mode='read')
+
+    if result != 'passed':
+        return license_dic
+
+    try:
+        curs = conn.cursor()
+
+        for (license_server, license_files, license_server_status, license_server_version, vendor_daemon, vendor_daemon_status, vendor_daemon_version) in curs.execute('SELECT server, license_files, server_status, server_version, vendor_daemon, vendor_daemon_status, vendor_daemon_version FROM license_server WHERE sample_second=? ORDER BY rowid', (sample_second,)):
+            license_dic.setdefault(license_server, {'license_files': license_files,
+                                                    'license_server_status': license_server_status,
+                                                    'license_server_version': license_server_version,
+                                                    'vendor_daemon': {}})
+
+            if vendor_daemon is not None:
+                license_dic[license_server]['vendor_daemon'][vendor_daemon] = {'vendor_daemon_status': vendor_daemon_status,
+                                                                               'vendor_daemon_version': vendor_daemon_version,
+                                                                               'feature': {},
+                                                                               'expires': {}}
+
+        for (license_server, vendor_daemon, feature, issued, in_use) in curs.execute('SELECT server, vendor_daemon, feature, issued, in_use FROM license_feature WHERE sample_second=? ORDER BY rowid', (sample_second,)):
+            license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature] = {'issued': issued,
+                                                                                              'in_use': in_use,
+                                                                                              'in_use_info_string': [],
+                                                                                              'in_use_info': []}
+            license_dic.usage_table.add_feature(license_server, vendor_daemon, feature)
+
+        for (license_server, vendor_daemon, feature, user, execute_host, submit_host, version, usage_license_server, start_time, license_num, line) in curs.execute('SELECT server, vendor_daemon, feature, user, execute_host, submit_host, version, license_server, start_time, license_num, line FROM license_usage WHERE sample_second=? ORDER BY rowid', (sample_second,)):
+            usage_dic = {'user': user,
+                         'execute_host': execute_host,
+                         'submit_host': submit_host,
+                         'version': version,
+                         'license_server': usage_license_server,
+                         'start_time': start_time,
+                         'license_num': license_num}
+            feature_dic = license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]
+            feature_dic['in_use_info_string'].append(line)
+            feature_dic['in_use_info'].append(usage_dic)
+            license_dic.usage_table.add_row(license_server, vendor_daemon, feature, usage_dic, line)
+
+        for (license_server, vendor_daemon, feature, version, license, vendor, expires) in curs.execute('SELECT server, vendor_daemon, feature, version, license, vendor, expires FROM license_expires WHERE sample_second=? ORDER BY rowid', (sample_second,)):
+            license_dic[license_server]['vendor_daemon'][vendor_daemon]['expires'].setdefault(feature, []).append({'version': version,
+                                                                                                                  'license': license,
+                                                                                                                  'vendor': vendor,
+                                                                                                                  'expires': expires})
+
+        curs.close()
+    except sqlite3.Error as error:
+        common.bprint('Failed on loading license information from database file "' + str(db_file) + '".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        conn.close()
+
+    return license_dic
+
+
+def get_license_feature_history(db_file, license_server, vendor_daemon, feature, begin_second, end_second):
+    """
+    Get hourly in-use history of license feature from license database.
+    Return {'hour_second': [], 'issued': [], 'in_use_avg': [], 'in_use_max': []}.
+    """
+    history_dic = {'hour_second': [], 'issued': [], 'in_use_avg': [], 'in_use_max': []}
+
+    if not os.path.exists(db_file):
+        return history_dic
+
+    (result, conn) = common_sqlite3.connect_db_file(db_file, mode='read')
+
+    if result != 'passed':
+        return history_dic
+
+    try:
+        for (hour_second, issued, in_use_sum, in_use_max, sample_num) in conn.execute('SELECT hour_second, issued, in_use_sum, in_use_max, sample_num FROM license_feature_hour WHERE server=? AND vendor_daemon=? AND feature=? AND hour_second>=? AND hour_second<=? ORDER BY hour_second', (license_server, vendor_daemon, feature, begin_second, end_second)):
+            history_dic['hour_second'].append(hour_second)
+            history_dic['issued'].append(issued)
+            history_dic['in_use_avg'].append(round(in_use_sum / sample_num, 1))
+            history_dic['in_use_max'].append(in_use_max)
+    except sqlite3.Error as error:
+        common.bprint('Failed on getting license feature history from database file "' + str(db_file) + '".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        conn.close()
+
+    return history_dic
+
+
+def get_license_user_history(db_file, license_server, vendor_daemon, feature, begin_second, end_second):
+    """
+    Get the max checkout license number of every user for license feature from license database.
+    Return {user: license_num_max}, sorted by license_num_max.
+    """
+    user_dic = {}
+
+    if not os.path.exists(db_file):
+        return user_dic
+
+    (result, conn) = common_sqlite3.connect_db_file(db_file, mode='read')
+
+    if result != 'passed':
+        return user_dic
+
+    try:
+        for (user, license_num_max) in conn.execute('SELECT user, MAX(license_num_max) AS num FROM license_user_hour WHERE server=? AND vendor_daemon=? AND feature=? AND hour_second>=? AND hour_second<=? GROUP BY user ORDER BY num DESC', (license_server, vendor_daemon, feature, begin_second, end_second)):
+            user_dic[user] = license_num_max
+    except sqlite3.Error as error:
+        common.bprint('Failed on getting license user history from database file "' + str(db_file) + '".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        conn.close()
+
+    return user_dic
+
+
 def switch_start_time(start_time, compare_second='', format=''):
     """
     Switch start_time format from "%a %m/%d %H:%M" to specified format (or start_second by default).
@@ -539,6 +1263,14 @@ def switch_expires_date(expires_date):
     return new_expires_date
 
 
+@functools.lru_cache(maxsize=65536)
+def get_time_seconds(time_string, time_format):
+    """
+    Switch time_string into seconds format from 1970, the result is cached because the same times repeat on lmstat output.
+    """
+    return int(time.mktime(time.strptime(time_string, time_format)))
+
+
 def switch_start_time_to_seconds(start_time):
     """
     Switch start_time (on lmstat output) into seconds format from 1970.
@@ -548,13 +1280,13 @@ def switch_start_time_to_seconds(start_time):
     if start_time and (start_time != 'N/A') and (start_time != 'RESERVATION'):
         current_year = datetime.date.today().year
         start_time_with_year = str(current_year) + ' ' + str(start_time)
-        start_seconds = int(time.mktime(time.strptime(start_time_with_year, '%Y %a %m/%d %H:%M')))
+        start_seconds = get_time_seconds(start_time_with_year, '%Y %a %m/%d %H:%M')
         current_seconds = int(time.time())
 
         if start_seconds > current_seconds:
             current_year = int(datetime.date.today().year) - 1
             start_time_with_year = str(current_year) + ' ' + str(start_time)
-            start_seconds = int(time.mktime(time.strptime(start_time_with_year, '%Y %a %m/%d %H:%M')))
+            start_seconds = get_time_seconds(start_time_with_year, '%Y %a %m/%d %H:%M')
 
     return start_seconds
 
@@ -583,7 +1315,7 @@ def check_expire_date(expire_date, second_threshold=1209600):
         return 0
     else:
         try:
-            expire_seconds = int(time.mktime(time.strptime(expire_date, '%d-%b-%Y')))
+            expire_seconds = get_time_seconds(expire_date, '%d-%b-%Y')
         except Exception as warning:
             common.bprint('Failed to parse expire_data "' + str(expire_date) + '": ' + str(warning), level='Warning')
             return 0
@@ -7,6 +7,11 @@ import collections
 
 sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
+from common import common_scheduler
+
+# Queue/host group membership is got once and cached for LSF_INFO_CACHE_TTL seconds, {name: (update_second, info)}.
+LSF_INFO_CACHE_TTL = 300
+LSF_INFO_CACHE_DIC = {}
 
 
 def get_command_dict(command):
@@ -16,7 +21,7 @@ def get_command_dict(command):
     """
     my_dic = collections.OrderedDict()
     key_list = []
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
     i = -1
 
     for line in str(stdout, 'utf-8').split('\n'):
@@ -88,7 +93,7 @@ def get_bjobs_info(command='bjobs -u all -w'):
     """
     bjobs_dic = {}
     key_list = []
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
     i = -1
 
     for line in str(stdout, 'utf-8').split('\n'):
@@ -139,7 +144,7 @@ def get_bhosts_load_info(command='bhosts -l'):
     hostname = ''
     head_list = []
 
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -224,7 +229,7 @@ def get_lsid_info():
     tool_version = ''
     cluster = ''
     master = ''
-    (return_code, stdout, stderr) = common.run_command('lsid')
+    (return_code, stdout, stderr) = common_scheduler.run_command('lsid')
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -334,7 +339,7 @@ def get_lsf_bjobs_uf_info(command):
             for line in LJDF.readlines():
                 line_list.append(line.strip())
     else:
-        (return_code, stdout, stderr) = common.run_command(command)
+        (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
         for line in stdout.decode('utf-8', 'ignore').split('\n'):
             line_list.append(line.strip())
@@ -619,7 +624,7 @@ def get_openlava_bjobs_uf_info(command):
     my_dic = collections.OrderedDict()
     job = ''
 
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -780,35 +785,96 @@ def get_queue_list():
     return queue_list
 
 
-def get_host_group_members(host_group_name):
+def get_host_group_info(command='bmgroup -w'):
     """
-    Get host group members with bmgroup.
+    Get all of the host groups with one bmgroup command, nested host groups are expanded in memory.
     ====
-    [yanqing.li@nxnode03 lsfMonitor]$ bmgroup pd
+    [yanqing.li@nxnode03 lsfMonitor]$ bmgroup -w
     GROUP_NAME    HOSTS
     pd           dm006 dm007 dm010 dm009 dm002 dm003 dm005
+    pd_all       pd/ dm011 ~dm003
     ====
+    Return {host_group_name: [host, ...]}.
     """
-    host_list = []
-    command = 'bmgroup -w -r ' + str(host_group_name)
-    (return_code, stdout, stderr) = common.run_command(command)
+    member_dic = {}
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
-        line = line.strip()
+        line_list = line.split()
 
-        if re.search(r'No such user/host group', line):
-            break
-        elif re.match(r'^' + str(host_group_name) + ' .*$', line):
-            line_list = line.split()
+        if (not line_list) or (line_list[0] == 'GROUP_NAME') or re.search(r'No such user/host group', line):
+            continue
 
-            for (i, host) in enumerate(line_list):
-                if i >= 1:
-                    if host == '(':
-                        break
+        member_dic[line_list[0]] = []
+
+        for member in line_list[1:]:
+            # Group admin, such as "(yanqing.li)".
+            if member.startswith('('):
+                break
+
+            member_dic[line_list[0]].append(member)
+
+    host_group_dic = {}
+    all_host_list = []
+
+    def expand_host_group(host_group_name, path_list):
+        if host_group_name not in host_group_dic:
+            host_list = []
+            exclude_host_set = set()
+
+            for member in member_dic[host_group_name]:
+                exclude_mark = member.startswith('~')
+                member = member.lstrip('~')
+                sub_host_group_name = re.sub(r'/$', '', member)
+
+                if sub_host_group_name in member_dic:
+                    # Host group loop is ignored.
+                    if sub_host_group_name in path_list:
+                        member_host_list = []
                     else:
-                        host_list.append(host)
+                        member_host_list = expand_host_group(sub_host_group_name, path_list + [sub_host_group_name])
+                elif member == 'all':
+                    if not all_host_list:
+                        all_host_list.extend(get_host_list())
 
-    return host_list
+                    member_host_list = all_host_list
+                else:
+                    member_host_list = [member]
+
+                if exclude_mark:
+                    exclude_host_set.update(member_host_list)
+                else:
+                    host_list.extend(member_host_list)
+
+            host_group_dic[host_group_name] = [host for host in dict.fromkeys(host_list) if host not in exclude_host_set]
+
+        return host_group_dic[host_group_name]
+
+    for host_group_name in member_dic.keys():
+        expand_host_group(host_group_name, [host_group_name])
+
+    return host_group_dic
+
+
+def get_cached_info(name, function, cache_ttl=LSF_INFO_CACHE_TTL):
+    """
+    Get information with function, the result is cached (on LSF_INFO_CACHE_DIC) for cache_ttl seconds.
+    """
+    current_second = time.time()
+
+    if (name not in LSF_INFO_CACHE_DIC) or (current_second - LSF_INFO_CACHE_DIC[name][0] > cache_ttl):
+        LSF_INFO_CACHE_DIC[name] = (current_second, function())
+
+    return LSF_INFO_CACHE_DIC[name][1]
+
+
+def get_host_group_members(host_group_name, cache_ttl=LSF_INFO_CACHE_TTL):
+    """
+    Get host group members (with nested host groups expanded), return [] if host_group_name is not a host group.
+    """
+    host_group_dic = get_cached_info('host_group', get_host_group_info, cache_ttl)
+
+    return list(host_group_dic.get(host_group_name, []))
 
 
 def get_user_group_members(user_group_name):
@@ -822,7 +888,7 @@ def get_user_group_members(user_group_name):
     """
     user_list = []
     command = 'bugroup -r ' + str(user_group_name)
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -840,79 +906,87 @@ def get_user_group_members(user_group_name):
     return user_list
 
 
-def get_queue_host_info():
+def get_queue_host_map(cache_ttl=LSF_INFO_CACHE_TTL):
     """
-    Get hosts on (specified) queues.
+    Get queue->hosts and host->queues mapping with one "bqueues -l" and one "bmgroup -w".
+    Return (queue_host_dic, host_queue_dic), it is cached for cache_ttl seconds.
     """
-    queue_host_dic = {}
-    queue_compile = re.compile(r'^QUEUE:\s*(\S+)\s*$')
-    hosts_compile = re.compile(r'^HOSTS:\s*(.*?)\s*$')
-    hosts_all_compile = re.compile(r'\ball\b')
-    queue = ''
-
-    command = 'bqueues -l'
-    (return_code, stdout, stderr) = common.run_command(command)
-
-    for line in str(stdout, 'utf-8').split('\n'):
-        line = line.strip()
+    def get_map():
+        host_group_dic = get_cached_info('host_group', get_host_group_info, cache_ttl)
+        queue_host_dic = {}
+        queue_compile = re.compile(r'^QUEUE:\s*(\S+)\s*$')
+        hosts_compile = re.compile(r'^HOSTS:\s*(.*?)\s*$')
+        hosts_all_compile = re.compile(r'\ball\b')
+        queue = ''
+
+        command = 'bqueues -l'
+        (return_code, stdout, stderr) = common_scheduler.run_command(command)
+
+        for line in str(stdout, 'utf-8').split('\n'):
+            line = line.strip()
+
+            if queue_compile.match(line):
+                my_match = queue_compile.match(line)
+                queue = my_match.group(1)
+                queue_host_dic[queue] = []
+
+            if hosts_compile.match(line):
+                my_match = hosts_compile.match(line)
+                hosts_string = my_match.group(1)
+
+                if hosts_all_compile.search(hosts_string):
+                    common.bprint('Queue "' + str(queue) + '" is not well configured, all of the hosts are on the same queue.', level='Warning')
+                    queue_host_dic[queue] = get_host_list()
+                else:
+                    queue_host_dic.setdefault(queue, [])
+                    hosts_list = hosts_string.split()
+
+                    for hosts in hosts_list:
+                        if re.match(r'.+/', hosts):
+                            host_group_name = re.sub(r'/$', '', hosts)
+                            host_list = host_group_dic.get(host_group_name, [])
+
+                            if len(host_list) > 0:
+                                queue_host_dic[queue].extend(host_list)
+                        elif re.match(r'^(.+)\+\d+$', hosts):
+                            my_match = re.match(r'^(.+)\+\d+$', hosts)
+                            host_group_name = my_match.group(1)
+                            host_list = host_group_dic.get(host_group_name, [])
+
+                            if len(host_list) == 0:
+                                queue_host_dic[queue].append(hosts)
+                            else:
+                                queue_host_dic[queue].extend(host_list)
+                        else:
+                            queue_host_dic[queue].append(hosts)
 
-        if queue_compile.match(line):
-            my_match = queue_compile.match(line)
-            queue = my_match.group(1)
-            queue_host_dic[queue] = []
+        host_queue_dic = {}
 
-        if hosts_compile.match(line):
-            my_match = hosts_compile.match(line)
-            hosts_string = my_match.group(1)
+        for (queue, host_list) in queue_host_dic.items():
+            for host in host_list:
+                host_queue_dic.setdefault(host, []).append(queue)
 
-            if hosts_all_compile.search(hosts_string):
-                common.bprint('Queue "' + str(queue) + '" is not well configured, all of the hosts are on the same queue.', level='Warning')
-                queue_host_dic[queue] = get_host_list()
-            else:
-                queue_host_dic.setdefault(queue, [])
-                hosts_list = hosts_string.split()
-
-                for hosts in hosts_list:
-                    if re.match(r'.+/', hosts):
-                        host_group_name = re.sub(r'/$', '', hosts)
-                        host_list = get_host_group_members(host_group_name)
-
-                        if len(host_list) > 0:
-                            queue_host_dic[queue].extend(host_list)
-                    elif re.match(r'^(.+)\+\d+$', hosts):
-                        my_match = re.match(r'^(.+)\+\d+$', hosts)
-                        host_group_name = my_match.group(1)
-                        host_list = get_host_group_members(host_group_name)
-
-                        if len(host_list) == 0:
-                            queue_host_dic[queue].append(hosts)
-                        else:
-                            queue_host_dic[queue].extend(host_list)
-                    else:
-                        queue_host_dic[queue].append(hosts)
+        return queue_host_dic, host_queue_dic
 
-    return queue_host_dic
+    return get_cached_info('queue_host', get_map, cache_ttl)
 
 
-def get_host_queue_info():
+def get_queue_host_info(cache_ttl=LSF_INFO_CACHE_TTL):
     """
-    Get queues which (specified) host belongs to.
+    Get hosts on (specified) queues.
     """
-    host_queue_dic = {}
+    (queue_host_dic, host_queue_dic) = get_queue_host_map(cache_ttl)
 
-    queue_host_dic = get_queue_host_info()
-    queue_list = list(queue_host_dic.keys())
+    return {queue: list(host_list) for (queue, host_list) in queue_host_dic.items()}
 
-    for queue in queue_list:
-        host_list = queue_host_dic[queue]
 
-        for host in host_list:
-            if host in host_queue_dic.keys():
-                host_queue_dic[host].append(queue)
-            else:
-                host_queue_dic[host] = [queue, ]
+def get_host_queue_info(cache_ttl=LSF_INFO_CACHE_TTL):
+    """
+    Get queues which (specified) host belongs to.
+    """
+    (queue_host_dic, host_queue_dic) = get_queue_host_map(cache_ttl)
 
-    return host_queue_dic
+    return {host: list(queue_list) for (host, queue_list) in host_queue_dic.items()}
 
 
 def get_lsf_unit_for_limits():
@@ -922,7 +996,7 @@ def get_lsf_unit_for_limits():
     lsf_unit_for_limits = 'MB'
     command = 'badmin showconf mbd all'
 
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = common_scheduler.run_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -0,0 +1,746 @@
+import os
+import re
+import sys
+import json
+import time
+import shlex
+import random
+import getpass
+import threading
+import subprocess
+import collections
+
+sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+from common import common
+
+# Scheduler backend is selected with environment variable, "lsf" (default) or "sim".
+SCHEDULER_BACKEND_ENV = 'LSFMONITOR_SCHEDULER_BACKEND'
+# Simulator settings (SimBackend arguments), json string or json file.
+SCHEDULER_SIM_CONFIG_ENV = 'LSFMONITOR_SCHEDULER_SIM_CONFIG'
+
+SCHEDULER_BACKEND = None
+SCHEDULER_BACKEND_LOCK = threading.Lock()
+
+
+def get_table_dic(stdout):
+    """
+    Parse Title-Item type command output (such as "bqueues -w") into {title: [item, ...]}.
+    """
+    table_dic = collections.OrderedDict()
+    key_list = []
+
+    for line in str(stdout, 'utf-8').split('\n'):
+        line_list = line.split()
+
+        if not line_list:
+            continue
+
+        if not key_list:
+            key_list = line_list
+
+            for key in key_list:
+                table_dic[key] = []
+        else:
+            for (i, key) in enumerate(key_list):
+                table_dic[key].append(line_list[i] if i < len(line_list) else '')
+
+    return table_dic
+
+
+def get_jobid(line):
+    """
+    Get jobid from bsub output line "Job <29920> is submitted to queue <normal>.".
+    """
+    my_match = re.search(r'Job <(\d+)> is submitted', line)
+
+    if my_match:
+        return my_match.group(1)
+
+    return ''
+
+
+class SchedulerBackend():
+    """
+    Interface of job scheduler.
+    * submit      : Submit bsub command, return a process handle with pid/returncode/poll()/wait()/communicate()/get_jobid().
+    * status_many : Get {jobid: STAT} (PEND/RUN/DONE/EXIT/...) of jobs with one query.
+    * kill_many   : Kill jobs with one command.
+    * queues      : Get queue info as {title: [item, ...]}, titles are the same as "bqueues -w".
+    * hosts       : Get host info as {title: [item, ...]}, titles are the same as "bhosts -w".
+    * load        : Get host load as {title: [item, ...]}, titles are the same as "lsload -w".
+    * run_command : Run LSF query command, return (return_code, stdout, stderr), the output parsers on common_lsf read it.
+    """
+    name = ''
+
+    def submit(self, command):
+        raise NotImplementedError
+
+    def status_many(self, job_list):
+        raise NotImplementedError
+
+    def kill_many(self, job_list):
+        raise NotImplementedError
+
+    def queues(self):
+        raise NotImplementedError
+
+    def hosts(self):
+        raise NotImplementedError
+
+    def load(self):
+        raise NotImplementedError
+
+    def run_command(self, command):
+        raise NotImplementedError
+
+
+class LsfJobProcess():
+    """
+    Process handle of bsub command, bsub prints jobid on the first stdout line.
+    """
+    def __init__(self, command):
+        self.process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.pid = self.process.pid
+        self.first_line = None
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    def get_jobid(self, timeout=None):
+        if self.first_line is None:
+            self.first_line = self.process.stdout.readline()
+
+        return get_jobid(self.first_line.decode('utf-8', errors='replace'))
+
+    def poll(self):
+        return self.process.poll()
+
+    def wait(self, timeout=None):
+        return self.process.wait(timeout)
+
+    def communicate(self):
+        (stdout, stderr) = self.process.communicate()
+
+        return ((self.first_line or b'') + stdout, stderr)
+
+
+class LsfBackend(SchedulerBackend):
+    """
+    LSF/Openlava, all operations are LSF commands.
+    """
+    name = 'lsf'
+
+    def submit(self, command):
+        return LsfJobProcess(command)
+
+    def status_many(self, job_list):
+        job_status_dic = {}
+
+        if job_list:
+            (return_code, stdout, stderr) = self.run_command('bjobs -w -a ' + ' '.join([str(job) for job in job_list]))
+
+            for line in str(stdout, 'utf-8').split('\n'):
+                my_match = re.match(r'^\s*(\d+(\[\d+\])?)\s+\S+\s+([A-Z]+)\s', line)
+
+                if my_match:
+                    job_status_dic[my_match.group(1)] = my_match.group(3)
+
+        return job_status_dic
+
+    def kill_many(self, job_list):
+        if not job_list:
+            return 0
+
+        (return_code, stdout, stderr) = self.run_command('bkill ' + ' '.join([str(job) for job in job_list]))
+
+        return return_code
+
+    def queues(self):
+        return get_table_dic(self.run_command('bqueues -w')[1])
+
+    def hosts(self):
+        return get_table_dic(self.run_command('bhosts -w')[1])
+
+    def load(self):
+        return get_table_dic(self.run_command('lsload -w')[1].replace(b'*', b' '))
+
+    def run_command(self, command):
+        return common.run_command(command)
+
+
+class SimJob():
+    """
+    One simulated job.
+    """
+    def __init__(self, jobid, user, queue, slot_num, mem, command, job_name, run_second, exit_code, submit_second):
+        self.jobid = jobid
+        self.user = user
+        self.queue = queue
+        self.slot_num = slot_num
+        self.mem = mem
+        self.command = command
+        self.job_name = job_name
+        self.run_second = run_second
+        self.exit_code = exit_code
+        self.submit_second = submit_second
+        self.start_second = None
+        self.finish_second = None
+        self.host = ''
+        self.status = 'PEND'
+        self.killed = False
+
+
+class SimJobProcess():
+    """
+    Process handle of simulated job, it works like "bsub -I", wait()/communicate() return after the job is finished.
+    """
+    def __init__(self, backend, job, poll_second=0.05):
+        self.backend = backend
+        self.job = job
+        self.poll_second = poll_second
+        self.pid = None
+
+    @property
+    def returncode(self):
+        if self.job.status in ['DONE', 'EXIT']:
+            return self.job.exit_code
+
+        return None
+
+    def get_jobid(self, timeout=None):
+        return str(self.job.jobid)
+
+    def poll(self):
+        self.backend.update()
+        return self.returncode
+
+    def wait(self, timeout=None):
+        start_second = time.time()
+
+        while self.poll() is None:
+            if (timeout is not None) and (time.time() - start_second >= timeout):
+                break
+
+            time.sleep(self.poll_second)
+
+        return self.returncode
+
+    def communicate(self):
+        self.wait()
+        stdout = 'Job <' + str(self.job.jobid) + '> is submitted to queue <' + str(self.job.queue) + '>.\n'
+
+        return (stdout.encode('utf-8'), b'')
+
+
+class SimBackend(SchedulerBackend):
+    """
+    Deterministic in-process LSF simulator, job commands are not executed.
+    Pending jobs are dispatched (FIFO) after the queue delay onto the first queue host with enough free slots, then finish after run_second.
+    Job failures are drawn from random.Random(seed) on submit, so the same submit sequence on the same clock gets the same result.
+    * host_dic   : {host: slot_num}, default is 4 hosts with 8 slots.
+    * queue_dic  : {queue: {'delay': second, 'hosts': [host, ...], 'run_second': second, 'fail_rate': rate}}, default is queue "normal" on all hosts.
+    * run_second : Default job run time.
+    * fail_rate  : Default job failure rate.
+    * job_num    : Number of background jobs which are submitted on start, they give monitors something to show.
+    * clock      : Time function, a manual clock steps the simulation for benchmarks.
+    LSF query commands (lsid/bjobs/bqueues/bhosts/lsload/lshosts/busers/bmgroup/bugroup/badmin/bkill/bsub) get LSF format output from run_command.
+    """
+    name = 'sim'
+
+    def __init__(self, host_dic=None, queue_dic=None, run_second=1.0, fail_rate=0.0, seed=0, job_num=0, cluster='sim_cluster', clock=time.time):
+        self.host_dic = collections.OrderedDict(host_dic or [('sim' + str(i).zfill(2), 8) for i in range(1, 5)])
+        self.queue_dic = collections.OrderedDict(queue_dic or {'normal': {}})
+        self.run_second = run_second
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.cluster = cluster
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.user = getpass.getuser()
+
+        for queue_setting_dic in self.queue_dic.values():
+            queue_setting_dic.setdefault('hosts', list(self.host_dic.keys()))
+
+        self.job_dic = collections.OrderedDict()
+        self.pending_job_list = []
+        self.running_job_list = []
+        self.free_slot_dic = dict(self.host_dic)
+        self.sim_second = self.clock()
+
+        queue_list = list(self.queue_dic.keys())
+
+        for i in range(job_num):
+            run_second = self.queue_dic[queue_list[i % len(queue_list)]].get('run_second', self.run_second)
+            self.add_job('user' + str(i % 10), queue_list[i % len(queue_list)], 1 + (i % 4), 100 * (1 + (i % 8)), 'sleep ' + str(run_second), job_name='sim_job_' + str(i + 1), run_second=run_second * self.random.uniform(0.5, 1.5))
+
+        self.update()
+
+    def add_job(self, user, queue, slot_num, mem, command, job_name='', run_second=None):
+        queue_setting_dic = self.queue_dic.get(queue, {})
+
+        if run_second is None:
+            run_second = queue_setting_dic.get('run_second', self.run_second)
+
+        exit_code = 1 if (self.random.random() < queue_setting_dic.get('fail_rate', self.fail_rate)) else 0
+        jobid = len(self.job_dic) + 1
+        # bjobs (table) output is split by white space, so the default job name is the first token of the command.
+        job_name = job_name or (command.split() or ['sim_job_' + str(jobid)])[0]
+        job = SimJob(jobid, user, queue, slot_num, mem, command, job_name, run_second, exit_code, self.sim_second)
+        self.job_dic[jobid] = job
+        self.pending_job_list.append(job)
+        self.dispatch()
+
+        return job
+
+    def dispatch(self):
+        """
+        Start pending jobs which are out of queue delay on sim_second.
+        """
+        if not any(self.free_slot_dic.values()):
+            return
+
+        pending_job_list = []
+
+        for job in self.pending_job_list:
+            if job.submit_second + self.queue_dic.get(job.queue, {}).get('delay', 0) <= self.sim_second:
+                for host in self.queue_dic.get(job.queue, {}).get('hosts', []):
+                    if self.free_slot_dic.get(host, 0) >= job.slot_num:
+                        self.free_slot_dic[host] -= job.slot_num
+                        job.host = host
+                        job.status = 'RUN'
+                        job.start_second = self.sim_second
+                        self.running_job_list.append(job)
+                        break
+
+            if job.status == 'PEND':
+                pending_job_list.append(job)
+
+        self.pending_job_list = pending_job_list
+
+    def finish(self, job, status):
+        self.free_slot_dic[job.host] += job.slot_num
+        self.running_job_list.remove(job)
+        job.status = status
+        job.finish_second = self.sim_second
+
+    def update(self):
+        """
+        Simulate from sim_second to current clock event by event (job start / job finish / queue delay end).
+        """
+        with self.lock:
+            current_second = self.clock()
+
+            while True:
+                next_second_list = [job.start_second + job.run_second for job in self.running_job_list]
+                next_second_list.extend([job.submit_second + self.queue_dic.get(job.queue, {}).get('delay', 0) for job in self.pending_job_list])
+                next_second_list = [second for second in next_second_list if second > self.sim_second]
+
+                if (not next_second_list) or (min(next_second_list) > current_second):
+                    break
+
+                self.sim_second = min(next_second_list)
+
+                for job in list(self.running_job_list):
+                    if job.start_second + job.run_second <= self.sim_second:
+                        self.finish(job, 'EXIT' if job.exit_code else 'DONE')
+
+                self.dispatch()
+
+            self.sim_second = max(self.sim_second, current_second)
+
+    def submit(self, command):
+        """
+        Submit bsub command, "-q/-n/-J/-R rusage[mem=*]" settings are used.
+        """
+        bsub_option_list = get_bsub_option_list(command)
+        option_dic = {'-q': list(self.queue_dic.keys())[0], '-n': '1', '-J': '', '-R': ''}
+        job_command = ''
+        i = 0
+
+        while i < len(bsub_option_list):
+            option = bsub_option_list[i]
+
+            if (option in option_dic) and (i + 1 < len(bsub_option_list)):
+                option_dic[option] = bsub_option_list[i + 1]
+                i += 2
+                continue
+            elif not option.startswith('-'):
+                job_command = ' '.join(bsub_option_list[i:])
+                break
+
+            i += 1
+
+        my_match = re.search(r'rusage\[mem=(\d+)', option_dic['-R'])
+        mem = int(my_match.group(1)) if my_match else 100
+
+        with self.lock:
+            self.update()
+            job = self.add_job(self.user, option_dic['-q'], int(option_dic['-n']) if option_dic['-n'].isdigit() else 1, mem, job_command, job_name=option_dic['-J'])
+
+        return SimJobProcess(self, job)
+
+    def status_many(self, job_list):
+        self.update()
+
+        return {str(job): self.job_dic[int(job)].status for job in job_list if str(job).isdigit() and (int(job) in self.job_dic)}
+
+    def kill_many(self, job_list):
+        with self.lock:
+            self.update()
+
+            for job in job_list:
+                if str(job).isdigit() and (int(job) in self.job_dic):
+                    job = self.job_dic[int(job)]
+
+                    if job.status == 'PEND':
+                        self.pending_job_list.remove(job)
+                        job.status = 'EXIT'
+                        job.finish_second = self.sim_second
+                    elif job.status == 'RUN':
+                        self.finish(job, 'EXIT')
+                        self.dispatch()
+                    else:
+                        continue
+
+                    job.exit_code = 130
+                    job.killed = True
+
+        return 0
+
+    def queues(self):
+        self.update()
+        queue_info_dic = collections.OrderedDict()
+
+        for title in ['QUEUE_NAME', 'PRIO', 'STATUS', 'MAX', 'JL/U', 'JL/P', 'JL/H', 'NJOBS', 'PEND', 'RUN', 'SUSP', 'RSV', 'PJOBS']:
+            queue_info_dic[title] = []
+
+        for queue in self.queue_dic.keys():
+            pend_num = sum([job.slot_num for job in self.pending_job_list if job.queue == queue])
+            run_num = sum([job.slot_num for job in self.running_job_list if job.queue == queue])
+            pjob_num = len([job for job in self.pending_job_list if job.queue == queue])
+
+            for (title, value) in zip(queue_info_dic.keys(), [queue, 30, 'Open:Active', '-', '-', '-', '-', pend_num + run_num, pend_num, run_num, 0, 0, pjob_num]):
+                queue_info_dic[title].append(str(value))
+
+        return queue_info_dic
+
+    def hosts(self):
+        self.update()
+        host_info_dic = collections.OrderedDict()
+
+        for title in ['HOST_NAME', 'STATUS', 'JL/U', 'MAX', 'NJOBS', 'RUN', 'SSUSP', 'USUSP', 'RSV']:
+            host_info_dic[title] = []
+
+        for (host, slot_num) in self.host_dic.items():
+            run_num = slot_num - self.free_slot_dic[host]
+
+            for (title, value) in zip(host_info_dic.keys(), [host, 'closed' if run_num >= slot_num else 'ok', '-', slot_num, run_num, run_num, 0, 0, 0]):
+                host_info_dic[title].append(str(value))
+
+        return host_info_dic
+
+    def load(self):
+        """
+        Host load is got from used slots, every slot has 4G memory.
+        """
+        self.update()
+        load_info_dic = collections.OrderedDict()
+
+        for title in ['HOST_NAME', 'status', 'r15s', 'r1m', 'r15m', 'ut', 'pg', 'ls', 'it', 'tmp', 'swp', 'mem']:
+            load_info_dic[title] = []
+
+        for (host, slot_num) in self.host_dic.items():
+            run_num = slot_num - self.free_slot_dic[host]
+            used_mem = sum([job.mem for job in self.running_job_list if job.host == host])
+            free_mem = max(0, slot_num * 4096 - used_mem) / 1024
+
+            for (title, value) in zip(load_info_dic.keys(), [host, 'ok', float(run_num), float(run_num), float(run_num), str(int(100 * run_num / slot_num)) + '%', 0.0, 0, 0, '100G', '8G', '%.1fG' % free_mem]):
+                load_info_dic[title].append(str(value))
+
+        return load_info_dic
+
+    def run_command(self, command):
+        """
+        Get LSF format output of query command from simulation.
+        """
+        try:
+            command_list = shlex.split(str(command))
+        except ValueError:
+            command_list = str(command).split()
+
+        if not command_list:
+            return (0, b'', b'')
+
+        tool = os.path.basename(command_list[0])
+        option_list = command_list[1:]
+
+        if tool == 'bsub':
+            process = self.submit(command)
+
+            if ('-I' in option_list) or ('-Is' in option_list) or ('-K' in option_list):
+                process.wait()
+
+            return (process.returncode or 0, process.communicate()[0], b'')
+
+        with self.lock:
+            self.update()
+
+            if tool == 'lsid':
+                stdout = 'IBM Spectrum LSF Standard (simulator) 10.1.0.0, Jan 01 2026\n\nMy cluster name is ' + str(self.cluster) + '\nMy master name is ' + str(list(self.host_dic.keys())[0]) + '\n'
+            elif tool == 'bjobs':
+                stdout = self.get_bjobs_output(option_list)
+            elif tool == 'bqueues':
+                stdout = self.get_bqueues_output(option_list)
+            elif tool == 'bhosts':
+                stdout = self.get_bhosts_output(option_list)
+            elif tool == 'lsload':
+                stdout = get_table_output(self.load())
+            elif tool == 'lshosts':
+                stdout = 'HOST_NAME type model cpuf ncpus maxmem maxswp server RESOURCES\n'
+                stdout += ''.join([str(host) + ' X86_64 Simulator 15.0 ' + str(slot_num) + ' ' + str(slot_num * 4) + 'G 8G Yes (sim)\n' for (host, slot_num) in self.host_dic.items()])
+            elif tool == 'busers':
+                stdout = self.get_busers_output()
+            elif tool == 'bmgroup':
+                stdout = 'GROUP_NAME HOSTS\n'
+            elif tool == 'bugroup':
+                stdout = 'GROUP_NAME USERS\n'
+            elif tool == 'badmin':
+                stdout = 'LSF_UNIT_FOR_LIMITS = MB\n'
+            elif tool == 'bkill':
+                job_list = [option for option in option_list if option.isdigit()]
+                self.kill_many(job_list)
+                stdout = ''.join(['Job <' + str(job) + '> is being terminated\n' for job in job_list])
+            else:
+                return (127, b'', (str(tool) + ': command is not supported by scheduler simulator.\n').encode('utf-8'))
+
+        return (0, stdout.encode('utf-8'), b'')
+
+    def get_bjobs_output(self, option_list):
+        """
+        Support "bjobs [-u <user>|all] [-q <queue>] [-r|-p|-d|-a] [-w] [-UF|-l] [jobid ...]".
+        """
+        user = self.user
+        queue = ''
+        status_list = ['PEND', 'RUN']
+        long_format = False
+        job_list = []
+        i = 0
+
+        while i < len(option_list):
+            option = option_list[i]
+
+            if (option in ['-u', '-q']) and (i + 1 < len(option_list)):
+                if option == '-u':
+                    user = option_list[i + 1]
+                else:
+                    queue = option_list[i + 1]
+
+                i += 1
+            elif option == '-r':
+                status_list = ['RUN']
+            elif option == '-p':
+                status_list = ['PEND']
+            elif option == '-d':
+                status_list = ['DONE', 'EXIT']
+            elif option == '-a':
+                status_list = ['PEND', 'RUN', 'DONE', 'EXIT']
+            elif option in ['-UF', '-l']:
+                long_format = True
+            elif option.isdigit():
+                job_list.append(int(option))
+
+            i += 1
+
+        if job_list:
+            sim_job_list = [self.job_dic[job] for job in job_list if job in self.job_dic]
+        else:
+            sim_job_list = [job for job in self.job_dic.values() if (job.status in status_list) and (user in ['all', job.user]) and (queue in ['', job.queue])]
+
+        if long_format:
+            return '\n'.join([self.get_bjobs_uf_output(job) for job in sim_job_list])
+
+        stdout = 'JOBID USER STAT QUEUE FROM_HOST EXEC_HOST JOB_NAME SUBMIT_TIME\n'
+
+        for job in sim_job_list:
+            exec_host = (str(job.slot_num) + '*' + str(job.host)) if job.host else '-'
+            stdout += ' '.join([str(job.jobid), job.user, job.status, job.queue, list(self.host_dic.keys())[0], exec_host, job.job_name, time.strftime('%b %d %H:%M', time.localtime(job.submit_second))]) + '\n'
+
+        return stdout
+
+    def get_bjobs_uf_output(self, job):
+        """
+        Get "bjobs -UF" output of one job.
+        """
+        time_format = '%a %b %d %H:%M:%S'
+        home = '/home/' + str(job.user)
+        line_list = ['Job <' + str(job.jobid) + '>, Job Name <' + str(job.job_name) + '>, User <' + str(job.user) + '>, Project <default>, Status <' + str(job.status) + '>, Queue <' + str(job.queue) + '>, Command <' + str(job.command) + '>, Share group charged </' + str(job.user) + '>',
+                     time.strftime(time_format, time.localtime(job.submit_second)) + ': Submitted from host <' + str(list(self.host_dic.keys())[0]) + '>, CWD <$HOME>, ' + str(job.slot_num) + ' Task(s), Requested Resources <span[hosts=1] rusage[mem=' + str(job.mem) + ']>;']
+
+        if job.start_second is not None:
+            exec_host = '<' + str(job.slot_num) + '*' + str(job.host) + '>'
+            line_list.append(time.strftime(time_format, time.localtime(job.start_second)) + ': Started ' + str(job.slot_num) + ' Task(s) on Host(s) ' + exec_host + ', Allocated ' + str(job.slot_num) + ' Slot(s) on Host(s) ' + exec_host + ', Execution Home <' + home + '>, Execution CWD <' + home + '>;')
+
+        cpu_time = '%.1f' % ((job.finish_second if job.finish_second is not None else self.sim_second) - job.start_second) if (job.start_second is not None) else '0.0'
+
+        if job.status == 'RUN':
+            line_list.append(time.strftime(time_format, time.localtime(self.sim_second)) + ': Resource usage collected. The CPU time used is ' + cpu_time + ' seconds. MEM: ' + str(job.mem) + ' Mbytes; SWAP: 0 Mbytes; NTHREAD: 1; PGID: ' + str(job.jobid) + '; PIDs: ' + str(job.jobid) + ';')
+        elif job.status == 'DONE':
+            line_list.append(time.strftime(time_format, time.localtime(job.finish_second)) + ': Done successfully. The CPU time used is ' + cpu_time + ' seconds.')
+        elif job.status == 'EXIT':
+            line_list.append(time.strftime(time_format, time.localtime(job.finish_second)) + ': Exited with exit code ' + str(job.exit_code) + '. The CPU time used is ' + cpu_time + ' seconds.')
+
+            if job.killed:
+                line_list.append(time.strftime(time_format, time.localtime(job.finish_second)) + ': Completed <exit>; TERM_OWNER: job killed by owner.')
+
+        line_list.append('')
+
+        if job.status == 'PEND':
+            line_list.extend([' PENDING REASONS:', ' New job is waiting for scheduling;', ''])
+        elif job.start_second is not None:
+            line_list.extend([' MEMORY USAGE:', ' MAX MEM: ' + str(job.mem) + ' Mbytes;  AVG MEM: ' + str(job.mem) + ' Mbytes', ''])
+
+        return '\n'.join(line_list) + '\n'
+
+    def get_bqueues_output(self, option_list):
+        """
+        Support "bqueues [-w|-l] [queue ...]".
+        """
+        queue_list = [option for option in option_list if not option.startswith('-')]
+        queue_info_dic = self.queues()
+
+        if '-l' not in option_list:
+            return get_table_output(queue_info_dic, 'QUEUE_NAME', queue_list)
+
+        stdout = ''
+
+        for (i, queue) in enumerate(queue_info_dic['QUEUE_NAME']):
+            if queue_list and (queue not in queue_list):
+                continue
+
+            stdout += '\nQUEUE: ' + str(queue) + '\n  -- Simulated queue.\n\nPRIO NICE STATUS          MAX JL/U JL/P JL/H NJOBS  PEND   RUN SSUSP USUSP  RSV PJOBS\n'
+            stdout += ' '.join([queue_info_dic['PRIO'][i], '0', queue_info_dic['STATUS'][i], '-', '-', '-', '-', queue_info_dic['NJOBS'][i], queue_info_dic['PEND'][i], queue_info_dic['RUN'][i], '0', '0', '0', queue_info_dic['PJOBS'][i]]) + '\n\n'
+            stdout += 'USERS: all\nHOSTS:  ' + ' '.join(self.queue_dic[queue]['hosts']) + '\n'
+
+        return stdout
+
+    def get_bhosts_output(self, option_list):
+        """
+        Support "bhosts [-w|-l] [host ...]".
+        """
+        host_list = [option for option in option_list if not option.startswith('-')]
+        host_info_dic = self.hosts()
+
+        if '-l' not in option_list:
+            return get_table_output(host_info_dic, 'HOST_NAME', host_list)
+
+        load_info_dic = self.load()
+        stdout = ''
+
+        for (i, host) in enumerate(host_info_dic['HOST_NAME']):
+            if host_list and (host not in host_list):
+                continue
+
+            stdout += 'HOST  ' + str(host) + '\nSTATUS           CPUF  JL/U    MAX  NJOBS    RUN  SSUSP  USUSP    RSV DISPATCH_WINDOW\n'
+            stdout += ' '.join([host_info_dic['STATUS'][i], '15.00', '-', host_info_dic['MAX'][i], host_info_dic['NJOBS'][i], host_info_dic['RUN'][i], '0', '0', '0', '-']) + '\n\n'
+            stdout += ' CURRENT LOAD USED FOR SCHEDULING:\n                r15s   r1m  r15m    ut    pg    io   ls    it   tmp   swp   mem  slots\n'
+            stdout += ' Total ' + ' '.join([load_info_dic[title][i] for title in ['r15s', 'r1m', 'r15m', 'ut', 'pg']]) + ' 0 0 0 100G 8G ' + load_info_dic['mem'][i] + ' ' + str(int(host_info_dic['MAX'][i]) - int(host_info_dic['RUN'][i])) + '\n'
+            stdout += ' Reserved 0.0 0.0 0.0 0% 0.0 0 0 0 0M 0M 0M -\n\n'
+
+        return stdout
+
+    def get_busers_output(self):
+        user_dic = collections.OrderedDict()
+
+        for job in self.pending_job_list + self.running_job_list:
+            user_dic.setdefault(job.user, {'PEND': 0, 'RUN': 0})
+            user_dic[job.user][job.status] += job.slot_num
+
+        stdout = 'USER/GROUP JL/P MAX NJOBS PEND RUN SSUSP USUSP RSV\n'
+
+        for (user, num_dic) in user_dic.items():
+            stdout += ' '.join([str(user), '-', '-', str(num_dic['PEND'] + num_dic['RUN']), str(num_dic['PEND']), str(num_dic['RUN']), '0', '0', '0']) + '\n'
+
+        return stdout
+
+
+def get_bsub_option_list(command):
+    """
+    Get arguments after "bsub" from (shell) command, such as 'cd /path; bsub -q normal -I "make"'.
+    """
+    my_match = re.search(r'(^|[;&|\s])bsub\s+(.*)$', str(command), re.S)
+
+    if not my_match:
+        return []
+
+    try:
+        return shlex.split(my_match.group(2))
+    except ValueError:
+        return my_match.group(2).split()
+
+
+def get_table_output(table_dic, key_title='', key_list=None):
+    """
+    Switch {title: [item, ...]} into Title-Item type command output, only rows with key_title in key_list are shown if key_list is specified.
+    """
+    title_list = list(table_dic.keys())
+    line_list = [' '.join(title_list)]
+
+    for i in range(len(table_dic[title_list[0]]) if title_list else 0):
+        if (not key_list) or (table_dic[key_title][i] in key_list):
+            line_list.append(' '.join([table_dic[title][i] for title in title_list]))
+
+    return '\n'.join(line_list) + '\n'
+
+
+def get_sim_config():
+    """
+    Get SimBackend arguments from SCHEDULER_SIM_CONFIG_ENV (json string or json file).
+    """
+    sim_config = os.environ.get(SCHEDULER_SIM_CONFIG_ENV, '').strip()
+
+    if not sim_config:
+        return {}
+
+    try:
+        if os.path.isfile(sim_config):
+            with open(sim_config, 'r') as SCF:
+                return json.load(SCF)
+        else:
+            return json.loads(sim_config)
+    except Exception as error:
+        common.bprint('Failed on loading scheduler simulator config "' + str(sim_config) + '": ' + str(error), level='Warning')
+        return {}
+
+
+def get_scheduler_backend():
+    """
+    Get the shared scheduler backend, it is selected with environment variable SCHEDULER_BACKEND_ENV.
+    """
+    global SCHEDULER_BACKEND
+
+    with SCHEDULER_BACKEND_LOCK:
+        if SCHEDULER_BACKEND is None:
+            if os.environ.get(SCHEDULER_BACKEND_ENV, 'lsf').strip().lower() == 'sim':
+                SCHEDULER_BACKEND = SimBackend(**get_sim_config())
+            else:
+                SCHEDULER_BACKEND = LsfBackend()
+
+    return SCHEDULER_BACKEND
+
+
+def set_scheduler_backend(backend):
+    """
+    Replace the shared scheduler backend, such as a SimBackend with manual clock for benchmarks.
+    """
+    global SCHEDULER_BACKEND
+
+    with SCHEDULER_BACKEND_LOCK:
+        SCHEDULER_BACKEND = backend
+
+
+def run_command(command):
+    """
+    Run LSF command on the shared scheduler backend.
+    """
+    return get_scheduler_backend().run_command(command)
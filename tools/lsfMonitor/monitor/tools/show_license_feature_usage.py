@@ -46,18 +46,22 @@ def read_args():
                         required=True,
                         default='',
                         help='Specify license feature.')
+    parser.add_argument('-d', '--license_db',
+                        default='',
+                        help='Specify license database (sampled by "bsample -L"), read feature usage from it instead of lmstat.')
 
     args = parser.parse_args()
 
-    return args.server, args.vendor, args.feature
+    return args.server, args.vendor, args.feature, args.license_db
 
 
 class ShowLicenseFreatureUsage(QMainWindow):
-    def __init__(self, server, vendor, feature):
+    def __init__(self, server, vendor, feature, license_db=''):
         super().__init__()
         self.server = server
         self.vendor = vendor
         self.feature = feature
+        self.license_db = license_db
 
         # Get License info.
         my_show_message = ShowMessage('Info', 'Checking "' + str(self.feature) + '" usage info ...')
@@ -79,8 +83,15 @@ class ShowLicenseFreatureUsage(QMainWindow):
 
     def get_license_feature_usage(self):
         # Get self.license_dic.
-        my_get_license_info = common_license.GetLicenseInfo(specified_server=self.server, specified_feature=self.feature, lmstat_path=config.lmstat_path, bsub_command=config.lmstat_bsub_command)
-        license_dic = my_get_license_info.get_license_info()
+        license_dic = {}
+
+        if self.license_db:
+            license_dic = common_license.load_license_dic(self.license_db)
+
+        if not license_dic:
+            my_get_license_info = common_license.GetLicenseInfo(specified_server=self.server, specified_feature=self.feature, lmstat_path=config.lmstat_path, bsub_command=config.lmstat_bsub_command)
+            license_dic = my_get_license_info.get_license_info()
+
         license_feature_usage_dic_list = []
 
         if self.server in license_dic:
@@ -231,9 +242,9 @@ class ShowMessage(QThread):
 # Main Process #
 ################
 def main():
-    (server, vendor, feature) = read_args()
+    (server, vendor, feature, license_db) = read_args()
     app = QApplication(sys.argv)
-    my_show = ShowLicenseFreatureUsage(server, vendor, feature)
+    my_show = ShowLicenseFreatureUsage(server, vendor, feature, license_db)
     my_show.show()
     sys.exit(app.exec_())
 